@@ -1,26 +1,55 @@
-from fastapi import APIRouter, HTTPException, Header
+from fastapi import APIRouter, HTTPException, Header, Depends
 from typing import Optional
 import uuid
 
+from db import AsyncDatabase, User
 from models.schemas import LoginRequest, LoginResponse, UserInfo
+from utils.database import get_async_database
+from utils.user_cache import get_user_cache
 
 router = APIRouter(prefix="/api/auth", tags=["auth"])
 
+async def require_user_id(authorization: Optional[str] = Header(None)) -> str:
+    """公共依赖：从请求头取得用户ID，缺失时返回401（不查询数据库）"""
+    user_id = get_user_id_from_token(authorization)
+    if not user_id:
+        raise HTTPException(status_code=401, detail="未提供有效的认证令牌")
+    return user_id
+
+async def require_user(authorization: Optional[str] = Header(None), db: AsyncDatabase = Depends(get_async_database)) -> dict:
+    """公共依赖：解析令牌对应的用户（经进程内TTL缓存，命中时不访问数据库）"""
+    if not authorization or not authorization.startswith("Bearer "):
+        raise HTTPException(status_code=401, detail="未提供用户ID")
+    
+    user_id = authorization.replace("Bearer ", "")
+    
+    if not user_id:
+        raise HTTPException(status_code=401, detail="无效的用户ID")
+    
+    cache = get_user_cache()
+    user = cache.get(user_id)
+    if user is None:
+        user = await db.run(User(db.db).get_by_id, user_id)
+        if not user:
+            raise HTTPException(status_code=404, detail="用户不存在")
+        cache.put(user)
+    
+    user["is_guest"] = bool(user["is_guest"])
+    return user
+
 @router.post("/login", response_model=LoginResponse)
-async def login(request: LoginRequest):
+async def login(request: LoginRequest, db: AsyncDatabase = Depends(get_async_database)):
     """用户登录"""
-    from db import Database, User
-    from config.settings import DB_FILE
-    
-    db = Database(DB_FILE)
-    user_model = User(db)
+    user_model = User(db.db)
     
-    user_id = user_model.verify_password(request.username, request.password)
+    user_id = await db.run(user_model.verify_password, request.username, request.password)
     
     if not user_id:
         raise HTTPException(status_code=401, detail="用户名或密码错误")
     
-    user = user_model.get_by_id(user_id)
+    # 登录会更新 last_login，缓存的用户信息以数据库为准重新加载
+    get_user_cache().invalidate(user_id)
+    user = await db.run(user_model.get_by_id, user_id)
     if not user:
         raise HTTPException(status_code=404, detail="用户不存在")
     
@@ -32,17 +61,14 @@ async def login(request: LoginRequest):
     )
 
 @router.post("/guest", response_model=LoginResponse)
-async def create_guest():
+async def create_guest(db: AsyncDatabase = Depends(get_async_database)):
     """创建游客账号"""
-    from db import Database, User
-    from config.settings import DB_FILE
     import logging
     
     logger = logging.getLogger("easy_babeldoc.auth")
     
     try:
-        db = Database(DB_FILE)
-        user_model = User(db)
+        user_model = User(db.db)
         
         guest_id = str(uuid.uuid4())
         username = f"guest_{guest_id[:8]}"
@@ -50,7 +76,7 @@ async def create_guest():
         
         logger.info(f"Creating guest user: {username}")
         
-        user_id = user_model.create(username, password, is_guest=True)
+        user_id = await db.run(user_model.create, username, password, is_guest=True)
         
         if not user_id:
             logger.error("Failed to create guest user in database")
@@ -69,31 +95,13 @@ async def create_guest():
         raise HTTPException(status_code=500, detail=f"创建游客账号失败: {str(e)}")
 
 @router.get("/me", response_model=UserInfo)
-async def get_current_user(authorization: Optional[str] = Header(None)):
+async def get_current_user(user: dict = Depends(require_user)):
     """获取当前用户信息"""
-    from db import Database, User
-    from config.settings import DB_FILE
-    
-    if not authorization or not authorization.startswith("Bearer "):
-        raise HTTPException(status_code=401, detail="未提供用户ID")
-    
-    user_id = authorization.replace("Bearer ", "")
-    
-    if not user_id:
-        raise HTTPException(status_code=401, detail="无效的用户ID")
-    
-    db = Database(DB_FILE)
-    user_model = User(db)
-    user = user_model.get_by_id(user_id)
-    
-    if not user:
-        raise HTTPException(status_code=404, detail="用户不存在")
-    
     return UserInfo(
         user_id=user['user_id'],
         username=user['username'],
         email=user.get('email'),
-        is_guest=bool(user['is_guest'])
+        is_guest=user['is_guest']
     )
 
 @router.post("/logout")
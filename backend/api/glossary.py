@@ -1,15 +1,52 @@
 from fastapi import APIRouter, File, UploadFile, HTTPException
 import aiofiles
+import asyncio
+import codecs
+import os
 import uuid
 import json
 from datetime import datetime
 
 router = APIRouter(prefix="/api", tags=["glossary"])
 
+class _LineCounter:
+    """按块统计CSV条目数（不含表头），内容不是UTF-8时条目数为0"""
+    
+    def __init__(self):
+        self._decoder = codecs.getincrementaldecoder("utf-8")()
+        self._valid = True
+        self._lines = 0
+        self._tail = ""
+    
+    def feed(self, chunk: bytes):
+        if not self._valid:
+            return
+        try:
+            text = self._decoder.decode(chunk)
+        except UnicodeDecodeError:
+            self._valid = False
+            return
+        self._lines += text.count("\n")
+        if text:
+            self._tail = (self._tail + text)[-4096:]
+    
+    def entry_count(self) -> int:
+        if not self._valid:
+            return 0
+        try:
+            self._decoder.decode(b"", final=True)
+        except UnicodeDecodeError:
+            return 0
+        # 与 len(content.strip().split('\n')) - 1 保持一致：忽略末尾空白
+        stripped = self._tail.rstrip()
+        return self._lines - self._tail[len(stripped):].count("\n")
+
 @router.post("/glossary/upload")
 async def upload_glossary(file: UploadFile = File(...), target_lang: str = "zh"):
     """上传术语表文件"""
-    from config.settings import GLOSSARIES_DIR
+    from config.settings import GLOSSARIES_DIR, MAX_GLOSSARY_SIZE
+    from utils.uploads import receive_upload, UploadTooLargeError
+    from utils.storage import get_storage
     
     if not file.filename.endswith('.csv'):
         raise HTTPException(status_code=400, detail="只支持CSV文件")
@@ -17,15 +54,16 @@ async def upload_glossary(file: UploadFile = File(...), target_lang: str = "zh")
     glossary_id = str(uuid.uuid4())
     file_path = GLOSSARIES_DIR / f"{glossary_id}.csv"
     
-    async with aiofiles.open(file_path, 'wb') as f:
-        content = await file.read()
-        await f.write(content)
-    
+    # 边接收边统计行数并校验UTF-8，不把整个文件读入内存
+    line_counter = _LineCounter()
     try:
-        content_str = content.decode('utf-8')
-        entry_count = len(content_str.strip().split('\n')) - 1
-    except:
-        entry_count = 0
+        received = await receive_upload(file, GLOSSARIES_DIR, MAX_GLOSSARY_SIZE, on_chunk=line_counter.feed)
+    except UploadTooLargeError as e:
+        raise HTTPException(status_code=413, detail=str(e))
+    storage = get_storage()
+    await asyncio.to_thread(storage.save, storage.key_for(file_path), received["path"])
+    
+    entry_count = line_counter.entry_count()
     
     glossary_info = {
         "id": glossary_id,
@@ -38,18 +76,28 @@ async def upload_glossary(file: UploadFile = File(...), target_lang: str = "zh")
     info_path = GLOSSARIES_DIR / f"{glossary_id}.json"
     async with aiofiles.open(info_path, 'w', encoding='utf-8') as f:
         await f.write(json.dumps(glossary_info, ensure_ascii=False, indent=2))
+    await asyncio.to_thread(storage.save, storage.key_for(info_path), info_path)
     
     return glossary_info
 
 @router.get("/glossaries")
 async def list_glossaries():
-    """获取术语表列表"""
+    """获取术语表列表（使用对象存储时列出存储桶中的术语表，信息文件缓存到本地）"""
     from config.settings import GLOSSARIES_DIR
+    from utils.storage import get_storage
     
+    storage = get_storage()
+    prefix = storage.key_for(GLOSSARIES_DIR)
+    keys = await asyncio.to_thread(storage.list_keys, prefix)
     glossaries = []
     
-    for info_file in GLOSSARIES_DIR.glob("*.json"):
+    for key in keys:
+        if not key.endswith(".json"):
+            continue
         try:
+            info_file = await asyncio.to_thread(storage.fetch, key)
+            if info_file is None:
+                continue
             async with aiofiles.open(info_file, 'r', encoding='utf-8') as f:
                 content = await f.read()
                 glossary_info = json.loads(content)
@@ -63,15 +111,16 @@ async def list_glossaries():
 async def delete_glossary(glossary_id: str):
     """删除术语表"""
     from config.settings import GLOSSARIES_DIR
+    from utils.storage import get_storage
     
-    csv_path = GLOSSARIES_DIR / f"{glossary_id}.csv"
-    json_path = GLOSSARIES_DIR / f"{glossary_id}.json"
+    storage = get_storage()
+    csv_key = storage.key_for(GLOSSARIES_DIR / f"{os.path.basename(glossary_id)}.csv")
+    json_key = storage.key_for(GLOSSARIES_DIR / f"{os.path.basename(glossary_id)}.json")
     
-    if not csv_path.exists():
+    if not await asyncio.to_thread(storage.exists, csv_key):
         raise HTTPException(status_code=404, detail="术语表不存在")
     
-    csv_path.unlink()
-    if json_path.exists():
-        json_path.unlink()
+    await asyncio.to_thread(storage.delete, csv_key)
+    await asyncio.to_thread(storage.delete, json_key)
     
     return {"message": "术语表已删除"}
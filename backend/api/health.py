@@ -3,17 +3,57 @@ from pathlib import Path
 
 router = APIRouter(prefix="/api", tags=["health"])
 
+def _database_stats():
+    """需要聚合查询的统计，在数据库线程中执行"""
+    from utils import artifacts, result_cache, translation_memory
+    
+    return {
+        "artifacts": artifacts.stats(),
+        "result_cache": result_cache.stats(),
+        "translation_memory": translation_memory.stats(),
+    }
+
 @router.get("/health")
 async def health_check():
     """Health check endpoint for the packaged application."""
-    from config.settings import FRONTEND_STATIC_DIR, DATA_DIR
+    from config.settings import FRONTEND_STATIC_DIR, DATA_DIR, TRANSLATION_EXECUTION_MODE
+    from utils.layout_pool import get_layout_model_pool
+    from utils.progress_buffer import get_progress_buffer
+    from utils.progress_hub import get_progress_hub
+    from utils.user_cache import get_user_cache
+    from utils import downloads, orphans, quotas, retention
+    from utils.database import get_database, get_async_database
+    from utils.storage import get_storage
     
-    return {
+    database_stats = await get_async_database().run(_database_stats)
+    health = {
         "status": "ok",
         "version": "1.0.0",
         "frontend_ready": FRONTEND_STATIC_DIR.exists(),
         "data_dir": str(DATA_DIR),
+        "execution_mode": TRANSLATION_EXECUTION_MODE,
+        "database_backend": get_database().dialect,
+        "database_pool": get_database().pool.stats(),
+        "database_executor": get_async_database().stats(),
+        "layout_model_pool": get_layout_model_pool().stats(),
+        "progress_writes": get_progress_buffer().stats(),
+        "progress_hub": get_progress_hub().stats(),
+        "artifacts": database_stats["artifacts"],
+        "downloads": downloads.stats(),
+        "orphans": orphans.stats(),
+        "result_cache": database_stats["result_cache"],
+        "retention": retention.stats(),
+        "storage": get_storage().stats(),
+        "storage_quota": quotas.stats(),
+        "translation_memory": database_stats["translation_memory"],
+        "user_cache": get_user_cache().stats(),
     }
+    
+    if TRANSLATION_EXECUTION_MODE == "process":
+        from utils.worker_pool import get_worker_pool
+        health["worker_pool"] = get_worker_pool().stats()
+    
+    return health
 
 @router.get("")
 async def api_root():
@@ -1,41 +1,18 @@
-from fastapi import APIRouter, HTTPException, Header, Depends
-from typing import List, Optional
+from fastapi import APIRouter, HTTPException, Depends
+from typing import List
 from models.schemas import ModelCreate, ModelUpdate, ModelInfo
-from db.database import Database
-from config.settings import DB_FILE
-from db import User
+from api.auth import require_user
+from db import AsyncDatabase
+from utils.database import get_async_database
 
 router = APIRouter(prefix="/api", tags=["models"])
-db = Database(DB_FILE)
-
-async def get_current_user(authorization: Optional[str] = Header(None)) -> dict:
-    """获取当前用户"""
-    if not authorization or not authorization.startswith("Bearer "):
-        raise HTTPException(status_code=401, detail="未提供用户ID")
-    
-    user_id = authorization.replace("Bearer ", "")
-    
-    if not user_id:
-        raise HTTPException(status_code=401, detail="无效的用户ID")
-    
-    user_model = User(db)
-    user = user_model.get_by_id(user_id)
-    
-    if not user:
-        raise HTTPException(status_code=404, detail="用户不存在")
-    
-    return {
-        "user_id": user['user_id'],
-        "username": user['username'],
-        "is_guest": bool(user['is_guest'])
-    }
 
 @router.get("/models", response_model=List[ModelInfo])
-async def get_models(current_user: dict = Depends(get_current_user)):
+async def get_models(current_user: dict = Depends(require_user), db: AsyncDatabase = Depends(get_async_database)):
     """获取当前用户的所有模型配置"""
     user_id = current_user["user_id"]
     
-    rows = db.fetchall(
+    rows = await db.fetchall(
         "SELECT * FROM models WHERE user_id = ? ORDER BY is_default DESC, created_at DESC",
         (user_id,)
     )
@@ -54,17 +31,17 @@ async def get_models(current_user: dict = Depends(get_current_user)):
     ]
 
 @router.post("/models", response_model=ModelInfo)
-async def create_model(model_data: ModelCreate, current_user: dict = Depends(get_current_user)):
+async def create_model(model_data: ModelCreate, current_user: dict = Depends(require_user), db: AsyncDatabase = Depends(get_async_database)):
     """创建新的模型配置"""
     user_id = current_user["user_id"]
     
     if model_data.is_default:
-        db.execute(
+        await db.execute(
             "UPDATE models SET is_default = 0 WHERE user_id = ?",
             (user_id,)
         )
     
-    cursor = db.execute(
+    model_id = await db.insert(
         """
         INSERT INTO models (user_id, base_url, api_key, model, is_default)
         VALUES (?, ?, ?, ?, ?)
@@ -72,9 +49,7 @@ async def create_model(model_data: ModelCreate, current_user: dict = Depends(get
         (user_id, model_data.base_url, model_data.api_key, model_data.model, int(model_data.is_default))
     )
     
-    model_id = cursor.lastrowid
-    
-    row = db.fetchone("SELECT * FROM models WHERE id = ?", (model_id,))
+    row = await db.fetchone("SELECT * FROM models WHERE id = ?", (model_id,))
     
     return ModelInfo(
         id=row["id"],
@@ -87,11 +62,11 @@ async def create_model(model_data: ModelCreate, current_user: dict = Depends(get
     )
 
 @router.put("/models/{model_id}", response_model=ModelInfo)
-async def update_model(model_id: int, model_data: ModelUpdate, current_user: dict = Depends(get_current_user)):
+async def update_model(model_id: int, model_data: ModelUpdate, current_user: dict = Depends(require_user), db: AsyncDatabase = Depends(get_async_database)):
     """更新模型配置"""
     user_id = current_user["user_id"]
     
-    existing = db.fetchone(
+    existing = await db.fetchone(
         "SELECT * FROM models WHERE id = ? AND user_id = ?",
         (model_id, user_id)
     )
@@ -100,7 +75,7 @@ async def update_model(model_id: int, model_data: ModelUpdate, current_user: dic
         raise HTTPException(status_code=404, detail="模型配置不存在")
     
     if model_data.is_default:
-        db.execute(
+        await db.execute(
             "UPDATE models SET is_default = 0 WHERE user_id = ?",
             (user_id,)
         )
@@ -126,12 +101,12 @@ async def update_model(model_id: int, model_data: ModelUpdate, current_user: dic
     
     if update_fields:
         params.extend([model_id, user_id])
-        db.execute(
+        await db.execute(
             f"UPDATE models SET {', '.join(update_fields)} WHERE id = ? AND user_id = ?",
             tuple(params)
         )
     
-    row = db.fetchone("SELECT * FROM models WHERE id = ?", (model_id,))
+    row = await db.fetchone("SELECT * FROM models WHERE id = ?", (model_id,))
     
     return ModelInfo(
         id=row["id"],
@@ -144,11 +119,11 @@ async def update_model(model_id: int, model_data: ModelUpdate, current_user: dic
     )
 
 @router.delete("/models/{model_id}")
-async def delete_model(model_id: int, current_user: dict = Depends(get_current_user)):
+async def delete_model(model_id: int, current_user: dict = Depends(require_user), db: AsyncDatabase = Depends(get_async_database)):
     """删除模型配置"""
     user_id = current_user["user_id"]
     
-    existing = db.fetchone(
+    existing = await db.fetchone(
         "SELECT * FROM models WHERE id = ? AND user_id = ?",
         (model_id, user_id)
     )
@@ -156,16 +131,16 @@ async def delete_model(model_id: int, current_user: dict = Depends(get_current_u
     if not existing:
         raise HTTPException(status_code=404, detail="模型配置不存在")
     
-    db.execute("DELETE FROM models WHERE id = ? AND user_id = ?", (model_id, user_id))
+    await db.execute("DELETE FROM models WHERE id = ? AND user_id = ?", (model_id, user_id))
     
     return {"message": "模型配置已删除"}
 
 @router.put("/models/{model_id}/set-default")
-async def set_default_model(model_id: int, current_user: dict = Depends(get_current_user)):
+async def set_default_model(model_id: int, current_user: dict = Depends(require_user), db: AsyncDatabase = Depends(get_async_database)):
     """设置默认模型"""
     user_id = current_user["user_id"]
     
-    existing = db.fetchone(
+    existing = await db.fetchone(
         "SELECT * FROM models WHERE id = ? AND user_id = ?",
         (model_id, user_id)
     )
@@ -173,12 +148,12 @@ async def set_default_model(model_id: int, current_user: dict = Depends(get_curr
     if not existing:
         raise HTTPException(status_code=404, detail="模型配置不存在")
     
-    db.execute(
+    await db.execute(
         "UPDATE models SET is_default = 0 WHERE user_id = ?",
         (user_id,)
     )
     
-    db.execute(
+    await db.execute(
         "UPDATE models SET is_default = 1 WHERE id = ? AND user_id = ?",
         (model_id, user_id)
     )
@@ -1,147 +1,300 @@
-from fastapi import APIRouter, HTTPException, WebSocket, WebSocketDisconnect, Header
-from fastapi.responses import FileResponse
+from fastapi import APIRouter, Depends, HTTPException, Request, WebSocket, WebSocketDisconnect, Query, Response
+from fastapi.responses import StreamingResponse
 from pathlib import Path
 from typing import Dict, List, Optional
+import base64
+import json
 import uuid
 import asyncio
-import json
 from datetime import datetime
+import logging
+
+from api.auth import require_user_id
+from models.schemas import BundleRequest, TranslationRequest
 
-from models.schemas import TranslationRequest
+logger = logging.getLogger("easy_babeldoc.translation")
 
 router = APIRouter(prefix="/api", tags=["translation"])
 
 active_translations: Dict[str, Dict] = {}
-connected_clients: Dict[str, WebSocket] = {}
 active_tasks: Dict[str, asyncio.Task] = {}
 
+# 服务关闭期间被中断的任务保留在持久化队列中，重启后自动恢复
+_shutting_down = False
+
+def get_scheduler():
+    """获取绑定到 active_translations 的全局调度器"""
+    from utils.scheduler import get_scheduler as _get_scheduler
+    return _get_scheduler(active_translations)
+
 @router.post("/translate")
-async def start_translation(request: TranslationRequest, authorization: Optional[str] = Header(None)):
-    """开始翻译任务"""
-    from config.settings import UPLOADS_DIR, OUTPUTS_DIR, GLOSSARIES_DIR, SENSITIVE_CONFIG_KEYS
+async def start_translation(request: TranslationRequest, user_id: str = Depends(require_user_id)):
+    """开始翻译任务（提交到调度队列）"""
+    from config.settings import SENSITIVE_CONFIG_KEYS
     from utils.history import add_to_history
-    from api.auth import get_user_id_from_token
-    
-    user_id = get_user_id_from_token(authorization)
-    if not user_id:
-        raise HTTPException(status_code=401, detail="未提供有效的认证令牌")
+    from utils.scheduler import QueueFullError, user_priority
+    from utils.jobs import persist_job
+    from utils.uploads import get_upload_store, upload_exists
+    from utils import result_cache
+    from utils.artifacts import record_artifacts
+    from utils.database import get_async_database
     
     try:
-        from babeldoc.format.pdf.translation_config import TranslationConfig
-        from babeldoc.translator.translator import OpenAITranslator
-        from babeldoc.docvision.doclayout import DocLayoutModel
-        from babeldoc.glossary import Glossary
+        import babeldoc.format.pdf.high_level  # noqa: F401
     except ImportError:
         raise HTTPException(status_code=500, detail="BabelDOC未安装")
     
     task_id = str(uuid.uuid4())
     
-    file_path = UPLOADS_DIR / f"{request.file_id}.pdf"
-    if not file_path.exists():
+    if not await get_async_database().run(upload_exists, request.file_id):
         raise HTTPException(status_code=404, detail="文件不存在")
+    # 按配额淘汰上传文件时最近使用的最后删除
+    get_async_database().submit(get_upload_store().touch, request.file_id)
+    
+    request_config = request.model_dump(exclude=SENSITIVE_CONFIG_KEYS)
+    
+    task_data = {
+        "task_id": task_id,
+        "user_id": user_id,
+        "status": "queued",
+        "filename": request.original_filename or f"{request.file_id}.pdf",
+        "source_lang": request.lang_in,
+        "target_lang": request.lang_out,
+        "model": request.model,
+        "start_time": datetime.now().isoformat(),
+        "progress": 0,
+        "stage": "排队中",
+        "config": request_config
+    }
+    
+    # 相同文件、参数和术语表的翻译结果已存在时直接复用，不再排队
+    try:
+        cached_result = await asyncio.to_thread(result_cache.lookup, request, task_id)
+    except Exception as e:
+        logger.warning("查询翻译结果缓存失败: %s", e)
+        cached_result = None
+    
+    if cached_result:
+        task_data.update({
+            "status": "completed",
+            "progress": 100,
+            "stage": "完成",
+            "message": "已复用相同文件的翻译结果",
+            "result": cached_result,
+            "end_time": datetime.now().isoformat()
+        })
+        add_to_history(task_data)
+        await record_artifacts(task_id, user_id, cached_result)
+        return {
+            "task_id": task_id,
+            "status": "completed",
+            "queue_position": 0,
+            "cached": True
+        }
+    
+    active_translations[task_id] = task_data
+    # 优先级由服务端按用户类型决定，客户端不能自行插队
+    priority = await get_async_database().run(user_priority, user_id)
     
     try:
-        translator = OpenAITranslator(
-            lang_in=request.lang_in,
-            lang_out=request.lang_out,
-            model=request.model,
-            api_key=request.api_key,
-            base_url=request.base_url
+        position = get_scheduler().submit(
+            task_id,
+            user_id,
+            lambda: run_translation(task_id, request),
+            priority=priority
         )
-        
-        doc_layout_model = DocLayoutModel.load_onnx()
-        
-        glossaries = []
-        for glossary_id in request.glossary_ids:
-            glossary_path = GLOSSARIES_DIR / f"{glossary_id}.csv"
-            if glossary_path.exists():
-                glossary = Glossary.from_csv(glossary_path, request.lang_out)
-                glossaries.append(glossary)
-        
-        config = TranslationConfig(
-            translator=translator,
-            input_file=str(file_path),
-            lang_in=request.lang_in,
-            lang_out=request.lang_out,
-            doc_layout_model=doc_layout_model,
-            pages=request.pages,
-            output_dir=str(OUTPUTS_DIR / task_id),
-            debug=request.debug,
-            no_dual=request.no_dual,
-            no_mono=request.no_mono,
-            qps=request.qps,
-            glossaries=glossaries,
-            watermark_output_mode=False
+    except QueueFullError:
+        del active_translations[task_id]
+        raise HTTPException(status_code=429, detail="翻译队列已满，请稍后再试")
+    
+    add_to_history(task_data)
+    persist_job(task_id, user_id, request, priority=priority)
+    
+    return {
+        "task_id": task_id,
+        "status": "queued" if position else "started",
+        "queue_position": position
+    }
+
+def iter_task_events(task_id: str, request: TranslationRequest):
+    """按配置的执行方式运行翻译，返回进度事件的异步迭代器"""
+    from config.settings import SHARD_PAGES, SHARD_MAX_PARALLEL
+    
+    if request.sharded:
+        from utils.sharding import iter_sharded_events
+        return iter_sharded_events(
+            task_id, request, _iter_single_events,
+            shard_pages=SHARD_PAGES, max_parallel=SHARD_MAX_PARALLEL
         )
+    return _iter_single_events(task_id, request)
+
+def _iter_single_events(task_id: str, request: TranslationRequest):
+    """运行单个BabelDOC任务（整份文档或一个分片）"""
+    from config.settings import TRANSLATION_EXECUTION_MODE
+    
+    if TRANSLATION_EXECUTION_MODE == "process":
+        from utils.worker_pool import get_worker_pool
+        return get_worker_pool().run(task_id, request.model_dump())
+    
+    from utils.translation_job import iter_translation_events
+    return iter_translation_events(task_id, request)
+
+async def resume_pending_translations():
+    """服务启动时把上次未完成的任务重新加入调度队列"""
+    from config.settings import JOB_MAX_RESUME_ATTEMPTS
+    from utils.history import add_to_history, get_task
+    from utils.jobs import load_pending_jobs, finish_job, increment_job_attempts
+    from utils.uploads import upload_exists
+    from utils.scheduler import QueueFullError
+    from utils.database import get_async_database
+    
+    resumed = 0
+    for job in await get_async_database().run(load_pending_jobs):
+        task_id = job["task_id"]
+        request = job["translation_request"]
+        task = await get_task(task_id, active_translations)
         
-        request_config = request.model_dump(exclude=SENSITIVE_CONFIG_KEYS)
+        if not task:
+            finish_job(task_id)
+            continue
         
-        task_data = {
-            "task_id": task_id,
-            "user_id": user_id,
-            "status": "running",
-            "filename": request.original_filename or f"{request.file_id}.pdf",
-            "source_lang": request.lang_in,
-            "target_lang": request.lang_out,
-            "model": request.model,
-            "start_time": datetime.now().isoformat(),
-            "progress": 0,
-            "stage": "初始化",
-            "config": request_config
-        }
+        reason = None
+        if job["attempts"] >= JOB_MAX_RESUME_ATTEMPTS:
+            reason = "任务多次因服务重启中断，已停止自动恢复"
+        elif request is None:
+            reason = "服务重启后无法取回API密钥，任务无法自动恢复"
+        elif not await get_async_database().run(upload_exists, request.file_id):
+            reason = "服务重启后源文件已不存在，任务无法自动恢复"
         
-        active_translations[task_id] = task_data
-        add_to_history(task_data)
+        if reason:
+            task.update({
+                "status": "error",
+                "error": reason,
+                "end_time": datetime.now().isoformat()
+            })
+            add_to_history(task)
+            finish_job(task_id)
+            continue
         
-        task = asyncio.create_task(run_translation(task_id, config))
-        active_tasks[task_id] = task
+        task.update({
+            "status": "queued",
+            "progress": 0,
+            "stage": "排队中",
+            "message": "服务重启后自动恢复",
+            "error": None,
+            "end_time": None
+        })
+        active_translations[task_id] = task
         
-        return {"task_id": task_id, "status": "started"}
+        try:
+            get_scheduler().submit(
+                task_id,
+                job["user_id"],
+                lambda task_id=task_id, request=request: run_translation(task_id, request),
+                priority=job.get("priority") or 0
+            )
+        except QueueFullError:
+            del active_translations[task_id]
+            task.update({
+                "status": "error",
+                "error": "服务重启后翻译队列已满，任务无法自动恢复",
+                "end_time": datetime.now().isoformat()
+            })
+            add_to_history(task)
+            finish_job(task_id)
+            continue
         
-    except Exception as e:
-        raise HTTPException(status_code=500, detail=f"翻译启动失败: {str(e)}")
+        increment_job_attempts(task_id)
+        add_to_history(task)
+        resumed += 1
+    
+    if resumed:
+        logger.info("Resumed %s unfinished translation task(s)", resumed)
+    return resumed
 
-async def run_translation(task_id: str, config):
-    """运行翻译任务"""
+async def shutdown_translations():
+    """服务关闭时中断运行中的任务，但保留其持久化记录以便重启后恢复"""
+    global _shutting_down
+    _shutting_down = True
+    
+    tasks = get_scheduler().shutdown()
+    if tasks:
+        await asyncio.wait(tasks, timeout=10)
+
+def _suspend_for_restart(task_id: str):
+    """服务关闭导致的中断：任务回到排队状态，等待重启后恢复"""
     from utils.history import add_to_history
     
+    task = active_translations.get(task_id)
+    if task is not None:
+        task.update({
+            "status": "queued",
+            "stage": "等待服务重启",
+            "message": "服务重启后将自动恢复"
+        })
+        add_to_history(task)
+
+async def _store_cached_result(task_id: str, request: TranslationRequest, result: Dict):
+    """把完成的输出登记到翻译结果缓存，失败不影响任务本身"""
+    from utils import result_cache
+    
     try:
-        import babeldoc.format.pdf.high_level as high_level
-    except ImportError:
+        await asyncio.to_thread(result_cache.store, request, task_id, result)
+    except Exception as e:
+        logger.error("写入翻译结果缓存失败: %s", e)
+
+async def run_translation(task_id: str, request: TranslationRequest):
+    """运行翻译任务（由调度器在获得执行槽位后调用）"""
+    from utils.artifacts import record_artifacts
+    from utils.history import add_to_history
+    from utils.jobs import mark_job_running, finish_job
+    from utils.progress_buffer import get_progress_buffer
+    from utils.progress_hub import get_progress_hub
+    
+    if task_id not in active_translations:
+        finish_job(task_id)
         return
     
+    mark_job_running(task_id)
+    active_tasks[task_id] = asyncio.current_task()
+    active_translations[task_id].update({
+        "status": "running",
+        "stage": "初始化",
+        "message": ""
+    })
+    active_translations[task_id].pop("queue_position", None)
+    add_to_history(active_translations[task_id])
+    
+    progress_buffer = get_progress_buffer()
+    events = iter_task_events(task_id, request)
+    suspended = False
     try:
-        async for event in high_level.async_translate(config):
+        async for event in events:
             # 检查任务是否被取消
             if task_id not in active_translations:
                 break
             
             if task_id in active_translations:
                 if event["type"] == "progress_update":
-                    active_translations[task_id].update({
+                    progress_fields = {
                         "progress": event.get("overall_progress", 0),
                         "stage": event.get("stage", "处理中"),
                         "message": event.get("message", "")
-                    })
-                    add_to_history(active_translations[task_id])
+                    }
+                    active_translations[task_id].update(progress_fields)
+                    # 进度写入经过缓冲合并，状态变化仍在下面立即整体写入
+                    progress_buffer.record(task_id, progress_fields)
                 elif event["type"] == "finish":
-                    result = event["translate_result"]
-                    mono_path = getattr(result, "mono_pdf_path", None)
-                    dual_path = getattr(result, "dual_pdf_path", None)
-                    
                     active_translations[task_id].update({
                         "status": "completed",
                         "progress": 100,
                         "stage": "完成",
-                        "result": {
-                            "mono_pdf_path": str(mono_path) if mono_path else None,
-                            "dual_pdf_path": str(dual_path) if dual_path else None,
-                            "total_seconds": getattr(result, "total_seconds", 0),
-                            "peak_memory_usage": getattr(result, "peak_memory_usage", 0)
-                        },
+                        "result": event["translate_result"],
                         "end_time": datetime.now().isoformat()
                     })
                     add_to_history(active_translations[task_id])
+                    await record_artifacts(task_id, active_translations[task_id].get("user_id"), event["translate_result"])
+                    await _store_cached_result(task_id, request, event["translate_result"])
                 elif event["type"] == "error":
                     active_translations[task_id].update({
                         "status": "error",
@@ -150,13 +303,14 @@ async def run_translation(task_id: str, config):
                     })
                     add_to_history(active_translations[task_id])
                 
-                if task_id in connected_clients:
-                    try:
-                        await connected_clients[task_id].send_text(json.dumps(event))
-                    except:
-                        pass
+                # 广播给所有订阅者，只入队不等待发送，慢客户端不会拖慢翻译
+                get_progress_hub().publish(task_id, event)
                         
     except asyncio.CancelledError:
+        if _shutting_down:
+            suspended = True
+            _suspend_for_restart(task_id)
+            raise
         # 任务被取消
         if task_id in active_translations:
             active_translations[task_id].update({
@@ -167,7 +321,10 @@ async def run_translation(task_id: str, config):
             add_to_history(active_translations[task_id])
         raise
     except Exception as e:
-        if task_id in active_translations:
+        if _shutting_down:
+            suspended = True
+            _suspend_for_restart(task_id)
+        elif task_id in active_translations:
             active_translations[task_id].update({
                 "status": "error",
                 "error": str(e),
@@ -175,7 +332,11 @@ async def run_translation(task_id: str, config):
             })
             add_to_history(active_translations[task_id])
     finally:
-        # 清理任务
+        # 清理任务（提前退出时同时结束事件源，工作进程模式下会回收对应进程）
+        await events.aclose()
+        progress_buffer.discard(task_id)
+        if not suspended:
+            finish_job(task_id)
         if task_id in active_tasks:
             del active_tasks[task_id]
 
@@ -184,7 +345,7 @@ async def get_translation_status(task_id: str):
     """获取翻译任务状态"""
     from utils.history import get_task
     
-    task = get_task(task_id, active_translations)
+    task = await get_task(task_id, active_translations)
     if not task:
         raise HTTPException(status_code=404, detail="任务不存在")
     
@@ -192,98 +353,198 @@ async def get_translation_status(task_id: str):
 
 @router.websocket("/translation/{task_id}/ws")
 async def websocket_endpoint(websocket: WebSocket, task_id: str):
-    """WebSocket连接用于实时进度更新"""
+    """WebSocket连接用于实时进度更新（同一任务支持多个连接）"""
+    from utils.history import get_task
+    from utils.progress_hub import get_progress_hub, build_snapshot, pump
+    
     await websocket.accept()
-    connected_clients[task_id] = websocket
+    
+    task = await get_task(task_id, active_translations)
+    hub = get_progress_hub()
+    subscriber = hub.subscribe(task_id, build_snapshot(task) if task else None)
+    sender = asyncio.create_task(pump(websocket, subscriber))
     
     try:
         while True:
             await websocket.receive_text()
     except WebSocketDisconnect:
-        if task_id in connected_clients:
-            del connected_clients[task_id]
+        pass
+    finally:
+        hub.unsubscribe(task_id, subscriber)
+        sender.cancel()
 
-@router.get("/translation/{task_id}/download/{file_type}")
-async def download_result(task_id: str, file_type: str):
-    """下载翻译结果文件"""
+@router.api_route("/translation/{task_id}/download/{file_type}", methods=["GET", "HEAD"])
+async def download_result(task_id: str, file_type: str, request: Request):
+    """下载翻译结果文件（支持 ETag/304 与 Range 续传）"""
+    from utils import downloads
     from utils.history import get_task
     
-    task = get_task(task_id, active_translations)
-    if not task:
-        raise HTTPException(status_code=404, detail="任务不存在")
-    
-    if task["status"] != "completed":
-        raise HTTPException(status_code=400, detail="翻译未完成")
+    if file_type not in ("mono", "dual"):
+        raise HTTPException(status_code=400, detail="无效的文件类型")
     
-    result = task.get("result", {})
+    # 已登记的输出文件直接按登记记录响应，不读取任务记录
+    target = await downloads.resolve(task_id, file_type)
+    if target is None:
+        task = await get_task(task_id, active_translations)
+        if not task:
+            raise HTTPException(status_code=404, detail="任务不存在")
+        
+        if task["status"] != "completed":
+            raise HTTPException(status_code=400, detail="翻译未完成")
+        
+        file_path = (task.get("result") or {}).get(f"{file_type}_pdf_path")
+        if not file_path or not Path(file_path).exists():
+            if await downloads.is_evicted(task_id, file_type):
+                raise HTTPException(status_code=410, detail="文件已按存储配额清理")
+            raise HTTPException(status_code=404, detail="文件不存在")
+        
+        target = await downloads.register(task_id, file_type, file_path, task.get("user_id"))
+        if target is None:
+            raise HTTPException(status_code=404, detail="文件不存在")
     
-    if file_type == "mono":
-        file_path = result.get("mono_pdf_path")
-    elif file_type == "dual":
-        file_path = result.get("dual_pdf_path")
-    else:
+    downloads.touch(task_id, file_type)
+    return downloads.build_response(request, target, f"{task_id}_{file_type}.pdf")
+
+@router.post("/translations/bundle")
+async def download_bundle(request: BundleRequest, user_id: str = Depends(require_user_id)):
+    """把多个任务的结果打包为ZIP流式下载（包含 manifest.json）"""
+    from config.settings import BUNDLE_MAX_TASKS, DOWNLOAD_CHUNK_SIZE
+    from utils.artifacts import get_artifact_model
+    from utils import downloads
+    from utils.bundle import stream_bundle
+    from utils.database import get_async_database
+    from utils.history import get_tasks
+    
+    task_ids = list(dict.fromkeys(request.task_ids))
+    if len(task_ids) > BUNDLE_MAX_TASKS:
+        raise HTTPException(status_code=400, detail=f"一次最多打包 {BUNDLE_MAX_TASKS} 个任务")
+    file_types = list(dict.fromkeys(request.file_types))
+    if not file_types or any(kind not in ("mono", "dual") for kind in file_types):
         raise HTTPException(status_code=400, detail="无效的文件类型")
     
-    if not file_path or not Path(file_path).exists():
-        raise HTTPException(status_code=404, detail="文件不存在")
+    tasks = await get_tasks(task_ids, active_translations)
+    artifacts = await get_async_database().run(get_artifact_model().get_for_tasks, task_ids)
     
-    return FileResponse(
-        path=file_path,
-        filename=f"{task_id}_{file_type}.pdf",
-        media_type="application/pdf"
+    selected, skipped = [], []
+    for task_id in task_ids:
+        task = tasks.get(task_id)
+        if not task or task.get("user_id") != user_id:
+            skipped.append({"task_id": task_id, "reason": "任务不存在"})
+            continue
+        if task["status"] != "completed":
+            skipped.append({"task_id": task_id, "reason": "翻译未完成"})
+            continue
+        # 优先使用登记的输出文件（带校验和），未登记时使用任务结果中的路径
+        recorded = {a["kind"]: a for a in artifacts.get(task_id, []) if not a["missing"]}
+        files = []
+        for kind in file_types:
+            if kind in recorded:
+                files.append({"kind": kind, "path": recorded[kind]["path"], "checksum": recorded[kind]["checksum"]})
+            elif (task.get("result") or {}).get(f"{kind}_pdf_path"):
+                files.append({"kind": kind, "path": task["result"][f"{kind}_pdf_path"], "checksum": None})
+        if not files:
+            skipped.append({"task_id": task_id, "reason": "文件不存在"})
+            continue
+        selected.append(dict(task, files=files))
+    
+    if not selected:
+        raise HTTPException(status_code=404, detail="没有可下载的文件")
+    for task in selected:
+        for item in task["files"]:
+            downloads.touch(task["task_id"], item["kind"])
+    
+    filename = f"translations_{datetime.now().strftime('%Y%m%d_%H%M%S')}.zip"
+    return StreamingResponse(
+        stream_bundle(selected, skipped, DOWNLOAD_CHUNK_SIZE),
+        media_type="application/zip",
+        headers={
+            "content-disposition": f'attachment; filename="{filename}"',
+            "cache-control": "no-store",
+        }
     )
 
+def _encode_cursor(task: Dict) -> str:
+    raw = json.dumps([task.get("start_time"), task.get("task_id")], ensure_ascii=False)
+    return base64.urlsafe_b64encode(raw.encode("utf-8")).decode("ascii").rstrip("=")
+
+def _decode_cursor(cursor: str) -> tuple:
+    try:
+        raw = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4))
+        start_time, task_id = json.loads(raw)
+        return str(start_time), str(task_id)
+    except Exception:
+        raise HTTPException(status_code=400, detail="无效的分页游标")
+
 @router.get("/translations")
-async def list_translations(authorization: Optional[str] = Header(None)):
-    """获取翻译历史"""
-    from utils.history import load_history
-    from api.auth import get_user_id_from_token
-    
-    user_id = get_user_id_from_token(authorization)
-    if not user_id:
-        raise HTTPException(status_code=401, detail="未提供有效的认证令牌")
-    
-    history = load_history(user_id=user_id)
-    
+async def list_translations(
+    response: Response,
+    user_id: str = Depends(require_user_id),
+    limit: Optional[int] = Query(None, ge=1, le=500),
+    cursor: Optional[str] = None,
+    status: Optional[str] = None,
+    source_lang: Optional[str] = None,
+    target_lang: Optional[str] = None,
+    model: Optional[str] = None,
+    start_from: Optional[str] = None,
+    start_to: Optional[str] = None,
+    filename_prefix: Optional[str] = None
+):
+    """获取翻译历史（按开始时间倒序）
+    
+    不传 limit 时返回全部记录；传入 limit 时按页返回，
+    还有下一页时在 X-Next-Cursor 响应头中给出游标，作为下一次请求的 cursor 参数。
+    status 可用逗号分隔多个状态。
+    """
+    from utils.history import load_history_page
+    from utils.artifacts import get_artifact_model, file_status
+    from utils.database import get_async_database
+    
+    filters = {
+        "status": [s.strip() for s in status.split(",") if s.strip()] if status else None,
+        "source_lang": source_lang,
+        "target_lang": target_lang,
+        "model": model,
+        "start_from": start_from,
+        "start_to": start_to,
+        "filename_prefix": filename_prefix
+    }
+    after = _decode_cursor(cursor) if cursor else None
+    
+    # 多取一条用于判断是否还有下一页
+    history = await load_history_page(user_id, filters, limit + 1 if limit else None, after)
+    if limit and len(history) > limit:
+        history = history[:limit]
+        response.headers["X-Next-Cursor"] = _encode_cursor(history[-1])
+    
+    # 输出文件的存在与大小读自登记表，由后台任务核对，不在请求中逐个 stat
+    artifacts = await get_async_database().run(
+        get_artifact_model().get_for_tasks, [task["task_id"] for task in history]
+    )
     for task in history:
-        task_id = task.get('task_id')
-        result = task.get('result', {})
-        
-        file_status = {
-            'mono_exists': False,
-            'dual_exists': False,
-            'mono_size': 0,
-            'dual_size': 0
-        }
-        
-        if task.get('status') == 'completed' and result:
-            mono_path = result.get('mono_pdf_path')
-            dual_path = result.get('dual_pdf_path')
-            
-            if mono_path and Path(mono_path).exists():
-                file_status['mono_exists'] = True
-                file_status['mono_size'] = Path(mono_path).stat().st_size
-            
-            if dual_path and Path(dual_path).exists():
-                file_status['dual_exists'] = True
-                file_status['dual_size'] = Path(dual_path).stat().st_size
-        
-        task['file_status'] = file_status
+        task["file_status"] = file_status(artifacts.get(task["task_id"], []))
+    return history
+
+@router.get("/translations/queue")
+async def get_translation_queue(user_id: str = Depends(require_user_id)):
+    """查看调度队列：全局运行/排队数量以及当前用户的任务位置"""
     
-    return sorted(history, key=lambda x: x.get('start_time', ''), reverse=True)
+    return get_scheduler().snapshot(user_id=user_id)
 
 @router.delete("/translation/{task_id}")
 async def delete_translation(task_id: str):
     """删除翻译记录"""
     from utils.history import delete_task
+    from utils.jobs import finish_job
     
-    success = delete_task(task_id)
+    success = await delete_task(task_id)
     
     if not success:
         raise HTTPException(status_code=404, detail="翻译记录不存在")
     
     if task_id in active_translations:
         del active_translations[task_id]
+    get_scheduler().cancel(task_id)
+    finish_job(task_id)
     
     return {"message": "翻译记录已删除"}
 
@@ -291,13 +552,16 @@ async def delete_translation(task_id: str):
 async def delete_multiple_translations(task_ids: List[str]):
     """批量删除翻译记录"""
     from utils.history import delete_task
+    from utils.jobs import finish_job
     
     deleted_count = 0
     for task_id in task_ids:
-        if delete_task(task_id):
+        if await delete_task(task_id):
             deleted_count += 1
             if task_id in active_translations:
                 del active_translations[task_id]
+            get_scheduler().cancel(task_id)
+            finish_job(task_id)
     
     if deleted_count == 0:
         raise HTTPException(status_code=404, detail="没有找到要删除的翻译记录")
@@ -308,6 +572,8 @@ async def delete_multiple_translations(task_ids: List[str]):
 async def cancel_translation(task_id: str):
     """取消正在进行的翻译任务"""
     from utils.history import add_to_history
+    from utils.jobs import finish_job
+    from utils.progress_hub import get_progress_hub
     
     # 检查任务是否存在
     if task_id not in active_translations:
@@ -315,13 +581,13 @@ async def cancel_translation(task_id: str):
     
     task = active_translations[task_id]
     
-    # 检查任务是否正在运行
-    if task["status"] != "running":
+    # 检查任务是否正在运行或排队
+    if task["status"] not in ("running", "queued"):
         raise HTTPException(status_code=400, detail="任务未在运行中")
     
-    # 取消asyncio任务
-    if task_id in active_tasks:
-        active_tasks[task_id].cancel()
+    # 从调度队列移除或取消asyncio任务
+    get_scheduler().cancel(task_id)
+    finish_job(task_id)
     
     # 更新任务状态
     task.update({
@@ -336,14 +602,10 @@ async def cancel_translation(task_id: str):
         del active_translations[task_id]
     
     # 通知WebSocket客户端
-    if task_id in connected_clients:
-        try:
-            await connected_clients[task_id].send_text(json.dumps({
-                "type": "error",
-                "error": "翻译已被取消"
-            }))
-        except:
-            pass
+    get_progress_hub().publish(task_id, {
+        "type": "error",
+        "error": "翻译已被取消"
+    })
     
     return {"message": "翻译任务已取消"}
 
@@ -351,14 +613,15 @@ async def cancel_translation(task_id: str):
 async def mark_translation_failed(task_id: str):
     """手动标记任务为失败（用于处理僵尸任务）"""
     from utils.history import get_task, add_to_history
+    from utils.jobs import finish_job
     
     # 从数据库获取任务
-    task = get_task(task_id, active_translations)
+    task = await get_task(task_id, active_translations)
     if not task:
         raise HTTPException(status_code=404, detail="任务不存在")
     
-    # 只能标记运行中的任务
-    if task["status"] != "running":
+    # 只能标记运行中或排队中的任务
+    if task["status"] not in ("running", "queued"):
         raise HTTPException(status_code=400, detail="只能标记运行中的任务")
     
     # 更新任务状态
@@ -372,8 +635,9 @@ async def mark_translation_failed(task_id: str):
     # 从活动任务中移除
     if task_id in active_translations:
         del active_translations[task_id]
+    get_scheduler().cancel(task_id)
+    finish_job(task_id)
     if task_id in active_tasks:
-        active_tasks[task_id].cancel()
         del active_tasks[task_id]
     
     return {"message": "任务已标记为失败"}
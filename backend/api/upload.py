@@ -1,30 +1,48 @@
-from fastapi import APIRouter, File, UploadFile, HTTPException
-import aiofiles
-import uuid
+from fastapi import APIRouter, File, UploadFile, HTTPException, Header
+import asyncio
 from datetime import datetime
+from typing import Optional
 
 router = APIRouter(prefix="/api", tags=["upload"])
 
 @router.post("/upload")
-async def upload_file(file: UploadFile = File(...)):
-    """上传PDF文件"""
-    from config.settings import UPLOADS_DIR
+async def upload_file(file: UploadFile = File(...), authorization: Optional[str] = Header(None)):
+    """上传PDF文件（流式写入，相同内容只保存一份）"""
+    from config.settings import UPLOADS_DIR, MAX_UPLOAD_SIZE
+    from utils.uploads import receive_upload, store_upload, UploadTooLargeError
+    from utils import quotas
+    from api.auth import get_user_id_from_token
     
     if not file.filename.endswith('.pdf'):
         raise HTTPException(status_code=400, detail="只支持PDF文件")
     
-    file_id = str(uuid.uuid4())
-    file_path = UPLOADS_DIR / f"{file_id}.pdf"
+    try:
+        received = await receive_upload(file, UPLOADS_DIR / "tmp", MAX_UPLOAD_SIZE)
+    except UploadTooLargeError as e:
+        raise HTTPException(status_code=413, detail=str(e))
     
-    async with aiofiles.open(file_path, 'wb') as f:
-        content = await file.read()
-        await f.write(content)
-    
-    file_size = len(content)
+    user_id = get_user_id_from_token(authorization)
+    try:
+        stored = await asyncio.to_thread(store_upload, received, file.filename, user_id)
+    finally:
+        received["path"].unlink(missing_ok=True)
+    quotas.schedule(user_id)
     
     return {
-        "file_id": file_id,
+        "file_id": stored["file_id"],
         "filename": file.filename,
-        "size": file_size,
+        "size": stored["size"],
+        "sha256": stored["sha256"],
+        "deduplicated": stored["deduplicated"],
         "upload_time": datetime.now().isoformat()
     }
+
+@router.delete("/upload/{file_id}")
+async def delete_uploaded_file(file_id: str):
+    """删除上传的文件（其他上传仍引用相同内容时只删除别名）"""
+    from utils.uploads import delete_upload
+    
+    if not await asyncio.to_thread(delete_upload, file_id):
+        raise HTTPException(status_code=404, detail="文件不存在")
+    
+    return {"message": "文件已删除"}
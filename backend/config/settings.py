@@ -3,6 +3,8 @@ import platform
 import sys
 from pathlib import Path
 
+from utils.network import get_env_int
+
 def resolve_backend_root() -> Path:
     """Return the directory containing this backend module."""
     return Path(__file__).resolve().parent.parent
@@ -53,11 +55,125 @@ DATA_DIR = determine_data_dir()
 UPLOADS_DIR = DATA_DIR / "uploads"
 OUTPUTS_DIR = DATA_DIR / "outputs"
 GLOSSARIES_DIR = DATA_DIR / "glossaries"
+RESULT_CACHE_DIR = DATA_DIR / "result_cache"
 HISTORY_FILE = DATA_DIR / "translation_history.json"
 DB_FILE = DATA_DIR / "babeldoc.db"
 
 DATA_DIR.mkdir(parents=True, exist_ok=True)
-for dir_path in [UPLOADS_DIR, OUTPUTS_DIR, GLOSSARIES_DIR]:
+for dir_path in [UPLOADS_DIR, OUTPUTS_DIR, GLOSSARIES_DIR, RESULT_CACHE_DIR]:
     dir_path.mkdir(parents=True, exist_ok=True)
 
 SENSITIVE_CONFIG_KEYS = {"api_key"}
+
+# 数据库连接串：留空使用 DATA_DIR 下的 SQLite 文件；设置为 postgresql://... 时使用 PostgreSQL，
+# 多个 API 节点可共享同一个数据库（需安装 psycopg[binary,pool]）
+DATABASE_URL = os.environ.get("EASY_BABELDOC_DATABASE_URL", "").strip()
+
+# 文件存储：local（默认，直接使用 DATA_DIR）或 s3（S3 兼容对象存储，DATA_DIR 作为本地缓存，需安装 boto3）
+STORAGE_BACKEND = os.environ.get("EASY_BABELDOC_STORAGE_BACKEND", "local").strip().lower()
+S3_BUCKET = os.environ.get("EASY_BABELDOC_S3_BUCKET", "").strip()
+S3_PREFIX = os.environ.get("EASY_BABELDOC_S3_PREFIX", "").strip()
+# MinIO 等非 AWS 服务的地址；凭据使用 AWS_ACCESS_KEY_ID / AWS_SECRET_ACCESS_KEY
+S3_ENDPOINT_URL = os.environ.get("EASY_BABELDOC_S3_ENDPOINT_URL", "").strip()
+S3_REGION = os.environ.get("EASY_BABELDOC_S3_REGION", "").strip()
+# 分段上传的分段大小（MB，S3 要求至少 5MB）
+S3_PART_SIZE = max(get_env_int("EASY_BABELDOC_S3_PART_MB", 8), 5) * 1024 * 1024
+# 下载时返回预签名 URL 重定向（0 表示由服务器转发对象内容）及其有效期（秒）
+S3_PRESIGNED_DOWNLOADS = get_env_int("EASY_BABELDOC_S3_PRESIGNED_DOWNLOADS", 1) > 0
+S3_PRESIGN_SECONDS = max(get_env_int("EASY_BABELDOC_S3_PRESIGN_SECONDS", 300), 1)
+
+# 数据库连接池大小（每个进程）
+DB_POOL_SIZE = max(get_env_int("EASY_BABELDOC_DB_POOL_SIZE", 8), 1)
+
+# 版面分析模型池：进程内常驻的 DocLayoutModel 会话数量
+LAYOUT_MODEL_POOL_SIZE = max(get_env_int("EASY_BABELDOC_LAYOUT_POOL_SIZE", 1), 1)
+# 启动时是否预热模型池（0 表示首次使用时再加载）
+LAYOUT_MODEL_POOL_PREWARM = get_env_int("EASY_BABELDOC_LAYOUT_POOL_PREWARM", 1) != 0
+
+# 翻译任务调度：全局并发、单用户并发与等待队列上限
+MAX_CONCURRENT_TRANSLATIONS = max(get_env_int("EASY_BABELDOC_MAX_CONCURRENT_JOBS", 2), 1)
+MAX_TRANSLATIONS_PER_USER = max(get_env_int("EASY_BABELDOC_MAX_JOBS_PER_USER", 1), 1)
+MAX_QUEUED_TRANSLATIONS = max(get_env_int("EASY_BABELDOC_MAX_QUEUED_JOBS", 100), 0)
+# 访客任务的调度优先级（-10 ~ 10，注册用户为 0），设为负数时注册用户的任务先执行；优先级只由服务端决定
+GUEST_JOB_PRIORITY = min(max(get_env_int("EASY_BABELDOC_GUEST_JOB_PRIORITY", 0), -10), 10)
+
+# 翻译执行方式："process" 在独立工作进程中运行，"inline" 在API进程内运行
+TRANSLATION_EXECUTION_MODE = os.environ.get("EASY_BABELDOC_EXECUTION_MODE", "process").strip().lower()
+if TRANSLATION_EXECUTION_MODE not in ("process", "inline"):
+    TRANSLATION_EXECUTION_MODE = "process"
+TRANSLATION_WORKER_PROCESSES = max(get_env_int("EASY_BABELDOC_WORKER_PROCESSES", MAX_CONCURRENT_TRANSLATIONS), 1)
+# 单个工作进程运行多少个任务后回收重建（0 表示不回收），用于释放长期运行积累的内存
+TRANSLATION_WORKER_MAX_JOBS = max(get_env_int("EASY_BABELDOC_WORKER_MAX_JOBS", 20), 0)
+
+# 分片翻译：每个分片的页数，以及单个任务同时运行的分片数（默认等于工作进程数）
+SHARD_PAGES = max(get_env_int("EASY_BABELDOC_SHARD_PAGES", 50), 1)
+SHARD_MAX_PARALLEL = max(get_env_int("EASY_BABELDOC_SHARD_PARALLEL", TRANSLATION_WORKER_PROCESSES), 1)
+
+# 服务重启后同一任务最多自动恢复的次数，超过后标记为失败
+JOB_MAX_RESUME_ATTEMPTS = max(get_env_int("EASY_BABELDOC_JOB_MAX_RESUMES", 3), 0)
+
+# 进度写入合并：同一任务至少间隔多少毫秒、或进度变化多少百分比才写一次数据库
+PROGRESS_FLUSH_INTERVAL_MS = max(get_env_int("EASY_BABELDOC_PROGRESS_FLUSH_MS", 2000), 0)
+PROGRESS_FLUSH_DELTA = max(get_env_int("EASY_BABELDOC_PROGRESS_FLUSH_DELTA", 5), 0)
+
+# 每个WebSocket订阅者最多缓存的待发送帧数，超出时丢弃中间进度帧
+WS_MAX_PENDING_FRAMES = max(get_env_int("EASY_BABELDOC_WS_MAX_PENDING_FRAMES", 16), 2)
+
+# 翻译结果缓存：相同文件 + 相同参数 + 相同术语表直接复用已有输出
+RESULT_CACHE_ENABLED = get_env_int("EASY_BABELDOC_RESULT_CACHE", 1) != 0
+RESULT_CACHE_MAX_BYTES = max(get_env_int("EASY_BABELDOC_RESULT_CACHE_MAX_MB", 2048), 0) * 1024 * 1024
+RESULT_CACHE_MAX_AGE_DAYS = max(get_env_int("EASY_BABELDOC_RESULT_CACHE_MAX_AGE_DAYS", 30), 0)
+
+# 段落翻译记忆：所有用户共享，按总大小做LRU淘汰
+TRANSLATION_MEMORY_ENABLED = get_env_int("EASY_BABELDOC_TRANSLATION_MEMORY", 1) != 0
+TRANSLATION_MEMORY_MAX_BYTES = max(get_env_int("EASY_BABELDOC_TRANSLATION_MEMORY_MAX_MB", 256), 0) * 1024 * 1024
+
+# 上传大小上限（0 表示不限制）与流式写入的块大小
+MAX_UPLOAD_SIZE = max(get_env_int("EASY_BABELDOC_MAX_UPLOAD_MB", 200), 0) * 1024 * 1024
+MAX_GLOSSARY_SIZE = max(get_env_int("EASY_BABELDOC_MAX_GLOSSARY_MB", 10), 0) * 1024 * 1024
+UPLOAD_CHUNK_SIZE = max(get_env_int("EASY_BABELDOC_UPLOAD_CHUNK_KB", 1024), 64) * 1024
+
+# 输出文件登记：后台核对文件是否仍存在的间隔（秒，0 表示不核对）与每批核对条数
+ARTIFACT_RECONCILE_INTERVAL = max(get_env_int("EASY_BABELDOC_ARTIFACT_RECONCILE_SECONDS", 600), 0)
+ARTIFACT_RECONCILE_BATCH = max(get_env_int("EASY_BABELDOC_ARTIFACT_RECONCILE_BATCH", 500), 1)
+
+# 下载：解析后的输出文件元数据缓存条数（0 表示不缓存）与分块发送大小
+DOWNLOAD_CACHE_SIZE = max(get_env_int("EASY_BABELDOC_DOWNLOAD_CACHE_SIZE", 4096), 0)
+DOWNLOAD_CHUNK_SIZE = max(get_env_int("EASY_BABELDOC_DOWNLOAD_CHUNK_KB", 256), 16) * 1024
+# 部署在 nginx 之后时可设置为 internal location 前缀（如 /protected），由 nginx 直接发送文件
+DOWNLOAD_ACCEL_REDIRECT = os.environ.get("EASY_BABELDOC_DOWNLOAD_ACCEL_REDIRECT", "").strip()
+# 一次打包下载的最多任务数
+BUNDLE_MAX_TASKS = max(get_env_int("EASY_BABELDOC_BUNDLE_MAX_TASKS", 200), 1)
+
+# 孤儿文件后台扫描：间隔（小时，0 表示不定期扫描，只能通过 tools/orphans.py 手动扫描）、每批处理的顶层目录数与批间暂停（毫秒）
+ORPHAN_SCAN_INTERVAL_HOURS = max(get_env_int("EASY_BABELDOC_ORPHAN_SCAN_INTERVAL_HOURS", 24), 0)
+ORPHAN_SCAN_BATCH = max(get_env_int("EASY_BABELDOC_ORPHAN_SCAN_BATCH", 200), 1)
+ORPHAN_SCAN_PAUSE_MS = max(get_env_int("EASY_BABELDOC_ORPHAN_SCAN_PAUSE_MS", 50), 0)
+# 修改时间在此时长（小时）以内的未登记文件不视为孤儿
+ORPHAN_MIN_AGE_HOURS = max(get_env_int("EASY_BABELDOC_ORPHAN_MIN_AGE_HOURS", 24), 0)
+# 命令行工具一次列出的孤儿文件数与一次删除的最多文件数
+ORPHAN_LIST_LIMIT = max(get_env_int("EASY_BABELDOC_ORPHAN_LIST_LIMIT", 1000), 1)
+ORPHAN_DELETE_LIMIT = max(get_env_int("EASY_BABELDOC_ORPHAN_DELETE_LIMIT", 1000), 1)
+# 每轮扫描结束后由后台任务删除发现的孤儿文件（默认关闭，只记录）
+ORPHAN_AUTO_DELETE = get_env_int("EASY_BABELDOC_ORPHAN_AUTO_DELETE", 0) > 0
+
+# 存储配额（0 表示不限，默认均不限）：普通用户与访客各自的配额（MB）、整个节点的配额（GB），
+# 超出后按最近使用时间淘汰到配额的 STORAGE_EVICT_TARGET_PERCENT
+STORAGE_QUOTA = max(get_env_int("EASY_BABELDOC_STORAGE_QUOTA_MB", 0), 0) * 1024 * 1024
+GUEST_STORAGE_QUOTA = max(get_env_int("EASY_BABELDOC_GUEST_STORAGE_QUOTA_MB", 0), 0) * 1024 * 1024
+NODE_STORAGE_QUOTA = max(get_env_int("EASY_BABELDOC_NODE_STORAGE_QUOTA_GB", 0), 0) * 1024 * 1024 * 1024
+STORAGE_EVICT_TARGET_PERCENT = min(max(get_env_int("EASY_BABELDOC_STORAGE_EVICT_TARGET_PERCENT", 90), 0), 100)
+
+# 令牌→用户解析缓存：有效期（秒，0 表示不缓存）与最多缓存的用户数
+USER_CACHE_TTL = max(get_env_int("EASY_BABELDOC_USER_CACHE_TTL", 60), 0)
+USER_CACHE_SIZE = max(get_env_int("EASY_BABELDOC_USER_CACHE_SIZE", 1024), 0)
+
+# 历史记录保留策略：已结束任务超过保留天数、或超出每用户保留条数时移入归档表
+# 默认两项均为 0，即不归档，需要时显式开启
+HISTORY_RETENTION_DAYS = max(get_env_int("EASY_BABELDOC_HISTORY_RETENTION_DAYS", 0), 0)
+HISTORY_MAX_PER_USER = max(get_env_int("EASY_BABELDOC_HISTORY_MAX_PER_USER", 0), 0)
+# 归档记录保留天数（0 表示永久保留）
+HISTORY_ARCHIVE_RETENTION_DAYS = max(get_env_int("EASY_BABELDOC_HISTORY_ARCHIVE_DAYS", 0), 0)
+# 后台执行保留策略与增量 VACUUM 的间隔（小时，0 表示只能手动执行）及每次最多回收的页数（0 表示全部）
+RETENTION_INTERVAL_HOURS = max(get_env_int("EASY_BABELDOC_RETENTION_INTERVAL_HOURS", 24), 0)
+VACUUM_MAX_PAGES = max(get_env_int("EASY_BABELDOC_VACUUM_MAX_PAGES", 20000), 0)
@@ -1,5 +1,13 @@
 """数据库模块"""
+from .async_database import AsyncDatabase
 from .database import Database
-from .models import TranslationHistory, User
+from .postgres import PostgresDatabase
+from .models import (
+    MaintenanceState, OrphanFile, ResultCache, TaskArtifact, TranslationHistory,
+    TranslationJob, TranslationMemory, UploadStore, User,
+)
 
-__all__ = ['Database', 'TranslationHistory', 'User']
+__all__ = [
+    'AsyncDatabase', 'Database', 'MaintenanceState', 'OrphanFile', 'PostgresDatabase', 'ResultCache',
+    'TaskArtifact', 'TranslationHistory', 'TranslationJob', 'TranslationMemory', 'UploadStore', 'User',
+]
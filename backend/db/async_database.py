@@ -0,0 +1,104 @@
+"""Database 的异步外观
+
+路由处理函数都是 async def，直接调用 sqlite3 会阻塞事件循环。AsyncDatabase 把数据库操作放到
+线程中执行：
+
+- submit() 从同步代码提交写入而不等待，所有 submit() 的写入在同一个写线程中按提交顺序执行，
+  不会出现进度写入覆盖最终状态之类的乱序问题
+- run() 等协程接口在一个小线程池中并发执行，慢查询（统计、核对、列表）不会挡住认证、状态
+  和下载查询；执行前先等待此前 submit() 的写入完成，因此一定能读到这些写入
+"""
+import asyncio
+import functools
+import logging
+import threading
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Any, Callable, Optional
+
+from .database import Database
+
+logger = logging.getLogger("easy_babeldoc.db")
+
+
+class AsyncDatabase:
+    """在线程池中执行数据库操作的异步外观"""
+
+    def __init__(self, db: Database, workers: int = 4):
+        """初始化
+
+        Args:
+            db: 同步数据库实例（连接池）
+            workers: 并发执行 run() 的线程数，不应超过连接池大小
+        """
+        self.db = db
+        self._executor = ThreadPoolExecutor(max_workers=max(workers, 1), thread_name_prefix="easy-babeldoc-db")
+        self._writer = ThreadPoolExecutor(max_workers=1, thread_name_prefix="easy-babeldoc-db-write")
+        self._write_lock = threading.Lock()
+        self._last_write: Optional[Future] = None
+        self._submitted = 0
+        self._failed = 0
+
+    async def run(self, func: Callable[..., Any], *args, **kwargs) -> Any:
+        """在线程池中执行任意同步函数（例如模型方法）并等待结果"""
+        await self._wait_for_writes()
+        loop = asyncio.get_running_loop()
+        self._submitted += 1
+        return await loop.run_in_executor(self._executor, functools.partial(func, *args, **kwargs))
+
+    def submit(self, func: Callable[..., Any], *args, **kwargs) -> Future:
+        """从同步代码提交写入，不等待结果；按提交顺序执行，异常只记录日志"""
+        with self._write_lock:
+            self._submitted += 1
+            future = self._writer.submit(func, *args, **kwargs)
+            self._last_write = future
+        future.add_done_callback(self._log_failure)
+        return future
+
+    async def execute(self, query: str, params: tuple = ()):
+        return await self.run(self.db.execute, query, params)
+
+    async def insert(self, query: str, params: tuple = ()) -> int:
+        return await self.run(self.db.insert, query, params)
+
+    async def fetchone(self, query: str, params: tuple = ()):
+        return await self.run(self.db.fetchone, query, params)
+
+    async def fetchall(self, query: str, params: tuple = ()):
+        return await self.run(self.db.fetchall, query, params)
+
+    def close(self):
+        """等待已提交的操作执行完毕后停止数据库线程"""
+        self._writer.shutdown(wait=True)
+        self._executor.shutdown(wait=True)
+
+    def stats(self):
+        return {
+            "submitted": self._submitted,
+            "failed": self._failed,
+            "workers": self._executor._max_workers,
+            "pending": self._executor._work_queue.qsize(),
+            "pending_writes": self._writer._work_queue.qsize(),
+        }
+
+    async def _wait_for_writes(self):
+        """等待此前 submit() 的写入完成（写线程按顺序执行，只需等待最后一个）
+
+        不直接 await 写入的 Future：请求被取消时不能连带取消排队中的写入。
+        """
+        pending = self._last_write
+        if pending is None or pending.done():
+            return
+        loop = asyncio.get_running_loop()
+        done = loop.create_future()
+
+        def wake(_):
+            loop.call_soon_threadsafe(lambda: done.done() or done.set_result(None))
+
+        pending.add_done_callback(wake)
+        await done
+
+    def _log_failure(self, future: Future):
+        error = future.exception()
+        if error is not None:
+            self._failed += 1
+            logger.error("数据库后台操作失败: %s", error)
@@ -1,30 +1,151 @@
 """SQLite 数据库管理"""
+import queue
 import sqlite3
+import threading
 from pathlib import Path
-from typing import Optional
+from typing import Any, Dict, List, Optional
 from contextlib import contextmanager
 import logging
 
 logger = logging.getLogger("easy_babeldoc.db")
 
+# 每个连接打开时执行的设置：WAL 让读写互不阻塞，NORMAL 在 WAL 下仍能保证一致性
+# auto_vacuum 必须在 journal_mode 之前设置才能作用于新建的数据库；
+# 已有数据库需执行一次 VACUUM 才会切换（见 tools/retention.py --convert-vacuum）
+CONNECTION_PRAGMAS = (
+    "PRAGMA auto_vacuum = INCREMENTAL",
+    "PRAGMA journal_mode = WAL",
+    "PRAGMA synchronous = NORMAL",
+    "PRAGMA cache_size = -16000",
+    "PRAGMA mmap_size = 268435456",
+    "PRAGMA temp_store = MEMORY",
+)
+BUSY_TIMEOUT_SECONDS = 5.0
+STATEMENT_CACHE_SIZE = 256
+
+
+class ConnectionPool:
+    """有界的SQLite连接池
+    
+    连接在不同线程间复用（事件循环线程、to_thread 线程、翻译线程），
+    同一时刻一个连接只被一个调用方持有。
+    """
+    
+    def __init__(self, db_path: Path, size: int):
+        self.db_path = db_path
+        self.size = max(size, 1)
+        self._idle: "queue.LifoQueue[sqlite3.Connection]" = queue.LifoQueue()
+        self._lock = threading.Lock()
+        self._created = 0
+        self._acquired = 0
+        self._waits = 0
+        self._closed = False
+    
+    def _connect(self) -> sqlite3.Connection:
+        conn = sqlite3.connect(
+            str(self.db_path),
+            timeout=BUSY_TIMEOUT_SECONDS,
+            check_same_thread=False,
+            cached_statements=STATEMENT_CACHE_SIZE,
+        )
+        conn.row_factory = sqlite3.Row
+        for pragma in CONNECTION_PRAGMAS:
+            conn.execute(pragma)
+        return conn
+    
+    def acquire(self) -> sqlite3.Connection:
+        """取出一个连接；池中没有空闲连接且已达上限时等待"""
+        try:
+            conn = self._idle.get_nowait()
+        except queue.Empty:
+            with self._lock:
+                create = self._created < self.size
+                if create:
+                    self._created += 1
+            if create:
+                try:
+                    conn = self._connect()
+                except Exception:
+                    with self._lock:
+                        self._created -= 1
+                    raise
+            else:
+                with self._lock:
+                    self._waits += 1
+                conn = self._idle.get()
+        with self._lock:
+            self._acquired += 1
+        return conn
+    
+    def release(self, conn: sqlite3.Connection):
+        """归还连接，未提交的事务会被回滚（与关闭连接的行为一致）"""
+        try:
+            if conn.in_transaction:
+                conn.rollback()
+        except sqlite3.Error:
+            self._discard(conn)
+            return
+        if self._closed:
+            self._discard(conn)
+            return
+        self._idle.put(conn)
+    
+    def _discard(self, conn: sqlite3.Connection):
+        try:
+            conn.close()
+        finally:
+            with self._lock:
+                self._created -= 1
+    
+    def close(self):
+        """关闭所有空闲连接；使用中的连接在归还时关闭"""
+        self._closed = True
+        while True:
+            try:
+                conn = self._idle.get_nowait()
+            except queue.Empty:
+                break
+            self._discard(conn)
+    
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                "size": self.size,
+                "open": self._created,
+                "idle": self._idle.qsize(),
+                "acquired": self._acquired,
+                "waits": self._waits,
+            }
+
 
 class Database:
-    """SQLite 数据库管理类"""
+    """SQLite 数据库管理类
     
-    def __init__(self, db_path: Path):
+    模型类只通过 get_connection / execute / fetchone / fetchall / insert 访问数据库，
+    PostgreSQL 后端（见 postgres.py）实现同样的接口。SQL 使用 ? 占位符和两种数据库
+    都支持的语法（INSERT ... ON CONFLICT、窗口函数等）。
+    """
+    
+    dialect = "sqlite"
+    Error = sqlite3.Error
+    
+    def __init__(self, db_path: Path, pool_size: int = 8, migrate: bool = True):
         """初始化数据库连接
         
         Args:
             db_path: 数据库文件路径
+            pool_size: 连接池大小
+            migrate: 是否建表并执行迁移（已由其他进程完成时可跳过）
         """
         self.db_path = db_path
-        self._ensure_db_exists()
-        self._run_migrations()
+        self.db_path.parent.mkdir(parents=True, exist_ok=True)
+        self.pool = ConnectionPool(db_path, pool_size)
+        if migrate:
+            self._ensure_db_exists()
+            self._run_migrations()
     
     def _ensure_db_exists(self):
         """确保数据库文件和基础表结构存在"""
-        self.db_path.parent.mkdir(parents=True, exist_ok=True)
-        
         with self.get_connection() as conn:
             cursor = conn.cursor()
             cursor.execute("""
@@ -74,13 +195,16 @@ class Database:
     
     @contextmanager
     def get_connection(self):
-        """获取数据库连接的上下文管理器"""
-        conn = sqlite3.connect(str(self.db_path))
-        conn.row_factory = sqlite3.Row
+        """从连接池借用连接的上下文管理器（需要自行 commit）"""
+        conn = self.pool.acquire()
         try:
             yield conn
         finally:
-            conn.close()
+            self.pool.release(conn)
+    
+    def close(self):
+        """关闭连接池"""
+        self.pool.close()
     
     def execute(self, query: str, params: tuple = ()):
         """执行SQL语句
@@ -98,6 +222,19 @@ class Database:
             conn.commit()
             return cursor
     
+    def insert(self, query: str, params: tuple = ()) -> int:
+        """执行 INSERT 并返回自增主键 id
+        
+        Args:
+            query: INSERT 语句（不含 RETURNING）
+            params: 查询参数
+        """
+        with self.get_connection() as conn:
+            cursor = conn.cursor()
+            cursor.execute(query, params)
+            conn.commit()
+            return cursor.lastrowid
+    
     def fetchall(self, query: str, params: tuple = ()):
         """查询所有结果
         
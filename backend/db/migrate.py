@@ -95,9 +95,331 @@ def migration_v2_add_models_table(cursor: sqlite3.Cursor):
         """)
         logger.info("✓ models表创建完成")
 
+def migration_v3_add_translation_jobs_table(cursor: sqlite3.Cursor):
+    """版本3: 添加持久化任务队列表"""
+    logger.info("执行迁移 v3: 添加持久化任务队列表")
+    
+    cursor.execute("""
+        SELECT name FROM sqlite_master 
+        WHERE type='table' AND name='translation_jobs'
+    """)
+    
+    if not cursor.fetchone():
+        logger.info("创建translation_jobs表...")
+        cursor.execute("""
+            CREATE TABLE translation_jobs (
+                task_id TEXT PRIMARY KEY,
+                user_id TEXT NOT NULL,
+                status TEXT NOT NULL,
+                priority INTEGER DEFAULT 0,
+                request TEXT NOT NULL,
+                credential_ref TEXT,
+                attempts INTEGER DEFAULT 0,
+                created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+                updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+            )
+        """)
+        
+        cursor.execute("""
+            CREATE INDEX IF NOT EXISTS idx_jobs_status 
+            ON translation_jobs(status, created_at)
+        """)
+        logger.info("✓ translation_jobs表创建完成")
+
+def migration_v4_add_upload_blobs(cursor: sqlite3.Cursor):
+    """版本4: 上传文件按内容哈希去重"""
+    logger.info("执行迁移 v4: 上传文件按内容哈希去重")
+    
+    cursor.execute("""
+        SELECT name FROM sqlite_master 
+        WHERE type='table' AND name='upload_blobs'
+    """)
+    
+    if not cursor.fetchone():
+        logger.info("创建upload_blobs表...")
+        cursor.execute("""
+            CREATE TABLE upload_blobs (
+                sha256 TEXT PRIMARY KEY,
+                size INTEGER NOT NULL,
+                path TEXT NOT NULL,
+                ref_count INTEGER DEFAULT 0,
+                created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+            )
+        """)
+        logger.info("✓ upload_blobs表创建完成")
+    
+    cursor.execute("""
+        SELECT name FROM sqlite_master 
+        WHERE type='table' AND name='uploads'
+    """)
+    
+    if not cursor.fetchone():
+        logger.info("创建uploads表...")
+        cursor.execute("""
+            CREATE TABLE uploads (
+                file_id TEXT PRIMARY KEY,
+                sha256 TEXT NOT NULL,
+                filename TEXT,
+                size INTEGER NOT NULL,
+                user_id TEXT,
+                created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+                FOREIGN KEY (sha256) REFERENCES upload_blobs(sha256)
+            )
+        """)
+        
+        cursor.execute("""
+            CREATE INDEX IF NOT EXISTS idx_uploads_sha256 
+            ON uploads(sha256)
+        """)
+        
+        cursor.execute("""
+            CREATE INDEX IF NOT EXISTS idx_uploads_user_id 
+            ON uploads(user_id)
+        """)
+        logger.info("✓ uploads表创建完成")
+
+def migration_v5_add_result_cache(cursor: sqlite3.Cursor):
+    """版本5: 添加翻译结果缓存表"""
+    logger.info("执行迁移 v5: 添加翻译结果缓存表")
+    
+    cursor.execute("""
+        SELECT name FROM sqlite_master 
+        WHERE type='table' AND name='result_cache'
+    """)
+    
+    if not cursor.fetchone():
+        logger.info("创建result_cache表...")
+        cursor.execute("""
+            CREATE TABLE result_cache (
+                cache_key TEXT PRIMARY KEY,
+                input_sha256 TEXT NOT NULL,
+                config_hash TEXT NOT NULL,
+                glossary_hash TEXT NOT NULL,
+                mono_path TEXT,
+                dual_path TEXT,
+                size INTEGER DEFAULT 0,
+                source_task_id TEXT,
+                hits INTEGER DEFAULT 0,
+                created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+                last_used_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+            )
+        """)
+        
+        cursor.execute("""
+            CREATE INDEX IF NOT EXISTS idx_result_cache_last_used 
+            ON result_cache(last_used_at)
+        """)
+        logger.info("✓ result_cache表创建完成")
+
+def migration_v6_add_translation_memory(cursor: sqlite3.Cursor):
+    """版本6: 添加跨用户共享的段落翻译记忆表"""
+    logger.info("执行迁移 v6: 添加翻译记忆表")
+    
+    cursor.execute("""
+        SELECT name FROM sqlite_master 
+        WHERE type='table' AND name='translation_memory'
+    """)
+    
+    if not cursor.fetchone():
+        logger.info("创建translation_memory表...")
+        cursor.execute("""
+            CREATE TABLE translation_memory (
+                memory_key TEXT PRIMARY KEY,
+                lang_in TEXT NOT NULL,
+                lang_out TEXT NOT NULL,
+                model TEXT NOT NULL,
+                glossary_hash TEXT NOT NULL,
+                source_text TEXT NOT NULL,
+                translation TEXT NOT NULL,
+                size INTEGER DEFAULT 0,
+                hits INTEGER DEFAULT 0,
+                created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+                last_used_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+            )
+        """)
+        
+        cursor.execute("""
+            CREATE INDEX IF NOT EXISTS idx_translation_memory_last_used 
+            ON translation_memory(last_used_at)
+        """)
+        logger.info("✓ translation_memory表创建完成")
+
+def migration_v7_add_history_list_indexes(cursor: sqlite3.Cursor):
+    """版本7: 为历史记录分页与筛选添加复合索引"""
+    logger.info("执行迁移 v7: 添加历史记录复合索引")
+    
+    # 按用户 + 开始时间倒序分页（task_id 作为同一时间的排序依据）
+    cursor.execute("""
+        CREATE INDEX IF NOT EXISTS idx_history_user_start 
+        ON translation_history(user_id, start_time DESC, task_id DESC)
+    """)
+    
+    # 按状态筛选的分页
+    cursor.execute("""
+        CREATE INDEX IF NOT EXISTS idx_history_user_status_start 
+        ON translation_history(user_id, status, start_time DESC, task_id DESC)
+    """)
+    
+    # 复合索引已覆盖按 user_id 的查询
+    cursor.execute("DROP INDEX IF EXISTS idx_user_id")
+    logger.info("✓ 历史记录复合索引创建完成")
+
+def migration_v8_add_task_artifacts(cursor: sqlite3.Cursor):
+    """版本8: 添加任务输出文件登记表"""
+    logger.info("执行迁移 v8: 添加任务输出文件表")
+    
+    cursor.execute("""
+        SELECT name FROM sqlite_master 
+        WHERE type='table' AND name='task_artifacts'
+    """)
+    
+    if not cursor.fetchone():
+        logger.info("创建task_artifacts表...")
+        cursor.execute("""
+            CREATE TABLE task_artifacts (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                task_id TEXT NOT NULL,
+                user_id TEXT,
+                kind TEXT NOT NULL,
+                path TEXT NOT NULL,
+                size INTEGER DEFAULT 0,
+                checksum TEXT,
+                missing INTEGER DEFAULT 0,
+                created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+                checked_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+                UNIQUE(task_id, kind)
+            )
+        """)
+        logger.info("✓ task_artifacts表创建完成")
+    # 已有的完成任务由后台核对任务补登记
+
+def migration_v9_add_history_archive(cursor: sqlite3.Cursor):
+    """版本9: 添加历史记录归档表"""
+    logger.info("执行迁移 v9: 添加历史记录归档表")
+    
+    cursor.execute("""
+        SELECT name FROM sqlite_master 
+        WHERE type='table' AND name='translation_history_archive'
+    """)
+    
+    if not cursor.fetchone():
+        logger.info("创建translation_history_archive表...")
+        cursor.execute("""
+            CREATE TABLE translation_history_archive (
+                task_id TEXT PRIMARY KEY,
+                user_id TEXT,
+                status TEXT NOT NULL,
+                filename TEXT NOT NULL,
+                source_lang TEXT NOT NULL,
+                target_lang TEXT NOT NULL,
+                model TEXT NOT NULL,
+                start_time TEXT NOT NULL,
+                end_time TEXT,
+                progress INTEGER DEFAULT 0,
+                stage TEXT,
+                message TEXT,
+                error TEXT,
+                config TEXT,
+                result TEXT,
+                created_at TIMESTAMP,
+                updated_at TIMESTAMP,
+                archived_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+            )
+        """)
+        
+        cursor.execute("""
+            CREATE INDEX IF NOT EXISTS idx_history_archive_user 
+            ON translation_history_archive(user_id, start_time DESC)
+        """)
+        
+        cursor.execute("""
+            CREATE INDEX IF NOT EXISTS idx_history_archive_archived_at 
+            ON translation_history_archive(archived_at)
+        """)
+        logger.info("✓ translation_history_archive表创建完成")
+
+def migration_v10_add_orphan_scan(cursor: sqlite3.Cursor):
+    """版本10: 孤儿文件后台扫描的结果表与检查点表"""
+    logger.info("执行迁移 v10: 添加孤儿文件扫描表")
+    
+    # 扫描时按路径判断文件是否已登记
+    cursor.execute("""
+        CREATE INDEX IF NOT EXISTS idx_task_artifacts_path 
+        ON task_artifacts(path)
+    """)
+    
+    cursor.execute("""
+        SELECT name FROM sqlite_master 
+        WHERE type='table' AND name='orphan_files'
+    """)
+    
+    if not cursor.fetchone():
+        logger.info("创建orphan_files表...")
+        cursor.execute("""
+            CREATE TABLE orphan_files (
+                node TEXT NOT NULL,
+                path TEXT NOT NULL,
+                size INTEGER DEFAULT 0,
+                mtime REAL,
+                pass_no INTEGER NOT NULL,
+                found_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+                PRIMARY KEY (node, path)
+            )
+        """)
+        logger.info("✓ orphan_files表创建完成")
+    
+    cursor.execute("""
+        SELECT name FROM sqlite_master 
+        WHERE type='table' AND name='maintenance_state'
+    """)
+    
+    if not cursor.fetchone():
+        logger.info("创建maintenance_state表...")
+        cursor.execute("""
+            CREATE TABLE maintenance_state (
+                name TEXT PRIMARY KEY,
+                state TEXT NOT NULL,
+                updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+            )
+        """)
+        logger.info("✓ maintenance_state表创建完成")
+
+
+def migration_v11_add_storage_quota(cursor: sqlite3.Cursor):
+    """版本11: 记录输出文件与上传文件的最近使用时间，以及按配额清理的时间"""
+    logger.info("执行迁移 v11: 添加存储配额相关列")
+    
+    cursor.execute("PRAGMA table_info(task_artifacts)")
+    columns = [row[1] for row in cursor.fetchall()]
+    if 'last_used_at' not in columns:
+        cursor.execute("ALTER TABLE task_artifacts ADD COLUMN last_used_at TIMESTAMP")
+    if 'evicted_at' not in columns:
+        cursor.execute("ALTER TABLE task_artifacts ADD COLUMN evicted_at TIMESTAMP")
+    
+    cursor.execute("PRAGMA table_info(uploads)")
+    columns = [row[1] for row in cursor.fetchall()]
+    if 'last_used_at' not in columns:
+        cursor.execute("ALTER TABLE uploads ADD COLUMN last_used_at TIMESTAMP")
+    
+    # 按用户统计用量与挑选淘汰对象
+    cursor.execute("""
+        CREATE INDEX IF NOT EXISTS idx_task_artifacts_user 
+        ON task_artifacts(user_id, missing)
+    """)
+    logger.info("✓ 存储配额相关列添加完成")
+
 MIGRATIONS: List[Migration] = [
     Migration(1, "添加用户支持", migration_v1_add_user_support),
     Migration(2, "添加模型配置表", migration_v2_add_models_table),
+    Migration(3, "添加持久化任务队列表", migration_v3_add_translation_jobs_table),
+    Migration(4, "上传文件按内容哈希去重", migration_v4_add_upload_blobs),
+    Migration(5, "添加翻译结果缓存表", migration_v5_add_result_cache),
+    Migration(6, "添加翻译记忆表", migration_v6_add_translation_memory),
+    Migration(7, "历史记录分页复合索引", migration_v7_add_history_list_indexes),
+    Migration(8, "添加任务输出文件表", migration_v8_add_task_artifacts),
+    Migration(9, "添加历史记录归档表", migration_v9_add_history_archive),
+    Migration(10, "添加孤儿文件扫描表", migration_v10_add_orphan_scan),
+    Migration(11, "添加存储配额相关列", migration_v11_add_storage_quota),
 ]
 
 def get_current_version(cursor: sqlite3.Cursor) -> int:
@@ -0,0 +1,306 @@
+"""PostgreSQL 数据库迁移 - 与 migrate.py 的版本号一一对应
+
+每个版本建出的表结构与 SQLite 后端在同一版本时相同（自增主键使用 BIGSERIAL，
+文件大小使用 BIGINT）。基础表 translation_history 在 SQLite 中由 Database 直接创建，
+这里并入 v1。多个节点同时启动时通过 advisory lock 保证迁移只执行一次。
+"""
+import logging
+from typing import List
+
+from .migrate import Migration
+
+logger = logging.getLogger("easy_babeldoc.migrate")
+
+# pg_advisory_xact_lock 的键，任意固定值
+MIGRATION_LOCK_KEY = 0x45424442
+
+
+def migration_v1_add_user_support(cursor):
+    """版本1: 基础历史表与用户表"""
+    cursor.execute("""
+        CREATE TABLE IF NOT EXISTS translation_history (
+            task_id TEXT PRIMARY KEY,
+            status TEXT NOT NULL,
+            filename TEXT NOT NULL,
+            source_lang TEXT NOT NULL,
+            target_lang TEXT NOT NULL,
+            model TEXT NOT NULL,
+            start_time TEXT NOT NULL,
+            end_time TEXT,
+            progress INTEGER DEFAULT 0,
+            stage TEXT,
+            message TEXT,
+            error TEXT,
+            config TEXT,
+            result TEXT,
+            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+            updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+            user_id TEXT
+        )
+    """)
+    cursor.execute("CREATE INDEX IF NOT EXISTS idx_status ON translation_history(status)")
+    cursor.execute("CREATE INDEX IF NOT EXISTS idx_created_at ON translation_history(created_at DESC)")
+    cursor.execute("CREATE INDEX IF NOT EXISTS idx_user_id ON translation_history(user_id)")
+    cursor.execute("""
+        CREATE TABLE IF NOT EXISTS users (
+            user_id TEXT PRIMARY KEY,
+            username TEXT UNIQUE NOT NULL,
+            password_hash TEXT NOT NULL,
+            email TEXT,
+            is_guest INTEGER DEFAULT 0,
+            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+            last_login TIMESTAMP
+        )
+    """)
+    cursor.execute("CREATE INDEX IF NOT EXISTS idx_username ON users(username)")
+
+
+def migration_v2_add_models_table(cursor):
+    """版本2: 添加模型配置表"""
+    cursor.execute("""
+        CREATE TABLE IF NOT EXISTS models (
+            id BIGSERIAL PRIMARY KEY,
+            user_id TEXT NOT NULL REFERENCES users(user_id),
+            base_url TEXT NOT NULL,
+            api_key TEXT NOT NULL,
+            model TEXT NOT NULL,
+            is_default INTEGER DEFAULT 0,
+            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+        )
+    """)
+    cursor.execute("CREATE INDEX IF NOT EXISTS idx_models_user_id ON models(user_id)")
+    cursor.execute("CREATE INDEX IF NOT EXISTS idx_models_is_default ON models(user_id, is_default)")
+
+
+def migration_v3_add_translation_jobs_table(cursor):
+    """版本3: 添加持久化任务队列表"""
+    cursor.execute("""
+        CREATE TABLE IF NOT EXISTS translation_jobs (
+            task_id TEXT PRIMARY KEY,
+            user_id TEXT NOT NULL,
+            status TEXT NOT NULL,
+            priority INTEGER DEFAULT 0,
+            request TEXT NOT NULL,
+            credential_ref TEXT,
+            attempts INTEGER DEFAULT 0,
+            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+            updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+        )
+    """)
+    cursor.execute("CREATE INDEX IF NOT EXISTS idx_jobs_status ON translation_jobs(status, created_at)")
+
+
+def migration_v4_add_upload_blobs(cursor):
+    """版本4: 上传文件按内容哈希去重"""
+    cursor.execute("""
+        CREATE TABLE IF NOT EXISTS upload_blobs (
+            sha256 TEXT PRIMARY KEY,
+            size BIGINT NOT NULL,
+            path TEXT NOT NULL,
+            ref_count INTEGER DEFAULT 0,
+            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+        )
+    """)
+    cursor.execute("""
+        CREATE TABLE IF NOT EXISTS uploads (
+            file_id TEXT PRIMARY KEY,
+            sha256 TEXT NOT NULL REFERENCES upload_blobs(sha256),
+            filename TEXT,
+            size BIGINT NOT NULL,
+            user_id TEXT,
+            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+        )
+    """)
+    cursor.execute("CREATE INDEX IF NOT EXISTS idx_uploads_sha256 ON uploads(sha256)")
+    cursor.execute("CREATE INDEX IF NOT EXISTS idx_uploads_user_id ON uploads(user_id)")
+
+
+def migration_v5_add_result_cache(cursor):
+    """版本5: 添加翻译结果缓存表"""
+    cursor.execute("""
+        CREATE TABLE IF NOT EXISTS result_cache (
+            cache_key TEXT PRIMARY KEY,
+            input_sha256 TEXT NOT NULL,
+            config_hash TEXT NOT NULL,
+            glossary_hash TEXT NOT NULL,
+            mono_path TEXT,
+            dual_path TEXT,
+            size BIGINT DEFAULT 0,
+            source_task_id TEXT,
+            hits INTEGER DEFAULT 0,
+            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+            last_used_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+        )
+    """)
+    cursor.execute("CREATE INDEX IF NOT EXISTS idx_result_cache_last_used ON result_cache(last_used_at)")
+
+
+def migration_v6_add_translation_memory(cursor):
+    """版本6: 添加跨用户共享的段落翻译记忆表"""
+    cursor.execute("""
+        CREATE TABLE IF NOT EXISTS translation_memory (
+            memory_key TEXT PRIMARY KEY,
+            lang_in TEXT NOT NULL,
+            lang_out TEXT NOT NULL,
+            model TEXT NOT NULL,
+            glossary_hash TEXT NOT NULL,
+            source_text TEXT NOT NULL,
+            translation TEXT NOT NULL,
+            size BIGINT DEFAULT 0,
+            hits INTEGER DEFAULT 0,
+            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+            last_used_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+        )
+    """)
+    cursor.execute(
+        "CREATE INDEX IF NOT EXISTS idx_translation_memory_last_used ON translation_memory(last_used_at)"
+    )
+
+
+def migration_v7_add_history_list_indexes(cursor):
+    """版本7: 为历史记录分页与筛选添加复合索引"""
+    cursor.execute("""
+        CREATE INDEX IF NOT EXISTS idx_history_user_start
+        ON translation_history(user_id, start_time DESC, task_id DESC)
+    """)
+    cursor.execute("""
+        CREATE INDEX IF NOT EXISTS idx_history_user_status_start
+        ON translation_history(user_id, status, start_time DESC, task_id DESC)
+    """)
+    cursor.execute("DROP INDEX IF EXISTS idx_user_id")
+
+
+def migration_v8_add_task_artifacts(cursor):
+    """版本8: 添加任务输出文件登记表"""
+    cursor.execute("""
+        CREATE TABLE IF NOT EXISTS task_artifacts (
+            id BIGSERIAL PRIMARY KEY,
+            task_id TEXT NOT NULL,
+            user_id TEXT,
+            kind TEXT NOT NULL,
+            path TEXT NOT NULL,
+            size BIGINT DEFAULT 0,
+            checksum TEXT,
+            missing INTEGER DEFAULT 0,
+            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+            checked_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+            UNIQUE(task_id, kind)
+        )
+    """)
+
+
+def migration_v9_add_history_archive(cursor):
+    """版本9: 添加历史记录归档表"""
+    cursor.execute("""
+        CREATE TABLE IF NOT EXISTS translation_history_archive (
+            task_id TEXT PRIMARY KEY,
+            user_id TEXT,
+            status TEXT NOT NULL,
+            filename TEXT NOT NULL,
+            source_lang TEXT NOT NULL,
+            target_lang TEXT NOT NULL,
+            model TEXT NOT NULL,
+            start_time TEXT NOT NULL,
+            end_time TEXT,
+            progress INTEGER DEFAULT 0,
+            stage TEXT,
+            message TEXT,
+            error TEXT,
+            config TEXT,
+            result TEXT,
+            created_at TIMESTAMP,
+            updated_at TIMESTAMP,
+            archived_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+        )
+    """)
+    cursor.execute("""
+        CREATE INDEX IF NOT EXISTS idx_history_archive_user
+        ON translation_history_archive(user_id, start_time DESC)
+    """)
+    cursor.execute("""
+        CREATE INDEX IF NOT EXISTS idx_history_archive_archived_at
+        ON translation_history_archive(archived_at)
+    """)
+
+
+def migration_v10_add_orphan_scan(cursor):
+    """版本10: 孤儿文件后台扫描的结果表与检查点表"""
+    cursor.execute("CREATE INDEX IF NOT EXISTS idx_task_artifacts_path ON task_artifacts(path)")
+    cursor.execute("""
+        CREATE TABLE IF NOT EXISTS orphan_files (
+            node TEXT NOT NULL,
+            path TEXT NOT NULL,
+            size BIGINT DEFAULT 0,
+            mtime DOUBLE PRECISION,
+            pass_no INTEGER NOT NULL,
+            found_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+            PRIMARY KEY (node, path)
+        )
+    """)
+    cursor.execute("""
+        CREATE TABLE IF NOT EXISTS maintenance_state (
+            name TEXT PRIMARY KEY,
+            state TEXT NOT NULL,
+            updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+        )
+    """)
+
+
+def migration_v11_add_storage_quota(cursor):
+    """版本11: 记录输出文件与上传文件的最近使用时间，以及按配额清理的时间"""
+    cursor.execute("ALTER TABLE task_artifacts ADD COLUMN IF NOT EXISTS last_used_at TIMESTAMP")
+    cursor.execute("ALTER TABLE task_artifacts ADD COLUMN IF NOT EXISTS evicted_at TIMESTAMP")
+    cursor.execute("ALTER TABLE uploads ADD COLUMN IF NOT EXISTS last_used_at TIMESTAMP")
+    cursor.execute("CREATE INDEX IF NOT EXISTS idx_task_artifacts_user ON task_artifacts(user_id, missing)")
+
+
+MIGRATIONS: List[Migration] = [
+    Migration(1, "添加用户支持", migration_v1_add_user_support),
+    Migration(2, "添加模型配置表", migration_v2_add_models_table),
+    Migration(3, "添加持久化任务队列表", migration_v3_add_translation_jobs_table),
+    Migration(4, "上传文件按内容哈希去重", migration_v4_add_upload_blobs),
+    Migration(5, "添加翻译结果缓存表", migration_v5_add_result_cache),
+    Migration(6, "添加翻译记忆表", migration_v6_add_translation_memory),
+    Migration(7, "历史记录分页复合索引", migration_v7_add_history_list_indexes),
+    Migration(8, "添加任务输出文件表", migration_v8_add_task_artifacts),
+    Migration(9, "添加历史记录归档表", migration_v9_add_history_archive),
+    Migration(10, "添加孤儿文件扫描表", migration_v10_add_orphan_scan),
+    Migration(11, "添加存储配额相关列", migration_v11_add_storage_quota),
+]
+
+
+def run_migrations(conn) -> bool:
+    """在一个事务中运行所有待执行的迁移
+
+    Args:
+        conn: psycopg 连接
+    """
+    try:
+        with conn.cursor() as cursor:
+            cursor.execute("SELECT pg_advisory_xact_lock(%s)", (MIGRATION_LOCK_KEY,))
+            cursor.execute("""
+                CREATE TABLE IF NOT EXISTS schema_version (
+                    version INTEGER PRIMARY KEY,
+                    applied_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+                    description TEXT
+                )
+            """)
+            cursor.execute("SELECT MAX(version) FROM schema_version")
+            current_version = cursor.fetchone()[0] or 0
+            logger.info(f"当前数据库版本: {current_version}")
+
+            for migration in MIGRATIONS:
+                if migration.version <= current_version:
+                    continue
+                logger.info(f"应用迁移 v{migration.version}: {migration.description}")
+                migration.upgrade(cursor)
+                cursor.execute(
+                    "INSERT INTO schema_version (version, description) VALUES (%s, %s)",
+                    (migration.version, migration.description)
+                )
+        conn.commit()
+        return True
+    except Exception as e:
+        logger.error(f"数据库迁移失败: {e}", exc_info=True)
+        conn.rollback()
+        return False
@@ -1,15 +1,36 @@
 """数据库模型"""
 import json
 import hashlib
+import logging
 import uuid
 from typing import Dict, List, Optional, Any
-from datetime import datetime
+from datetime import datetime, timedelta, timezone
 from .database import Database
 
+logger = logging.getLogger("easy_babeldoc.db")
+
+
+def _utc_cutoff(days: int) -> str:
+    """返回 days 天前的 UTC 时间，格式与 CURRENT_TIMESTAMP 相同，可直接与时间戳列比较"""
+    return (datetime.now(timezone.utc) - timedelta(days=days)).strftime('%Y-%m-%d %H:%M:%S')
+
 
 class TranslationHistory:
     """翻译历史记录模型"""
     
+    # 可写入的列；任务字典中的其他运行时字段（如 queue_position）不落库
+    COLUMNS = {
+        'user_id', 'status', 'filename', 'source_lang', 'target_lang', 'model',
+        'start_time', 'end_time', 'progress', 'stage', 'message', 'error',
+        'config', 'result'
+    }
+    
+    # INSERT 时的列顺序
+    INSERT_COLUMNS = (
+        'task_id', 'user_id', 'status', 'filename', 'source_lang', 'target_lang', 'model',
+        'start_time', 'end_time', 'progress', 'stage', 'message', 'error', 'config', 'result'
+    )
+    
     def __init__(self, db: Database):
         """初始化
         
@@ -28,34 +49,13 @@ class TranslationHistory:
             是否创建成功
         """
         try:
-            config_json = json.dumps(task_data.get('config', {}), ensure_ascii=False)
-            result_json = json.dumps(task_data.get('result', {}), ensure_ascii=False) if task_data.get('result') else None
-            
-            self.db.execute("""
-                INSERT INTO translation_history 
-                (task_id, user_id, status, filename, source_lang, target_lang, model, 
-                 start_time, end_time, progress, stage, message, error, config, result)
-                VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
-            """, (
-                task_data['task_id'],
-                task_data.get('user_id'),
-                task_data['status'],
-                task_data['filename'],
-                task_data['source_lang'],
-                task_data['target_lang'],
-                task_data['model'],
-                task_data['start_time'],
-                task_data.get('end_time'),
-                task_data.get('progress', 0),
-                task_data.get('stage'),
-                task_data.get('message'),
-                task_data.get('error'),
-                config_json,
-                result_json
-            ))
+            self.db.execute(f"""
+                INSERT INTO translation_history ({', '.join(self.INSERT_COLUMNS)})
+                VALUES ({', '.join('?' * len(self.INSERT_COLUMNS))})
+            """, self._insert_values(task_data))
             return True
         except Exception as e:
-            print(f"创建翻译记录失败: {e}")
+            logger.error("创建翻译记录失败: %s", e)
             return False
     
     def update(self, task_id: str, updates: Dict[str, Any]) -> bool:
@@ -73,6 +73,8 @@ class TranslationHistory:
             params = []
             
             for key, value in updates.items():
+                if key not in self.COLUMNS:
+                    continue
                 if key in ['config', 'result'] and isinstance(value, dict):
                     value = json.dumps(value, ensure_ascii=False)
                 set_clauses.append(f"{key} = ?")
@@ -90,7 +92,7 @@ class TranslationHistory:
             self.db.execute(query, tuple(params))
             return True
         except Exception as e:
-            print(f"更新翻译记录失败: {e}")
+            logger.error("更新翻译记录失败: %s", e)
             return False
     
     def get_by_id(self, task_id: str) -> Optional[Dict[str, Any]]:
@@ -111,6 +113,23 @@ class TranslationHistory:
             return self._row_to_dict(row)
         return None
     
+    def get_many(self, task_ids: List[str]) -> Dict[str, Dict[str, Any]]:
+        """按ID批量获取翻译记录（主表中没有的再查归档表），返回 {task_id: task}"""
+        found: Dict[str, Dict[str, Any]] = {}
+        for table in ('translation_history', 'translation_history_archive'):
+            pending = [task_id for task_id in task_ids if task_id not in found]
+            for start in range(0, len(pending), 500):
+                chunk = pending[start:start + 500]
+                rows = self.db.fetchall(
+                    f"SELECT * FROM {table} WHERE task_id IN ({', '.join('?' * len(chunk))})",
+                    tuple(chunk)
+                )
+                for row in rows:
+                    data = self._row_to_dict(row)
+                    data.pop('archived_at', None)
+                    found[data['task_id']] = data
+        return found
+    
     def get_all(self, limit: Optional[int] = None, offset: int = 0, user_id: Optional[str] = None) -> List[Dict[str, Any]]:
         """获取所有翻译记录
         
@@ -135,6 +154,59 @@ class TranslationHistory:
         rows = self.db.fetchall(query, params)
         return [self._row_to_dict(row) for row in rows]
     
+    def list_page(self, user_id: str, filters: Optional[Dict[str, Any]] = None,
+                  limit: Optional[int] = None,
+                  after: Optional[tuple] = None) -> List[Dict[str, Any]]:
+        """按开始时间倒序分页查询用户的翻译记录（键集分页）
+        
+        Args:
+            user_id: 用户ID
+            filters: 筛选条件，支持 status（列表）、source_lang、target_lang、model、
+                start_from / start_to（ISO时间，闭区间）和 filename_prefix
+            limit: 返回数量上限，None 表示不限制
+            after: 上一页最后一条记录的 (start_time, task_id)，返回排在其后的记录
+            
+        Returns:
+            任务数据列表
+        """
+        filters = filters or {}
+        conditions = ["user_id = ?"]
+        params: List[Any] = [user_id]
+        
+        statuses = filters.get('status')
+        if statuses:
+            conditions.append(f"status IN ({', '.join('?' * len(statuses))})")
+            params.extend(statuses)
+        for column in ('source_lang', 'target_lang', 'model'):
+            if filters.get(column):
+                conditions.append(f"{column} = ?")
+                params.append(filters[column])
+        if filters.get('start_from'):
+            conditions.append("start_time >= ?")
+            params.append(filters['start_from'])
+        if filters.get('start_to'):
+            conditions.append("start_time <= ?")
+            params.append(filters['start_to'])
+        if filters.get('filename_prefix'):
+            prefix = filters['filename_prefix'].replace('\\', '\\\\').replace('%', '\\%').replace('_', '\\_')
+            conditions.append("filename LIKE ? ESCAPE '\\'")
+            params.append(f"{prefix}%")
+        if after:
+            conditions.append("(start_time < ? OR (start_time = ? AND task_id < ?))")
+            params.extend([after[0], after[0], after[1]])
+        
+        query = f"""
+            SELECT * FROM translation_history
+            WHERE {' AND '.join(conditions)}
+            ORDER BY start_time DESC, task_id DESC
+        """
+        if limit:
+            query += " LIMIT ?"
+            params.append(int(limit))
+        
+        rows = self.db.fetchall(query, tuple(params))
+        return [self._row_to_dict(row) for row in rows]
+    
     def delete(self, task_id: str) -> bool:
         """删除翻译记录
         
@@ -145,17 +217,20 @@ class TranslationHistory:
             是否删除成功
         """
         try:
-            self.db.execute(
-                "DELETE FROM translation_history WHERE task_id = ?",
-                (task_id,)
-            )
+            with self.db.get_connection() as conn:
+                cursor = conn.cursor()
+                cursor.execute("DELETE FROM translation_history WHERE task_id = ?", (task_id,))
+                cursor.execute("DELETE FROM task_artifacts WHERE task_id = ?", (task_id,))
+                conn.commit()
             return True
         except Exception as e:
-            print(f"删除翻译记录失败: {e}")
+            logger.error("删除翻译记录失败: %s", e)
             return False
     
     def upsert(self, task_data: Dict[str, Any]) -> bool:
-        """插入或更新翻译记录
+        """插入或更新翻译记录（单条 INSERT ... ON CONFLICT 语句）
+        
+        记录已存在时只更新 task_data 中出现的列，其余列保持不变。
         
         Args:
             task_data: 任务数据字典
@@ -163,13 +238,218 @@ class TranslationHistory:
         Returns:
             是否操作成功
         """
-        existing = self.get_by_id(task_data['task_id'])
+        try:
+            self.db.execute(self._upsert_sql(self._update_columns(task_data)), self._insert_values(task_data))
+            return True
+        except Exception as e:
+            logger.error("保存翻译记录失败: %s", e)
+            return False
+    
+    def bulk_upsert(self, items: List[Dict[str, Any]]) -> int:
+        """在一个事务中批量插入或更新翻译记录
         
-        if existing:
-            updates = {k: v for k, v in task_data.items() if k != 'task_id'}
-            return self.update(task_data['task_id'], updates)
-        else:
-            return self.create(task_data)
+        Args:
+            items: 任务数据字典列表
+            
+        Returns:
+            成功写入的条数（单条数据有误时跳过该条，不影响其他记录）
+        """
+        groups: Dict[tuple, List[tuple]] = {}
+        for item in items:
+            if not item.get('task_id'):
+                continue
+            groups.setdefault(self._update_columns(item), []).append(self._insert_values(item))
+        
+        written = 0
+        with self.db.get_connection() as conn:
+            cursor = conn.cursor()
+            for columns, rows in groups.items():
+                sql = self._upsert_sql(columns)
+                try:
+                    cursor.executemany(sql, rows)
+                    conn.commit()
+                    written += len(rows)
+                except self.db.Error:
+                    # PostgreSQL 出错后整个事务失效：回滚本组，逐条重试以跳过有问题的记录
+                    conn.rollback()
+                    for row in rows:
+                        try:
+                            cursor.execute(sql, row)
+                            conn.commit()
+                            written += 1
+                        except self.db.Error as e:
+                            conn.rollback()
+                            logger.error("保存翻译记录失败 %s: %s", row[0], e)
+        return written
+    
+    def delete_many(self, task_ids: List[str]) -> int:
+        """在一个事务中批量删除翻译记录（连同登记的输出文件记录）
+        
+        Returns:
+            删除的条数
+        """
+        params = [(task_id,) for task_id in task_ids]
+        with self.db.get_connection() as conn:
+            cursor = conn.cursor()
+            cursor.executemany("DELETE FROM translation_history WHERE task_id = ?", params)
+            deleted = cursor.rowcount
+            cursor.executemany("DELETE FROM task_artifacts WHERE task_id = ?", params)
+            conn.commit()
+        return deleted
+    
+    # 只归档已结束的任务，排队或运行中的任务始终留在主表
+    ARCHIVABLE_STATUSES = ('completed', 'error', 'cancelled')
+    
+    # 主表与归档表共有的列
+    ARCHIVE_COLUMNS = INSERT_COLUMNS + ('created_at', 'updated_at')
+    
+    def list_archivable(self, max_age_days: int, max_per_user: int, limit: Optional[int]) -> List[str]:
+        """列出超过保留天数、或超出每用户保留条数的已结束任务ID
+        
+        Args:
+            max_age_days: 开始时间早于该天数的任务需要归档（0 表示不按时间归档）
+            max_per_user: 每个用户保留的最近已结束任务数（0 表示不限）
+            limit: 最多返回的条数，None 表示不限
+        """
+        conditions = []
+        params: List[Any] = list(self.ARCHIVABLE_STATUSES)
+        if max_age_days > 0:
+            conditions.append("start_time < ?")
+            params.append((datetime.now() - timedelta(days=max_age_days)).isoformat())
+        if max_per_user > 0:
+            conditions.append("rn > ?")
+            params.append(max_per_user)
+        if not conditions:
+            return []
+        
+        query = f"""
+            SELECT task_id FROM (
+                SELECT task_id, start_time,
+                       ROW_NUMBER() OVER (
+                           PARTITION BY user_id ORDER BY start_time DESC, task_id DESC
+                       ) AS rn
+                FROM translation_history
+                WHERE status IN ({', '.join('?' * len(self.ARCHIVABLE_STATUSES))})
+            ) AS ranked
+            WHERE {' OR '.join(conditions)}
+        """
+        if limit is not None:
+            query += " LIMIT ?"
+            params.append(limit)
+        
+        rows = self.db.fetchall(query, tuple(params))
+        return [row['task_id'] for row in rows]
+    
+    def archive_many(self, task_ids: List[str]) -> int:
+        """在一个事务中把记录移入归档表
+        
+        Returns:
+            归档的条数
+        """
+        columns = ', '.join(self.ARCHIVE_COLUMNS)
+        params = [(task_id,) for task_id in task_ids]
+        with self.db.get_connection() as conn:
+            cursor = conn.cursor()
+            # 同一任务重复归档时覆盖旧的归档记录
+            cursor.executemany("DELETE FROM translation_history_archive WHERE task_id = ?", params)
+            cursor.executemany(f"""
+                INSERT INTO translation_history_archive ({columns})
+                SELECT {columns} FROM translation_history WHERE task_id = ?
+            """, params)
+            cursor.executemany("DELETE FROM translation_history WHERE task_id = ?", params)
+            archived = cursor.rowcount
+            conn.commit()
+        return archived
+    
+    def get_archived(self, task_id: str) -> Optional[Dict[str, Any]]:
+        """从归档表获取记录"""
+        row = self.db.fetchone(
+            "SELECT * FROM translation_history_archive WHERE task_id = ?",
+            (task_id,)
+        )
+        if row:
+            data = self._row_to_dict(row)
+            data.pop('archived_at', None)
+            return data
+        return None
+    
+    def archived_result_paths(self, user_id: str) -> List[str]:
+        """列出用户已归档任务的输出文件路径（清理孤儿文件时仍视为有主文件）"""
+        rows = self.db.fetchall(
+            "SELECT result FROM translation_history_archive WHERE user_id = ? AND result IS NOT NULL",
+            (user_id,)
+        )
+        paths = []
+        for row in rows:
+            try:
+                result = json.loads(row['result'])
+            except (TypeError, ValueError):
+                continue
+            for field in ('mono_pdf_path', 'dual_pdf_path'):
+                if result and result.get(field):
+                    paths.append(result[field])
+        return paths
+    
+    def purge_archive(self, max_age_days: int) -> int:
+        """删除归档时间早于指定天数的归档记录
+        
+        Returns:
+            删除的条数
+        """
+        with self.db.get_connection() as conn:
+            cursor = conn.cursor()
+            cursor.execute(
+                "SELECT task_id FROM translation_history_archive WHERE archived_at < ?",
+                (_utc_cutoff(max_age_days),)
+            )
+            params = [(row['task_id'],) for row in cursor.fetchall()]
+            cursor.executemany("DELETE FROM translation_history_archive WHERE task_id = ?", params)
+            cursor.executemany("DELETE FROM task_artifacts WHERE task_id = ?", params)
+            conn.commit()
+        return len(params)
+    
+    def count_rows(self) -> Dict[str, int]:
+        """返回主表与归档表的记录数"""
+        row = self.db.fetchone("""
+            SELECT (SELECT COUNT(*) FROM translation_history) AS hot,
+                   (SELECT COUNT(*) FROM translation_history_archive) AS archived
+        """)
+        return dict(row) if row else {"hot": 0, "archived": 0}
+    
+    def _update_columns(self, task_data: Dict[str, Any]) -> tuple:
+        """记录已存在时需要更新的列：任务数据中出现的可写列"""
+        return tuple(column for column in self.INSERT_COLUMNS if column != 'task_id' and column in task_data)
+    
+    def _upsert_sql(self, update_columns: tuple) -> str:
+        assignments = [f"{column} = excluded.{column}" for column in update_columns]
+        assignments.append("updated_at = CURRENT_TIMESTAMP")
+        return f"""
+            INSERT INTO translation_history ({', '.join(self.INSERT_COLUMNS)})
+            VALUES ({', '.join('?' * len(self.INSERT_COLUMNS))})
+            ON CONFLICT(task_id) DO UPDATE SET {', '.join(assignments)}
+        """
+    
+    def _insert_values(self, task_data: Dict[str, Any]) -> tuple:
+        """按 INSERT_COLUMNS 顺序生成参数，缺失的列使用与新建记录相同的默认值"""
+        config = task_data.get('config', {})
+        result = task_data.get('result')
+        return (
+            task_data['task_id'],
+            task_data.get('user_id'),
+            task_data.get('status'),
+            task_data.get('filename'),
+            task_data.get('source_lang'),
+            task_data.get('target_lang'),
+            task_data.get('model'),
+            task_data.get('start_time'),
+            task_data.get('end_time'),
+            task_data.get('progress', 0),
+            task_data.get('stage'),
+            task_data.get('message'),
+            task_data.get('error'),
+            config if isinstance(config, str) else json.dumps(config if config is not None else {}, ensure_ascii=False),
+            result if isinstance(result, str) else (json.dumps(result, ensure_ascii=False) if result else None),
+        )
     
     def _row_to_dict(self, row) -> Dict[str, Any]:
         """将数据库行转换为字典
@@ -246,7 +526,7 @@ class User:
             
             return user_id
         except Exception as e:
-            print(f"创建用户失败: {e}")
+            logger.error("创建用户失败: %s", e)
             return None
     
     def get_by_username(self, username: str) -> Optional[Dict[str, Any]]:
@@ -322,5 +602,769 @@ class User:
             )
             return True
         except Exception as e:
-            print(f"更新登录时间失败: {e}")
+            logger.error("更新登录时间失败: %s", e)
+            return False
+
+
+class TranslationJob:
+    """持久化任务队列模型
+
+    记录排队中和运行中的任务，服务重启后据此自动恢复。
+    request 字段只保存去除敏感信息后的请求参数，API密钥通过 credential_ref 引用。
+    """
+    
+    def __init__(self, db: Database):
+        """初始化
+        
+        Args:
+            db: 数据库实例
+        """
+        self.db = db
+    
+    def save(self, task_id: str, user_id: str, request: Dict[str, Any],
+             credential_ref: Optional[str], priority: int = 0, status: str = "queued") -> bool:
+        """保存任务（已存在则覆盖）
+        
+        Args:
+            task_id: 任务ID
+            user_id: 用户ID
+            request: 去除敏感信息后的请求参数
+            credential_ref: API密钥来源引用，例如 "model:3"
+            priority: 调度优先级
+            status: 任务状态（queued/running）
+            
+        Returns:
+            是否保存成功
+        """
+        try:
+            # 已存在时保留 attempts 与 created_at（排队顺序不变）
+            self.db.execute("""
+                INSERT INTO translation_jobs
+                (task_id, user_id, status, priority, request, credential_ref)
+                VALUES (?, ?, ?, ?, ?, ?)
+                ON CONFLICT(task_id) DO UPDATE SET
+                    user_id = excluded.user_id,
+                    status = excluded.status,
+                    priority = excluded.priority,
+                    request = excluded.request,
+                    credential_ref = excluded.credential_ref,
+                    updated_at = CURRENT_TIMESTAMP
+            """, (
+                task_id,
+                user_id,
+                status,
+                priority,
+                json.dumps(request, ensure_ascii=False),
+                credential_ref
+            ))
+            return True
+        except Exception as e:
+            logger.error("保存任务失败: %s", e)
+            return False
+    
+    def set_status(self, task_id: str, status: str) -> bool:
+        """更新任务状态
+        
+        Args:
+            task_id: 任务ID
+            status: 新状态
+            
+        Returns:
+            是否更新成功
+        """
+        try:
+            self.db.execute("""
+                UPDATE translation_jobs
+                SET status = ?, updated_at = CURRENT_TIMESTAMP
+                WHERE task_id = ?
+            """, (status, task_id))
+            return True
+        except Exception as e:
+            logger.error("更新任务状态失败: %s", e)
+            return False
+    
+    def increment_attempts(self, task_id: str) -> bool:
+        """增加恢复次数"""
+        try:
+            self.db.execute("""
+                UPDATE translation_jobs
+                SET attempts = attempts + 1, updated_at = CURRENT_TIMESTAMP
+                WHERE task_id = ?
+            """, (task_id,))
+            return True
+        except Exception as e:
+            logger.error("更新任务恢复次数失败: %s", e)
+            return False
+    
+    def delete(self, task_id: str) -> bool:
+        """删除任务（任务结束后调用）"""
+        try:
+            self.db.execute(
+                "DELETE FROM translation_jobs WHERE task_id = ?",
+                (task_id,)
+            )
+            return True
+        except Exception as e:
+            logger.error("删除任务失败: %s", e)
+            return False
+    
+    def get_pending(self) -> List[Dict[str, Any]]:
+        """获取所有未完成的任务，按优先级和提交时间排序"""
+        rows = self.db.fetchall("""
+            SELECT * FROM translation_jobs
+            ORDER BY priority DESC, created_at ASC
+        """)
+        
+        jobs = []
+        for row in rows:
+            data = dict(row)
+            try:
+                data['request'] = json.loads(data['request'])
+            except:
+                data['request'] = {}
+            jobs.append(data)
+        return jobs
+
+
+class UploadStore:
+    """按内容哈希存储的上传文件模型
+
+    upload_blobs 每个内容只存一份并记录引用计数，uploads 为每次上传分配一个 file_id 别名。
+    """
+    
+    def __init__(self, db: Database):
+        """初始化
+        
+        Args:
+            db: 数据库实例
+        """
+        self.db = db
+    
+    def get_blob(self, sha256: str) -> Optional[Dict[str, Any]]:
+        """根据内容哈希获取文件块"""
+        row = self.db.fetchone(
+            "SELECT * FROM upload_blobs WHERE sha256 = ?",
+            (sha256,)
+        )
+        
+        if row:
+            return dict(row)
+        return None
+    
+    def get(self, file_id: str) -> Optional[Dict[str, Any]]:
+        """根据 file_id 获取上传记录（包含文件块路径）"""
+        row = self.db.fetchone("""
+            SELECT u.*, b.path AS blob_path, b.ref_count
+            FROM uploads u JOIN upload_blobs b ON u.sha256 = b.sha256
+            WHERE u.file_id = ?
+        """, (file_id,))
+        
+        if row:
+            return dict(row)
+        return None
+    
+    def add(self, file_id: str, sha256: str, size: int, blob_path: str,
+            filename: Optional[str] = None, user_id: Optional[str] = None) -> bool:
+        """登记一次上传：文件块不存在时创建，引用计数加一，并创建 file_id 别名
+        
+        Returns:
+            是否为重复内容（文件块此前已存在）
+        """
+        with self.db.get_connection() as conn:
+            cursor = conn.cursor()
+            cursor.execute(
+                "INSERT INTO upload_blobs (sha256, size, path, ref_count) VALUES (?, ?, ?, 0) "
+                "ON CONFLICT(sha256) DO NOTHING",
+                (sha256, size, blob_path)
+            )
+            created = cursor.rowcount > 0
+            cursor.execute(
+                "UPDATE upload_blobs SET ref_count = ref_count + 1 WHERE sha256 = ?",
+                (sha256,)
+            )
+            cursor.execute("""
+                INSERT INTO uploads (file_id, sha256, filename, size, user_id)
+                VALUES (?, ?, ?, ?, ?)
+            """, (file_id, sha256, filename, size, user_id))
+            conn.commit()
+        return not created
+    
+    def remove(self, file_id: str) -> Optional[Dict[str, Any]]:
+        """删除 file_id 别名并减少引用计数
+        
+        Returns:
+            引用计数归零而被删除的文件块记录（调用方负责删除磁盘文件），否则为None
+        """
+        with self.db.get_connection() as conn:
+            cursor = conn.cursor()
+            cursor.execute("SELECT sha256 FROM uploads WHERE file_id = ?", (file_id,))
+            row = cursor.fetchone()
+            if not row:
+                return None
+            sha256 = row["sha256"]
+            
+            cursor.execute("DELETE FROM uploads WHERE file_id = ?", (file_id,))
+            cursor.execute(
+                "UPDATE upload_blobs SET ref_count = ref_count - 1 WHERE sha256 = ?",
+                (sha256,)
+            )
+            cursor.execute(
+                "SELECT * FROM upload_blobs WHERE sha256 = ? AND ref_count <= 0",
+                (sha256,)
+            )
+            orphan = cursor.fetchone()
+            if orphan:
+                orphan = dict(orphan)
+                cursor.execute("DELETE FROM upload_blobs WHERE sha256 = ?", (sha256,))
+            conn.commit()
+        return orphan
+    
+    def touch(self, file_id: str) -> bool:
+        """更新最近使用时间（按配额淘汰时最久未使用的先删除）"""
+        cursor = self.db.execute(
+            "UPDATE uploads SET last_used_at = CURRENT_TIMESTAMP WHERE file_id = ?",
+            (file_id,)
+        )
+        return cursor.rowcount > 0
+    
+    def usage(self, user_id: str) -> int:
+        """用户上传文件的总大小（按每次上传计算，不考虑去重）"""
+        row = self.db.fetchone(
+            "SELECT COALESCE(SUM(size), 0) FROM uploads WHERE user_id = ?",
+            (user_id,)
+        )
+        return row[0] if row else 0
+    
+    def blob_size(self) -> int:
+        """磁盘上文件块的总大小"""
+        row = self.db.fetchone("SELECT COALESCE(SUM(size), 0) FROM upload_blobs")
+        return row[0] if row else 0
+    
+    def list_lru(self, user_id: Optional[str], limit: int) -> List[Dict[str, Any]]:
+        """按最近使用时间从旧到新列出上传（user_id 为None时列出所有用户）"""
+        where = "WHERE u.user_id = ?" if user_id is not None else ""
+        params = (user_id, limit) if user_id is not None else (limit,)
+        rows = self.db.fetchall(f"""
+            SELECT u.file_id, u.user_id, u.size, b.size AS blob_size, b.ref_count,
+                   COALESCE(u.last_used_at, u.created_at) AS used_at
+            FROM uploads u JOIN upload_blobs b ON u.sha256 = b.sha256
+            {where}
+            ORDER BY used_at, u.file_id
+            LIMIT ?
+        """, params)
+        return [dict(row) for row in rows]
+
+
+class ResultCache:
+    """翻译结果缓存模型"""
+    
+    def __init__(self, db: Database):
+        """初始化
+        
+        Args:
+            db: 数据库实例
+        """
+        self.db = db
+    
+    def get(self, cache_key: str) -> Optional[Dict[str, Any]]:
+        """获取缓存条目"""
+        row = self.db.fetchone(
+            "SELECT * FROM result_cache WHERE cache_key = ?",
+            (cache_key,)
+        )
+        
+        if row:
+            return dict(row)
+        return None
+    
+    def touch(self, cache_key: str) -> bool:
+        """记录一次命中"""
+        try:
+            self.db.execute("""
+                UPDATE result_cache
+                SET hits = hits + 1, last_used_at = CURRENT_TIMESTAMP
+                WHERE cache_key = ?
+            """, (cache_key,))
+            return True
+        except Exception as e:
+            logger.error("更新结果缓存失败: %s", e)
             return False
+    
+    def put(self, entry: Dict[str, Any]) -> bool:
+        """写入缓存条目（已存在则覆盖）"""
+        try:
+            self.db.execute("""
+                INSERT INTO result_cache
+                (cache_key, input_sha256, config_hash, glossary_hash,
+                 mono_path, dual_path, size, source_task_id)
+                VALUES (?, ?, ?, ?, ?, ?, ?, ?)
+                ON CONFLICT(cache_key) DO UPDATE SET
+                    input_sha256 = excluded.input_sha256,
+                    config_hash = excluded.config_hash,
+                    glossary_hash = excluded.glossary_hash,
+                    mono_path = excluded.mono_path,
+                    dual_path = excluded.dual_path,
+                    size = excluded.size,
+                    source_task_id = excluded.source_task_id,
+                    hits = 0,
+                    created_at = CURRENT_TIMESTAMP,
+                    last_used_at = CURRENT_TIMESTAMP
+            """, (
+                entry['cache_key'],
+                entry['input_sha256'],
+                entry['config_hash'],
+                entry['glossary_hash'],
+                entry.get('mono_path'),
+                entry.get('dual_path'),
+                entry.get('size', 0),
+                entry.get('source_task_id')
+            ))
+            return True
+        except Exception as e:
+            logger.error("写入结果缓存失败: %s", e)
+            return False
+    
+    def delete(self, cache_key: str) -> bool:
+        """删除缓存条目"""
+        try:
+            self.db.execute(
+                "DELETE FROM result_cache WHERE cache_key = ?",
+                (cache_key,)
+            )
+            return True
+        except Exception as e:
+            logger.error("删除结果缓存失败: %s", e)
+            return False
+    
+    def list_expired(self, max_age_days: int) -> List[Dict[str, Any]]:
+        """列出超过保留天数的条目"""
+        rows = self.db.fetchall("""
+            SELECT * FROM result_cache
+            WHERE last_used_at < ?
+        """, (_utc_cutoff(max_age_days),))
+        return [dict(row) for row in rows]
+    
+    def list_lru(self) -> List[Dict[str, Any]]:
+        """按最近使用时间从旧到新列出全部条目"""
+        rows = self.db.fetchall(
+            "SELECT * FROM result_cache ORDER BY last_used_at ASC, created_at ASC"
+        )
+        return [dict(row) for row in rows]
+    
+    def totals(self) -> Dict[str, int]:
+        """返回条目数量、总大小与累计命中次数"""
+        row = self.db.fetchone(
+            "SELECT COUNT(*) AS entries, COALESCE(SUM(size), 0) AS size, COALESCE(SUM(hits), 0) AS hits FROM result_cache"
+        )
+        return dict(row) if row else {"entries": 0, "size": 0, "hits": 0}
+
+
+class TranslationMemory:
+    """段落级翻译记忆模型（所有用户和任务共享）"""
+    
+    def __init__(self, db: Database):
+        """初始化
+        
+        Args:
+            db: 数据库实例
+        """
+        self.db = db
+    
+    def get(self, memory_key: str) -> Optional[str]:
+        """查找译文（只读，命中次数与最近使用时间由调用方通过 record_hits 批量写回）"""
+        row = self.db.fetchone(
+            "SELECT translation FROM translation_memory WHERE memory_key = ?",
+            (memory_key,)
+        )
+        return row["translation"] if row else None
+    
+    def record_hits(self, hits: Dict[str, int]) -> int:
+        """批量累加命中次数并更新最近使用时间
+        
+        Args:
+            hits: 翻译记忆键 -> 新增命中次数
+        
+        Returns:
+            写入的条数
+        """
+        if not hits:
+            return 0
+        with self.db.get_connection() as conn:
+            cursor = conn.cursor()
+            cursor.executemany("""
+                UPDATE translation_memory
+                SET hits = hits + ?, last_used_at = CURRENT_TIMESTAMP
+                WHERE memory_key = ?
+            """, [(count, key) for key, count in hits.items()])
+            conn.commit()
+        return len(hits)
+    
+    def put(self, entry: Dict[str, Any]) -> bool:
+        """写入译文（已存在则覆盖）"""
+        try:
+            self.db.execute("""
+                INSERT INTO translation_memory
+                (memory_key, lang_in, lang_out, model, glossary_hash,
+                 source_text, translation, size)
+                VALUES (?, ?, ?, ?, ?, ?, ?, ?)
+                ON CONFLICT(memory_key) DO UPDATE SET
+                    lang_in = excluded.lang_in,
+                    lang_out = excluded.lang_out,
+                    model = excluded.model,
+                    glossary_hash = excluded.glossary_hash,
+                    source_text = excluded.source_text,
+                    translation = excluded.translation,
+                    size = excluded.size,
+                    hits = 0,
+                    created_at = CURRENT_TIMESTAMP,
+                    last_used_at = CURRENT_TIMESTAMP
+            """, (
+                entry['memory_key'],
+                entry['lang_in'],
+                entry['lang_out'],
+                entry['model'],
+                entry['glossary_hash'],
+                entry['source_text'],
+                entry['translation'],
+                entry.get('size', 0)
+            ))
+            return True
+        except Exception as e:
+            logger.error("写入翻译记忆失败: %s", e)
+            return False
+    
+    def evict(self, max_bytes: int) -> int:
+        """按最近使用时间淘汰最旧的条目，直到总大小不超过 max_bytes
+        
+        Returns:
+            删除的条目数
+        """
+        with self.db.get_connection() as conn:
+            cursor = conn.cursor()
+            cursor.execute("SELECT COALESCE(SUM(size), 0) FROM translation_memory")
+            excess = cursor.fetchone()[0] - max_bytes
+            if excess <= 0:
+                return 0
+            
+            cursor.execute(
+                "SELECT memory_key, size FROM translation_memory ORDER BY last_used_at ASC, created_at ASC"
+            )
+            victims = []
+            for row in cursor.fetchall():
+                if excess <= 0:
+                    break
+                victims.append((row["memory_key"],))
+                excess -= row["size"] or 0
+            cursor.executemany("DELETE FROM translation_memory WHERE memory_key = ?", victims)
+            conn.commit()
+            return len(victims)
+    
+    def totals(self) -> Dict[str, int]:
+        """返回条目数量、总大小与累计命中次数"""
+        row = self.db.fetchone(
+            "SELECT COUNT(*) AS entries, COALESCE(SUM(size), 0) AS size, COALESCE(SUM(hits), 0) AS hits FROM translation_memory"
+        )
+        return dict(row) if row else {"entries": 0, "size": 0, "hits": 0}
+
+
+class TaskArtifact:
+    """任务输出文件登记模型"""
+    
+    def __init__(self, db: Database):
+        """初始化
+        
+        Args:
+            db: 数据库实例
+        """
+        self.db = db
+    
+    def put_many(self, artifacts: List[Dict[str, Any]]) -> int:
+        """登记输出文件（同一任务同一类型已存在则覆盖）
+        
+        Returns:
+            写入的条数
+        """
+        with self.db.get_connection() as conn:
+            cursor = conn.cursor()
+            cursor.executemany("""
+                INSERT INTO task_artifacts (task_id, user_id, kind, path, size, checksum)
+                VALUES (?, ?, ?, ?, ?, ?)
+                ON CONFLICT(task_id, kind) DO UPDATE SET
+                    user_id = excluded.user_id,
+                    path = excluded.path,
+                    size = excluded.size,
+                    checksum = excluded.checksum,
+                    missing = 0,
+                    created_at = CURRENT_TIMESTAMP,
+                    checked_at = CURRENT_TIMESTAMP
+            """, [
+                (a['task_id'], a.get('user_id'), a['kind'], a['path'], a.get('size', 0), a.get('checksum'))
+                for a in artifacts
+            ])
+            conn.commit()
+        return len(artifacts)
+    
+    def get(self, task_id: str, kind: str) -> Optional[Dict[str, Any]]:
+        """获取任务某一类型的输出文件登记"""
+        row = self.db.fetchone(
+            "SELECT * FROM task_artifacts WHERE task_id = ? AND kind = ?",
+            (task_id, kind)
+        )
+        return dict(row) if row else None
+    
+    def get_for_tasks(self, task_ids: List[str]) -> Dict[str, List[Dict[str, Any]]]:
+        """按任务ID批量读取输出文件，返回 {task_id: [artifact, ...]}"""
+        grouped: Dict[str, List[Dict[str, Any]]] = {}
+        # 分批查询，避免超过数据库的参数个数上限
+        for start in range(0, len(task_ids), 500):
+            chunk = task_ids[start:start + 500]
+            rows = self.db.fetchall(
+                f"SELECT * FROM task_artifacts WHERE task_id IN ({', '.join('?' * len(chunk))})",
+                tuple(chunk)
+            )
+            for row in rows:
+                grouped.setdefault(row['task_id'], []).append(dict(row))
+        return grouped
+    
+    def file_stats(self, user_id: str) -> List[Dict[str, Any]]:
+        """按任务状态汇总任务数、现存输出文件数与总大小（单条聚合查询）"""
+        rows = self.db.fetchall("""
+            SELECT h.status AS status,
+                   COUNT(DISTINCT h.task_id) AS count,
+                   COUNT(a.id) AS files,
+                   COALESCE(SUM(a.size), 0) AS size
+            FROM translation_history h
+            LEFT JOIN task_artifacts a ON a.task_id = h.task_id AND a.missing = 0
+            WHERE h.user_id = ?
+            GROUP BY h.status
+        """, (user_id,))
+        return [dict(row) for row in rows]
+    
+    def list_batch(self, after_id: int, limit: int) -> List[Dict[str, Any]]:
+        """按ID顺序读取一批登记记录，供后台核对使用"""
+        rows = self.db.fetchall(
+            "SELECT id, path, size, checksum, missing FROM task_artifacts WHERE id > ? ORDER BY id LIMIT ?",
+            (after_id, limit)
+        )
+        return [dict(row) for row in rows]
+    
+    def list_unrecorded(self, limit: int) -> List[Dict[str, Any]]:
+        """列出已完成但尚未登记输出文件的任务（迁移前的历史数据，包括已归档的任务）"""
+        rows = self.db.fetchall("""
+            SELECT h.task_id, h.user_id, h.result FROM translation_history h
+            WHERE h.status = 'completed' AND h.result IS NOT NULL
+              AND NOT EXISTS (SELECT 1 FROM task_artifacts a WHERE a.task_id = h.task_id)
+            UNION ALL
+            SELECT h.task_id, h.user_id, h.result FROM translation_history_archive h
+            WHERE h.status = 'completed' AND h.result IS NOT NULL
+              AND NOT EXISTS (SELECT 1 FROM task_artifacts a WHERE a.task_id = h.task_id)
+            LIMIT ?
+        """, (limit,))
+        items = []
+        for row in rows:
+            try:
+                result = json.loads(row['result'])
+            except (TypeError, ValueError):
+                result = None
+            items.append({"task_id": row['task_id'], "user_id": row['user_id'], "result": result})
+        return items
+    
+    def recorded_paths(self, paths: List[str]) -> set:
+        """返回 paths 中已登记为任务输出文件的路径"""
+        recorded = set()
+        for start in range(0, len(paths), 500):
+            chunk = paths[start:start + 500]
+            rows = self.db.fetchall(
+                f"SELECT path FROM task_artifacts WHERE path IN ({', '.join('?' * len(chunk))})",
+                tuple(chunk)
+            )
+            recorded.update(row['path'] for row in rows)
+        return recorded
+    
+    def list_missing(self, user_id: str) -> List[Dict[str, Any]]:
+        """列出用户已完成任务中登记的文件已丢失的记录（按配额清理的除外）"""
+        rows = self.db.fetchall("""
+            SELECT h.task_id, h.filename, a.kind FROM task_artifacts a
+            JOIN translation_history h ON h.task_id = a.task_id
+            WHERE h.user_id = ? AND h.status = 'completed' AND a.missing = 1 AND a.evicted_at IS NULL
+            ORDER BY h.task_id
+        """, (user_id,))
+        return [dict(row) for row in rows]
+    
+    def update_state(self, updates: List[Dict[str, Any]]) -> int:
+        """写回核对结果（missing、size、checksum）"""
+        with self.db.get_connection() as conn:
+            cursor = conn.cursor()
+            cursor.executemany("""
+                UPDATE task_artifacts
+                SET missing = ?, size = ?, checksum = ?, checked_at = CURRENT_TIMESTAMP
+                WHERE id = ?
+            """, [(int(u['missing']), u['size'], u.get('checksum'), u['id']) for u in updates])
+            conn.commit()
+        return len(updates)
+    
+    def touch_many(self, keys: List[tuple]) -> int:
+        """更新输出文件的最近下载时间，keys 为 (task_id, kind)"""
+        with self.db.get_connection() as conn:
+            cursor = conn.cursor()
+            cursor.executemany(
+                "UPDATE task_artifacts SET last_used_at = CURRENT_TIMESTAMP WHERE task_id = ? AND kind = ?",
+                keys
+            )
+            conn.commit()
+        return len(keys)
+    
+    def usage(self, user_id: str) -> Dict[str, int]:
+        """用户现存输出文件的总大小与已按配额清理的文件数"""
+        row = self.db.fetchone("""
+            SELECT COALESCE(SUM(CASE WHEN missing = 0 THEN size ELSE 0 END), 0) AS size,
+                   COUNT(evicted_at) AS evicted
+            FROM task_artifacts WHERE user_id = ?
+        """, (user_id,))
+        return dict(row) if row else {"size": 0, "evicted": 0}
+    
+    def list_lru(self, user_id: Optional[str], limit: int) -> List[Dict[str, Any]]:
+        """按最近下载时间从旧到新列出已完成任务的现存输出文件（user_id 为None时列出所有用户）"""
+        where = "AND a.user_id = ?" if user_id is not None else ""
+        params = (user_id, limit) if user_id is not None else (limit,)
+        rows = self.db.fetchall(f"""
+            SELECT a.id, a.task_id, a.user_id, a.kind, a.path, a.size,
+                   COALESCE(a.last_used_at, a.created_at) AS used_at
+            FROM task_artifacts a
+            WHERE a.missing = 0 {where}
+              AND NOT EXISTS (
+                  SELECT 1 FROM translation_history h
+                  WHERE h.task_id = a.task_id AND h.status IN ('queued', 'running')
+              )
+            ORDER BY used_at, a.id
+            LIMIT ?
+        """, params)
+        return [dict(row) for row in rows]
+    
+    def mark_evicted(self, artifact_ids: List[int], task_ids: List[str], message: str) -> int:
+        """把按配额删除的输出文件标记为已清理，并在对应的历史记录中注明"""
+        with self.db.get_connection() as conn:
+            cursor = conn.cursor()
+            cursor.executemany("""
+                UPDATE task_artifacts
+                SET missing = 1, evicted_at = CURRENT_TIMESTAMP, checked_at = CURRENT_TIMESTAMP
+                WHERE id = ?
+            """, [(artifact_id,) for artifact_id in artifact_ids])
+            for table in ("translation_history", "translation_history_archive"):
+                cursor.executemany(
+                    f"UPDATE {table} SET message = ? WHERE task_id = ?",
+                    [(message, task_id) for task_id in task_ids]
+                )
+            conn.commit()
+        return len(artifact_ids)
+    
+    def totals(self) -> Dict[str, int]:
+        """返回登记的文件数、缺失数与总大小"""
+        row = self.db.fetchone("""
+            SELECT COUNT(*) AS files,
+                   COALESCE(SUM(missing), 0) AS missing,
+                   COALESCE(SUM(CASE WHEN missing = 0 THEN size ELSE 0 END), 0) AS size
+            FROM task_artifacts
+        """)
+        return dict(row) if row else {"files": 0, "missing": 0, "size": 0}
+
+
+class OrphanFile:
+    """后台扫描发现的孤儿文件（未被任何任务登记的输出文件），按节点区分"""
+    
+    def __init__(self, db: Database):
+        """初始化
+        
+        Args:
+            db: 数据库实例
+        """
+        self.db = db
+    
+    def put_many(self, node: str, pass_no: int, files: List[Dict[str, Any]]) -> int:
+        """记录本轮扫描发现的孤儿文件（已存在则更新大小与所属轮次）"""
+        with self.db.get_connection() as conn:
+            cursor = conn.cursor()
+            cursor.executemany("""
+                INSERT INTO orphan_files (node, path, size, mtime, pass_no)
+                VALUES (?, ?, ?, ?, ?)
+                ON CONFLICT(node, path) DO UPDATE SET
+                    size = excluded.size,
+                    mtime = excluded.mtime,
+                    pass_no = excluded.pass_no
+            """, [(node, f['path'], f['size'], f['mtime'], pass_no) for f in files])
+            conn.commit()
+        return len(files)
+    
+    def list(self, node: str, limit: int) -> List[Dict[str, Any]]:
+        """按路径顺序列出孤儿文件"""
+        rows = self.db.fetchall(
+            "SELECT path, size, mtime, found_at FROM orphan_files WHERE node = ? ORDER BY path LIMIT ?",
+            (node, limit)
+        )
+        return [dict(row) for row in rows]
+    
+    def delete_paths(self, node: str, paths: List[str]) -> int:
+        """删除已处理的孤儿文件记录"""
+        with self.db.get_connection() as conn:
+            cursor = conn.cursor()
+            cursor.executemany(
+                "DELETE FROM orphan_files WHERE node = ? AND path = ?",
+                [(node, path) for path in paths]
+            )
+            conn.commit()
+        return len(paths)
+    
+    def delete_stale(self, node: str, pass_no: int) -> int:
+        """一轮扫描完成后删除本轮未再发现的记录（文件已删除或已被登记）"""
+        cursor = self.db.execute(
+            "DELETE FROM orphan_files WHERE node = ? AND pass_no < ?",
+            (node, pass_no)
+        )
+        return cursor.rowcount
+    
+    def totals(self, node: str) -> Dict[str, int]:
+        """返回孤儿文件数量与总大小"""
+        row = self.db.fetchone(
+            "SELECT COUNT(*) AS files, COALESCE(SUM(size), 0) AS size FROM orphan_files WHERE node = ?",
+            (node,)
+        )
+        return dict(row) if row else {"files": 0, "size": 0}
+
+
+class MaintenanceState:
+    """后台维护任务的检查点（JSON），服务重启后从检查点继续"""
+    
+    def __init__(self, db: Database):
+        """初始化
+        
+        Args:
+            db: 数据库实例
+        """
+        self.db = db
+    
+    def get(self, name: str) -> Optional[Dict[str, Any]]:
+        """读取检查点"""
+        row = self.db.fetchone("SELECT state FROM maintenance_state WHERE name = ?", (name,))
+        if not row:
+            return None
+        try:
+            return json.loads(row['state'])
+        except (TypeError, ValueError):
+            return None
+    
+    def put(self, name: str, state: Dict[str, Any]) -> bool:
+        """保存检查点"""
+        try:
+            self.db.execute("""
+                INSERT INTO maintenance_state (name, state) VALUES (?, ?)
+                ON CONFLICT(name) DO UPDATE SET state = excluded.state, updated_at = CURRENT_TIMESTAMP
+            """, (name, json.dumps(state, ensure_ascii=False)))
+            return True
+        except Exception as e:
+            logger.error("保存检查点失败: %s", e)
+            return False
+    
+    def delete(self, name: str) -> bool:
+        """删除检查点"""
+        cursor = self.db.execute("DELETE FROM maintenance_state WHERE name = ?", (name,))
+        return cursor.rowcount > 0
@@ -22,15 +22,32 @@ Source code: https://github.com/lijiapeng365/Easy-BabelDOC
 """
 
 import argparse
+import asyncio
 import errno
 import logging
+import multiprocessing
+from contextlib import asynccontextmanager
 from fastapi import FastAPI, HTTPException, Request
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi.responses import FileResponse, JSONResponse
 from fastapi.staticfiles import StaticFiles
 from typing import List
 
-from config.settings import FRONTEND_STATIC_DIR, FRONTEND_INDEX_FILE, DATA_DIR
+from config.settings import (
+    ARTIFACT_RECONCILE_BATCH,
+    ARTIFACT_RECONCILE_INTERVAL,
+    FRONTEND_STATIC_DIR,
+    FRONTEND_INDEX_FILE,
+    DATA_DIR,
+    LAYOUT_MODEL_POOL_PREWARM,
+    ORPHAN_AUTO_DELETE,
+    ORPHAN_DELETE_LIMIT,
+    ORPHAN_SCAN_BATCH,
+    ORPHAN_SCAN_INTERVAL_HOURS,
+    ORPHAN_SCAN_PAUSE_MS,
+    RETENTION_INTERVAL_HOURS,
+    TRANSLATION_EXECUTION_MODE,
+)
 from utils.network import determine_host, determine_port, determine_port_search_limit, can_bind_port
 
 try:
@@ -39,12 +56,68 @@ try:
 except:
     print("BabelDOC initialization skipped (development mode)")
 
-app = FastAPI(title="BabelDOC API", version="1.0.0")
-
 logger = logging.getLogger("easy_babeldoc")
 if not logger.handlers:
     logging.basicConfig(level=logging.INFO)
 
+async def _warmup_layout_model_pool():
+    """在后台线程中预热版面分析模型池，不阻塞服务启动"""
+    from utils.layout_pool import get_layout_model_pool
+    try:
+        await asyncio.to_thread(get_layout_model_pool().warmup)
+    except Exception as e:
+        logger.warning("Layout model pool warmup skipped: %s", e)
+
+async def _start_worker_pool():
+    """在后台线程中启动翻译工作进程（模型在各工作进程内预热）"""
+    from utils.worker_pool import get_worker_pool
+    try:
+        await asyncio.to_thread(get_worker_pool().start)
+    except Exception as e:
+        logger.warning("Translation worker pool startup failed: %s", e)
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    """应用生命周期：启动时初始化常驻资源"""
+    from api.translation import resume_pending_translations, shutdown_translations
+    from utils.database import init_database, close_database
+    
+    # 整个应用共用一个数据库实例，建表和迁移只在这里执行一次
+    app.state.db = await asyncio.to_thread(init_database)
+    
+    background_tasks = []
+    if ARTIFACT_RECONCILE_INTERVAL > 0:
+        from utils.artifacts import run_reconciler
+        background_tasks.append(asyncio.create_task(
+            run_reconciler(ARTIFACT_RECONCILE_INTERVAL, ARTIFACT_RECONCILE_BATCH)
+        ))
+    if RETENTION_INTERVAL_HOURS > 0:
+        from utils.retention import run_retention_loop
+        background_tasks.append(asyncio.create_task(run_retention_loop(RETENTION_INTERVAL_HOURS * 3600)))
+    if ORPHAN_SCAN_INTERVAL_HOURS > 0:
+        from utils.orphans import run_orphan_scanner
+        background_tasks.append(asyncio.create_task(run_orphan_scanner(
+            ORPHAN_SCAN_INTERVAL_HOURS * 3600, ORPHAN_SCAN_BATCH, ORPHAN_SCAN_PAUSE_MS / 1000,
+            ORPHAN_DELETE_LIMIT if ORPHAN_AUTO_DELETE else 0,
+        )))
+    if TRANSLATION_EXECUTION_MODE == "process":
+        background_tasks.append(asyncio.create_task(_start_worker_pool()))
+    elif LAYOUT_MODEL_POOL_PREWARM:
+        background_tasks.append(asyncio.create_task(_warmup_layout_model_pool()))
+    await resume_pending_translations()
+    try:
+        yield
+    finally:
+        for task in background_tasks:
+            task.cancel()
+        await shutdown_translations()
+        if TRANSLATION_EXECUTION_MODE == "process":
+            from utils.worker_pool import get_worker_pool
+            await asyncio.to_thread(get_worker_pool().shutdown)
+        close_database()
+
+app = FastAPI(title="BabelDOC API", version="1.0.0", lifespan=lifespan)
+
 logger.info("Using data directory: %s", DATA_DIR)
 
 app.add_middleware(
@@ -122,6 +195,8 @@ else:
         }
 
 if __name__ == "__main__":
+    # 打包后的可执行文件需要此调用才能正确启动翻译工作进程
+    multiprocessing.freeze_support()
     parser = argparse.ArgumentParser(description="Run the Easy-BabelDOC backend server.")
     parser.add_argument("--host", help="Host/IP to bind (default: EASY_BABELDOC_HOST or 0.0.0.0)")
     parser.add_argument(
@@ -1,4 +1,4 @@
-from pydantic import BaseModel
+from pydantic import BaseModel, Field
 from typing import List, Optional
 
 class TranslationRequest(BaseModel):
@@ -15,6 +15,12 @@ class TranslationRequest(BaseModel):
     no_mono: bool = False
     debug: bool = False
     glossary_ids: List[str] = []
+    # 按页拆分为多个分片并发翻译，完成后合并输出
+    sharded: bool = False
+
+class BundleRequest(BaseModel):
+    task_ids: List[str] = Field(min_length=1)
+    file_types: List[str] = ["mono", "dual"]
 
 class TranslatorConfig(BaseModel):
     api_key: str
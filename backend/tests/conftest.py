@@ -0,0 +1,78 @@
+"""测试公共配置
+
+应用配置在导入时读取环境变量，因此在导入任何后端模块之前把数据目录指向临时目录，并清除
+可能改变默认行为的 EASY_BABELDOC_* 变量（存储后端、配额等）。
+
+PostgreSQL 用例使用 EASY_BABELDOC_TEST_DATABASE_URL（未设置时取 EASY_BABELDOC_DATABASE_URL）
+指向的本地实例，两者都未设置时跳过。每个用例开始前会清空该库的 public schema，请勿指向正式数据库。
+
+运行: cd backend && python -m pytest -q tests
+"""
+import os
+import shutil
+import sys
+import tempfile
+from pathlib import Path
+
+import pytest
+
+BACKEND_DIR = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(BACKEND_DIR))
+
+TEST_DATABASE_URL = (
+    os.environ.get("EASY_BABELDOC_TEST_DATABASE_URL")
+    or os.environ.get("EASY_BABELDOC_DATABASE_URL", "")
+)
+for _name in [name for name in os.environ if name.startswith("EASY_BABELDOC_")]:
+    del os.environ[_name]
+TEST_DATA_DIR = Path(tempfile.mkdtemp(prefix="easy_babeldoc_test_"))
+os.environ["EASY_BABELDOC_DATA_DIR"] = str(TEST_DATA_DIR)
+
+
+def pytest_sessionfinish(session, exitstatus):
+    from utils.database import close_database
+
+    close_database()
+    shutil.rmtree(TEST_DATA_DIR, ignore_errors=True)
+
+
+def _reset_postgres(url: str):
+    import psycopg
+
+    with psycopg.connect(url, autocommit=True) as conn:
+        conn.execute("DROP SCHEMA public CASCADE")
+        conn.execute("CREATE SCHEMA public")
+
+
+@pytest.fixture(params=["sqlite", "postgres"])
+def database(request, tmp_path):
+    """新建的空数据库（已执行迁移），SQLite 与 PostgreSQL 各运行一次"""
+    if request.param == "sqlite":
+        from db import Database
+
+        db = Database(tmp_path / "test.db", pool_size=2)
+    else:
+        if not TEST_DATABASE_URL:
+            pytest.skip("未设置 EASY_BABELDOC_TEST_DATABASE_URL / EASY_BABELDOC_DATABASE_URL")
+        pytest.importorskip("psycopg")
+        from db import PostgresDatabase
+
+        _reset_postgres(TEST_DATABASE_URL)
+        db = PostgresDatabase(TEST_DATABASE_URL, pool_size=2)
+    yield db
+    db.close()
+
+
+@pytest.fixture
+def client():
+    """挂载全部 API 路由的测试客户端（不执行 main.py 的 lifespan，后台任务不启动）"""
+    from fastapi import FastAPI
+    from fastapi.testclient import TestClient
+
+    from api import register_routes
+
+    app = FastAPI()
+    register_routes(app)
+    with TestClient(app) as test_client:
+        yield test_client
+
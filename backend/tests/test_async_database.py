@@ -0,0 +1,76 @@
+"""数据库异步外观：查询并发执行，submit() 的写入按顺序执行且对之后的读取可见"""
+import asyncio
+import threading
+import time
+
+import pytest
+
+from db import AsyncDatabase, Database
+
+
+@pytest.fixture
+def async_db(tmp_path):
+    db = Database(tmp_path / "async.db", pool_size=4)
+    facade = AsyncDatabase(db, workers=3)
+    yield facade
+    facade.close()
+    db.close()
+
+
+def test_reads_run_concurrently(async_db):
+    # 单线程执行时两个查询互相等待，屏障超时
+    barrier = threading.Barrier(2, timeout=2)
+
+    async def scenario():
+        return await asyncio.gather(async_db.run(barrier.wait), async_db.run(barrier.wait))
+
+    assert sorted(asyncio.run(scenario())) == [0, 1]
+
+
+def test_reads_see_earlier_submitted_writes(async_db):
+    order = []
+
+    def slow_write(value):
+        time.sleep(0.05)
+        order.append(value)
+
+    async def scenario():
+        for value in range(5):
+            async_db.submit(slow_write, value)
+        return await async_db.run(lambda: list(order))
+
+    assert asyncio.run(scenario()) == [0, 1, 2, 3, 4]
+    assert async_db.stats()["failed"] == 0
+
+
+def test_cancelled_read_keeps_pending_write(async_db):
+    written = threading.Event()
+
+    def slow_write():
+        time.sleep(0.1)
+        written.set()
+
+    async def scenario():
+        async_db.submit(slow_write)
+        read = asyncio.ensure_future(async_db.run(lambda: None))
+        await asyncio.sleep(0.01)
+        read.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await read
+
+    asyncio.run(scenario())
+    assert written.wait(1)
+
+
+def test_failed_write_is_logged_and_does_not_block_reads(async_db):
+    def broken():
+        raise RuntimeError("boom")
+
+    async def scenario():
+        async_db.submit(broken)
+        await async_db.execute("CREATE TABLE IF NOT EXISTS t (x INTEGER)")
+        await async_db.execute("INSERT INTO t (x) VALUES (?)", (1,))
+        return await async_db.fetchone("SELECT COUNT(*) AS n FROM t")
+
+    assert asyncio.run(scenario())["n"] == 1
+    assert async_db.stats()["failed"] == 1
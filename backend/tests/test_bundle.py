@@ -0,0 +1,98 @@
+"""多任务结果ZIP流式打包"""
+import io
+import json
+import os
+import uuid
+import zipfile
+
+from config.settings import OUTPUTS_DIR
+from utils.bundle import stream_bundle
+from utils.history import get_db
+
+HEADERS = {"Authorization": "Bearer bundle-user"}
+
+
+def _completed_task(user_id="bundle-user", status="completed", kinds=("mono", "dual")):
+    task_id = str(uuid.uuid4())
+    output_dir = OUTPUTS_DIR / task_id
+    output_dir.mkdir(parents=True)
+    result = {}
+    for kind in kinds:
+        path = output_dir / f"out.{kind}.pdf"
+        path.write_bytes(os.urandom(2048))
+        result[f"{kind}_pdf_path"] = str(path)
+    get_db().upsert({
+        "task_id": task_id,
+        "user_id": user_id,
+        "status": status,
+        "filename": f"{task_id[:8]}.pdf",
+        "source_lang": "en",
+        "target_lang": "zh",
+        "model": "gpt-4o-mini",
+        "start_time": "2024-01-01T00:00:00",
+        "result": result,
+    })
+    return task_id
+
+
+def _read(path):
+    with open(path, "rb") as f:
+        return f.read()
+
+
+def test_bundle_contains_outputs_and_manifest(client):
+    first = _completed_task()
+    second = _completed_task(kinds=("mono",))
+    other_user = _completed_task(user_id="someone-else")
+    running = _completed_task(status="running")
+
+    response = client.post("/api/translations/bundle", headers=HEADERS,
+                           json={"task_ids": [first, second, other_user, running, "missing", first]})
+
+    assert response.status_code == 200
+    assert response.headers["content-type"] == "application/zip"
+    assert response.headers["content-disposition"].startswith('attachment; filename="translations_')
+    archive = zipfile.ZipFile(io.BytesIO(response.content))
+    assert archive.testzip() is None
+    assert archive.namelist() == [
+        f"{first}_mono.pdf", f"{first}_dual.pdf", f"{second}_mono.pdf", "manifest.json",
+    ]
+    # PDF 已经压缩过，按 STORED 原样写入
+    assert {info.compress_type for info in archive.infolist()} == {zipfile.ZIP_STORED}
+    assert archive.read(f"{first}_dual.pdf") == _read(OUTPUTS_DIR / first / "out.dual.pdf")
+
+    manifest = json.loads(archive.read("manifest.json"))
+    assert [task["task_id"] for task in manifest["tasks"]] == [first, second]
+    assert manifest["tasks"][0]["files"][0]["size"] == 2048
+    assert {(item["task_id"], item["reason"]) for item in manifest["skipped"]} == {
+        (other_user, "任务不存在"), (running, "翻译未完成"), ("missing", "任务不存在"),
+    }
+
+
+def test_bundle_file_type_filter_and_errors(client):
+    task_id = _completed_task()
+
+    response = client.post("/api/translations/bundle", headers=HEADERS,
+                           json={"task_ids": [task_id], "file_types": ["dual"]})
+    assert zipfile.ZipFile(io.BytesIO(response.content)).namelist() == [f"{task_id}_dual.pdf", "manifest.json"]
+
+    assert client.post("/api/translations/bundle", headers=HEADERS,
+                       json={"task_ids": [task_id], "file_types": ["pdf"]}).status_code == 400
+    assert client.post("/api/translations/bundle", headers=HEADERS,
+                       json={"task_ids": ["missing"]}).status_code == 404
+    assert client.post("/api/translations/bundle", json={"task_ids": [task_id]}).status_code == 401
+
+
+def test_stream_bundle_yields_bounded_chunks(tmp_path):
+    path = tmp_path / "big.pdf"
+    content = os.urandom(1024 * 1024)
+    path.write_bytes(content)
+    tasks = [{"task_id": "t1", "files": [{"kind": "mono", "path": str(path), "checksum": None}]}]
+
+    chunks = list(stream_bundle(tasks, [], 64 * 1024))
+
+    # 每块最多为一个读取块加上ZIP头部
+    assert len(chunks) > 16
+    assert max(len(chunk) for chunk in chunks) <= 64 * 1024 + 1024
+    archive = zipfile.ZipFile(io.BytesIO(b"".join(chunks)))
+    assert archive.read("t1_mono.pdf") == content
@@ -0,0 +1,287 @@
+"""数据模型在 SQLite 与 PostgreSQL 上的行为一致性"""
+from db import (
+    MaintenanceState, OrphanFile, ResultCache, TaskArtifact, TranslationHistory, TranslationJob,
+    TranslationMemory, UploadStore, User,
+)
+from db.models import _utc_cutoff
+
+
+def _task(task_id, user_id="u1", **fields):
+    task = {
+        "task_id": task_id,
+        "user_id": user_id,
+        "status": "completed",
+        "filename": f"{task_id}.pdf",
+        "source_lang": "en",
+        "target_lang": "zh",
+        "model": "gpt-4o-mini",
+        "start_time": "2024-01-01T00:00:00",
+    }
+    task.update(fields)
+    return task
+
+
+def test_history_upsert_updates_only_given_columns(database):
+    history = TranslationHistory(database)
+    assert history.upsert(_task("t1", status="running", config={"lang_in": "en"}, stage="翻译中"))
+    # 记录已存在时只更新传入的列，stage 与 config 保持不变
+    assert history.upsert(_task("t1", progress=100, result={"mono_pdf_path": "/out/t1.mono.pdf"}))
+
+    task = history.get_by_id("t1")
+    assert task["status"] == "completed"
+    assert task["progress"] == 100
+    assert task["stage"] == "翻译中"
+    assert task["filename"] == "t1.pdf"
+    assert task["config"] == {"lang_in": "en"}
+    assert task["result"] == {"mono_pdf_path": "/out/t1.mono.pdf"}
+
+
+def test_history_bulk_upsert_skips_invalid_rows(database):
+    history = TranslationHistory(database)
+    history.upsert(_task("t1", progress=10))
+
+    written = history.bulk_upsert([
+        _task("t1", progress=50),
+        _task("t2"),
+        {"task_id": "bad", "status": "completed"},  # 缺少必填列
+        {"status": "completed"},                    # 缺少 task_id
+    ])
+
+    assert written == 2
+    assert history.get_by_id("t1")["progress"] == 50
+    assert history.get_by_id("t2") is not None
+    assert history.get_by_id("bad") is None
+
+
+def test_history_list_page_filters_and_keyset(database):
+    history = TranslationHistory(database)
+    history.bulk_upsert([
+        _task(f"t{i}", start_time=f"2024-01-0{i}T00:00:00", status="error" if i == 3 else "completed")
+        for i in range(1, 6)
+    ])
+    history.upsert(_task("other", user_id="u2"))
+    history.upsert(_task("pct", filename="50%_off.pdf", start_time="2023-01-01T00:00:00"))
+
+    first = history.list_page("u1", limit=2)
+    assert [t["task_id"] for t in first] == ["t5", "t4"]
+    after = (first[-1]["start_time"], first[-1]["task_id"])
+    assert [t["task_id"] for t in history.list_page("u1", limit=2, after=after)] == ["t3", "t2"]
+
+    assert [t["task_id"] for t in history.list_page("u1", {"status": ["error"]})] == ["t3"]
+    window = {"start_from": "2024-01-02T00:00:00", "start_to": "2024-01-03T00:00:00"}
+    assert [t["task_id"] for t in history.list_page("u1", window)] == ["t3", "t2"]
+    # LIKE 通配符按字面匹配，% 在 PostgreSQL 占位符转换时也不能被误处理
+    assert [t["task_id"] for t in history.list_page("u1", {"filename_prefix": "50%_"})] == ["pct"]
+    assert history.list_page("u1", {"filename_prefix": "5_"}) == []
+
+
+def test_history_archive_keeps_task_reachable(database):
+    history = TranslationHistory(database)
+    history.bulk_upsert([
+        _task("old", start_time="2000-01-01T00:00:00"),
+        _task("new", start_time="2999-01-01T00:00:00"),
+        _task("running", start_time="2000-01-01T00:00:00", status="running"),
+    ])
+
+    assert history.list_archivable(30, 0, limit=None) == ["old"]
+    assert history.list_archivable(0, 0, limit=None) == []
+    assert history.archive_many(["old"]) == 1
+
+    assert history.get_by_id("old") is None
+    assert history.get_archived("old")["filename"] == "old.pdf"
+    assert set(history.get_many(["old", "new", "missing"])) == {"old", "new"}
+    assert history.count_rows() == {"hot": 2, "archived": 1}
+    assert [t["task_id"] for t in history.list_page("u1")] == ["new", "running"]
+
+
+def test_insert_returns_new_id(database):
+    user_id = User(database).create("alice", "secret")
+    first = database.insert(
+        "INSERT INTO models (user_id, base_url, api_key, model, is_default) VALUES (?, ?, ?, ?, ?)",
+        (user_id, "https://api.example.com", "k1", "m1", 1),
+    )
+    second = database.insert(
+        "INSERT INTO models (user_id, base_url, api_key, model, is_default) VALUES (?, ?, ?, ?, ?)",
+        (user_id, "https://api.example.com", "k2", "m2", 0),
+    )
+
+    assert second > first
+    assert database.fetchone("SELECT model FROM models WHERE id = ?", (second,))["model"] == "m2"
+
+
+def test_upload_store_refcounts(database):
+    store = UploadStore(database)
+    assert store.add("f1", "abc", 100, "blobs/ab/abc.pdf", filename="a.pdf", user_id="u1") is False
+    assert store.add("f2", "abc", 100, "blobs/ab/abc.pdf", filename="b.pdf", user_id="u2") is True
+
+    assert store.get("f2")["ref_count"] == 2
+    assert store.usage("u1") == 100
+    assert store.blob_size() == 100
+
+    # 仍有其他别名引用时只删除别名
+    assert store.remove("f1") is None
+    assert store.get("f1") is None
+    assert store.get_blob("abc")["ref_count"] == 1
+
+    orphan = store.remove("f2")
+    assert orphan["path"] == "blobs/ab/abc.pdf"
+    assert store.get_blob("abc") is None
+    assert store.remove("f2") is None
+
+
+def test_task_artifacts(database):
+    history = TranslationHistory(database)
+    artifacts = TaskArtifact(database)
+    history.bulk_upsert([_task("t1"), _task("t2"), _task("busy", status="running")])
+    artifacts.put_many([
+        {"task_id": "t1", "user_id": "u1", "kind": "mono", "path": "/o/t1.mono.pdf", "size": 10, "checksum": "a"},
+        {"task_id": "t1", "user_id": "u1", "kind": "dual", "path": "/o/t1.dual.pdf", "size": 20, "checksum": "b"},
+        {"task_id": "t2", "user_id": "u1", "kind": "mono", "path": "/o/t2.mono.pdf", "size": 30, "checksum": "c"},
+        {"task_id": "busy", "user_id": "u1", "kind": "mono", "path": "/o/busy.pdf", "size": 40, "checksum": "d"},
+    ])
+    # 同一任务同一类型再次登记时覆盖
+    artifacts.put_many([
+        {"task_id": "t2", "user_id": "u1", "kind": "mono", "path": "/o/t2.mono.pdf", "size": 35, "checksum": "e"},
+    ])
+
+    assert artifacts.get("t2", "mono")["size"] == 35
+    assert sorted(a["kind"] for a in artifacts.get_for_tasks(["t1", "t2"])["t1"]) == ["dual", "mono"]
+    assert artifacts.recorded_paths(["/o/t1.mono.pdf", "/o/nope.pdf"]) == {"/o/t1.mono.pdf"}
+    assert artifacts.totals() == {"files": 4, "missing": 0, "size": 105}
+
+    dual = artifacts.get("t1", "dual")
+    artifacts.update_state([{"id": dual["id"], "missing": True, "size": 20, "checksum": "b"}])
+    assert artifacts.list_missing("u1") == [{"task_id": "t1", "filename": "t1.pdf", "kind": "dual"}]
+    completed = {row["status"]: row for row in artifacts.file_stats("u1")}["completed"]
+    assert (completed["count"], completed["files"], completed["size"]) == (2, 2, 45)
+
+    # 运行中任务的输出文件不参与淘汰
+    lru = artifacts.list_lru("u1", 10)
+    assert {a["task_id"] for a in lru} == {"t1", "t2"}
+    artifacts.touch_many([("t1", "mono")])
+    mono = artifacts.get("t1", "mono")
+    assert artifacts.mark_evicted([mono["id"]], ["t1"], "已清理") == 1
+    assert artifacts.get("t1", "mono")["evicted_at"] is not None
+    assert history.get_by_id("t1")["message"] == "已清理"
+    # 按配额清理的文件不算丢失
+    assert artifacts.list_missing("u1") == [{"task_id": "t1", "filename": "t1.pdf", "kind": "dual"}]
+    assert artifacts.usage("u1") == {"size": 75, "evicted": 1}
+
+
+def test_translation_jobs(database):
+    jobs = TranslationJob(database)
+    assert jobs.save("j1", "u1", {"file_id": "f1"}, "model:1")
+    assert jobs.save("j2", "u1", {"file_id": "f2"}, None, priority=5)
+    jobs.increment_attempts("j1")
+    # 再次保存时保留恢复次数
+    assert jobs.save("j1", "u1", {"file_id": "f1", "pages": "1-2"}, "model:1", status="running")
+
+    pending = jobs.get_pending()
+    assert [job["task_id"] for job in pending] == ["j2", "j1"]
+    j1 = pending[1]
+    assert j1["attempts"] == 1
+    assert j1["status"] == "running"
+    assert j1["request"] == {"file_id": "f1", "pages": "1-2"}
+
+    jobs.set_status("j1", "queued")
+    jobs.delete("j2")
+    assert [(job["task_id"], job["status"]) for job in jobs.get_pending()] == [("j1", "queued")]
+
+
+def test_translation_memory_hits_are_batched(database):
+    memory = TranslationMemory(database)
+    memory.put({"memory_key": "k", "lang_in": "en", "lang_out": "zh", "model": "m",
+                "glossary_hash": "", "source_text": "hello", "translation": "你好", "size": 11})
+
+    assert memory.get("k") == "你好"
+    assert memory.get("missing") is None
+    assert memory.totals()["hits"] == 0
+    assert memory.record_hits({"k": 3, "missing": 1}) == 2
+    assert memory.totals() == {"entries": 1, "size": 11, "hits": 3}
+
+
+def test_translation_job_resave_keeps_queue_position(database):
+    jobs = TranslationJob(database)
+    jobs.save("j1", "u1", {"file_id": "f1"}, None)
+    database.execute("UPDATE translation_jobs SET created_at = ? WHERE task_id = ?", ("2000-01-01 00:00:00", "j1"))
+
+    jobs.save("j1", "u2", {"file_id": "f9"}, "model:2", priority=3, status="running")
+
+    row = database.fetchone("SELECT * FROM translation_jobs WHERE task_id = ?", ("j1",))
+    assert row["created_at"] == "2000-01-01 00:00:00"
+    assert (row["user_id"], row["priority"], row["status"], row["credential_ref"]) == ("u2", 3, "running", "model:2")
+    assert database.fetchone("SELECT COUNT(*) AS n FROM translation_jobs")["n"] == 1
+
+
+def test_history_rearchive_and_purge_cutoff(database):
+    history = TranslationHistory(database)
+    history.upsert(_task("t1", filename="old.pdf"))
+    history.archive_many(["t1"])
+    # 同一任务再次归档时覆盖旧的归档记录
+    history.upsert(_task("t1", filename="new.pdf"))
+    assert history.archive_many(["t1"]) == 1
+    assert history.get_archived("t1")["filename"] == "new.pdf"
+    assert history.count_rows() == {"hot": 0, "archived": 1}
+
+    history.upsert(_task("t2"))
+    history.archive_many(["t2"])
+    database.execute("UPDATE translation_history_archive SET archived_at = ? WHERE task_id = ?",
+                     (_utc_cutoff(31), "t1"))
+
+    # 截止时间与 CURRENT_TIMESTAMP 同为 UTC，刚归档的记录不会被删除
+    assert history.purge_archive(30) == 1
+    assert history.get_archived("t1") is None
+    assert history.get_archived("t2") is not None
+    assert history.purge_archive(1) == 0
+
+
+def test_result_cache_overwrite_and_expiry(database):
+    cache = ResultCache(database)
+    entry = {"cache_key": "k1", "input_sha256": "s", "config_hash": "c", "glossary_hash": "",
+             "mono_path": "/o/a.pdf", "size": 10, "source_task_id": "t1"}
+    assert cache.put(entry)
+    cache.touch("k1")
+    assert cache.get("k1")["hits"] == 1
+
+    # 覆盖写入时重置命中次数
+    assert cache.put(dict(entry, mono_path="/o/b.pdf", size=20))
+    assert (cache.get("k1")["mono_path"], cache.get("k1")["hits"]) == ("/o/b.pdf", 0)
+    assert cache.totals() == {"entries": 1, "size": 20, "hits": 0}
+
+    cache.put(dict(entry, cache_key="k2"))
+    database.execute("UPDATE result_cache SET last_used_at = ? WHERE cache_key = ?", (_utc_cutoff(8), "k1"))
+    assert [row["cache_key"] for row in cache.list_expired(7)] == ["k1"]
+    assert cache.list_expired(9) == []
+    assert [row["cache_key"] for row in cache.list_lru()] == ["k1", "k2"]
+
+
+def test_translation_memory_put_overwrites(database):
+    memory = TranslationMemory(database)
+    entry = {"memory_key": "k", "lang_in": "en", "lang_out": "zh", "model": "m",
+             "glossary_hash": "", "source_text": "hello", "translation": "你好", "size": 11}
+    memory.put(entry)
+    memory.record_hits({"k": 2})
+
+    assert memory.put(dict(entry, translation="您好", size=12))
+    assert memory.get("k") == "您好"
+    assert memory.totals() == {"entries": 1, "size": 12, "hits": 0}
+
+
+def test_orphan_files_and_checkpoints(database):
+    orphans = OrphanFile(database)
+    orphans.put_many("n1", 1, [{"path": "/o/a.pdf", "size": 1, "mtime": 1.0},
+                               {"path": "/o/b.pdf", "size": 2, "mtime": 1.0}])
+    # 再次发现时更新大小与所属轮次
+    orphans.put_many("n1", 2, [{"path": "/o/a.pdf", "size": 5, "mtime": 2.0}])
+    orphans.put_many("n2", 2, [{"path": "/o/a.pdf", "size": 7, "mtime": 2.0}])
+
+    assert orphans.delete_stale("n1", 2) == 1
+    assert [(row["path"], row["size"]) for row in orphans.list("n1", 10)] == [("/o/a.pdf", 5)]
+    assert orphans.totals("n2") == {"files": 1, "size": 7}
+
+    state = MaintenanceState(database)
+    assert state.put("scan", {"position": 1})
+    assert state.put("scan", {"position": 2})
+    assert state.get("scan") == {"position": 2}
+    assert state.delete("scan")
+    assert state.get("scan") is None
@@ -0,0 +1,126 @@
+"""结果下载：ETag/304、Range/If-Range 与 416"""
+import os
+import uuid
+
+import pytest
+
+from config.settings import OUTPUTS_DIR
+from utils.downloads import parse_range
+from utils.history import get_db
+
+HEADERS = {"Authorization": "Bearer u1"}
+
+
+@pytest.fixture
+def completed_task():
+    """一个已完成、单语输出为 1000 字节随机内容的任务"""
+    task_id = str(uuid.uuid4())
+    output_dir = OUTPUTS_DIR / task_id
+    output_dir.mkdir(parents=True)
+    content = os.urandom(1000)
+    (output_dir / "out.mono.pdf").write_bytes(content)
+    get_db().upsert({
+        "task_id": task_id,
+        "user_id": "u1",
+        "status": "completed",
+        "filename": "doc.pdf",
+        "source_lang": "en",
+        "target_lang": "zh",
+        "model": "gpt-4o-mini",
+        "start_time": "2024-01-01T00:00:00",
+        "result": {"mono_pdf_path": str(output_dir / "out.mono.pdf")},
+    })
+    return task_id, content
+
+
+def _url(task_id, kind="mono"):
+    return f"/api/translation/{task_id}/download/{kind}"
+
+
+def test_full_download_sets_validators(client, completed_task):
+    task_id, content = completed_task
+    response = client.get(_url(task_id), headers=HEADERS)
+
+    assert response.status_code == 200
+    assert response.content == content
+    assert response.headers["etag"].startswith('"')
+    assert response.headers["accept-ranges"] == "bytes"
+    assert response.headers["content-length"] == "1000"
+    assert f'filename="{task_id}_mono.pdf"' in response.headers["content-disposition"]
+
+
+def test_if_none_match_returns_304(client, completed_task):
+    task_id, _ = completed_task
+    etag = client.get(_url(task_id)).headers["etag"]
+
+    for header in (etag, f"W/{etag}", f'"other", {etag}', "*"):
+        response = client.get(_url(task_id), headers={"If-None-Match": header})
+        assert response.status_code == 304
+        assert response.content == b""
+        assert response.headers["etag"] == etag
+
+    assert client.get(_url(task_id), headers={"If-None-Match": '"other"'}).status_code == 200
+
+
+def test_range_requests(client, completed_task):
+    task_id, content = completed_task
+
+    response = client.get(_url(task_id), headers={"Range": "bytes=100-199"})
+    assert response.status_code == 206
+    assert response.headers["content-range"] == "bytes 100-199/1000"
+    assert response.content == content[100:200]
+
+    response = client.get(_url(task_id), headers={"Range": "bytes=-10"})
+    assert response.status_code == 206
+    assert response.content == content[-10:]
+
+    response = client.get(_url(task_id), headers={"Range": "bytes=990-"})
+    assert response.content == content[990:]
+
+    response = client.get(_url(task_id), headers={"Range": "bytes=1000-"})
+    assert response.status_code == 416
+    assert response.headers["content-range"] == "bytes */1000"
+
+
+def test_if_range_only_resumes_matching_version(client, completed_task):
+    task_id, content = completed_task
+    first = client.get(_url(task_id))
+
+    response = client.get(_url(task_id), headers={"Range": "bytes=0-9", "If-Range": first.headers["etag"]})
+    assert response.status_code == 206
+    assert response.content == content[:10]
+
+    response = client.get(_url(task_id), headers={"Range": "bytes=0-9", "If-Range": first.headers["last-modified"]})
+    assert response.status_code == 206
+
+    # 文件已变化：忽略 Range，返回完整的新内容
+    response = client.get(_url(task_id), headers={"Range": "bytes=0-9", "If-Range": '"stale"'})
+    assert response.status_code == 200
+    assert response.content == content
+
+
+def test_head_and_errors(client, completed_task):
+    task_id, _ = completed_task
+
+    response = client.head(_url(task_id))
+    assert response.status_code == 200
+    assert response.headers["content-length"] == "1000"
+    assert response.content == b""
+
+    assert client.get(_url(task_id, "dual")).status_code == 404
+    assert client.get(_url(task_id, "other")).status_code == 400
+    assert client.get(_url("missing-task")).status_code == 404
+
+
+def test_parse_range():
+    assert parse_range("bytes=0-0", 10) == (0, 1)
+    assert parse_range("bytes=5-100", 10) == (5, 10)
+    assert parse_range("bytes=-3", 10) == (7, 10)
+    # 多段或格式错误时按完整文件响应
+    assert parse_range("bytes=0-1,4-5", 10) is None
+    assert parse_range("items=0-1", 10) is None
+    assert parse_range("bytes=a-b", 10) is None
+    with pytest.raises(ValueError):
+        parse_range("bytes=10-", 10)
+    with pytest.raises(ValueError):
+        parse_range("bytes=-0", 10)
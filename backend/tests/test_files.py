@@ -0,0 +1,72 @@
+"""文件清理接口：只处理当前用户的孤儿记录，孤儿文件由后台任务或命令行工具删除"""
+import os
+import time
+import uuid
+
+from config.settings import OUTPUTS_DIR
+from utils import orphans
+from utils.artifacts import get_artifact_model
+from utils.history import get_db
+
+
+def _task_with_missing_output(user_id):
+    task_id = str(uuid.uuid4())
+    get_db().upsert({
+        "task_id": task_id,
+        "user_id": user_id,
+        "status": "completed",
+        "filename": "doc.pdf",
+        "source_lang": "en",
+        "target_lang": "zh",
+        "model": "gpt-4o-mini",
+        "start_time": "2024-01-01T00:00:00",
+    })
+    model = get_artifact_model()
+    model.put_many([{"task_id": task_id, "user_id": user_id, "kind": "mono",
+                     "path": str(OUTPUTS_DIR / task_id / "gone.pdf"), "size": 10, "checksum": "x"}])
+    artifact = model.get(task_id, "mono")
+    model.update_state([{"id": artifact["id"], "missing": True, "size": 10, "checksum": "x"}])
+    return task_id
+
+
+def _orphan_file():
+    path = OUTPUTS_DIR / str(uuid.uuid4()) / "stray.pdf"
+    path.parent.mkdir(parents=True)
+    path.write_bytes(b"%PDF-1.4 stray")
+    old = time.time() - 30 * 86400
+    os.utime(path, (old, old))
+    orphan_model, _ = orphans._get_models()
+    orphan_model.put_many(orphans.NODE, 1, [{"path": str(path), "size": path.stat().st_size, "mtime": old}])
+    return path
+
+
+def test_cleanup_only_touches_callers_records(client):
+    mine = _task_with_missing_output("cleanup-user")
+    theirs = _task_with_missing_output("cleanup-other")
+    stray = _orphan_file()
+    headers = {"Authorization": "Bearer cleanup-user"}
+
+    result = client.post("/api/files/cleanup", headers=headers, json={}).json()
+    assert result["orphan_files"] == []
+    assert [record["task_id"] for record in result["orphan_records"]] == [mine]
+
+    result = client.post("/api/files/cleanup", headers=headers,
+                         json={"delete_orphan_files": True, "delete_orphan_records": True}).json()
+    assert result["deleted_records"] == 1
+    assert result["deleted_files"] == 0
+    assert stray.exists()
+    assert get_db().get_by_id(mine) is None
+    assert get_db().get_by_id(theirs) is not None
+
+    assert client.post("/api/files/cleanup", json={}).status_code == 401
+    assert client.get("/api/files/cleanup/status", headers=headers).status_code == 404
+
+
+def test_delete_orphans_removes_unregistered_files():
+    stray = _orphan_file()
+
+    result = orphans.delete_orphans(1000)
+
+    assert result["deleted_files"] >= 1
+    assert not stray.exists()
+    assert str(stray) not in {row["path"] for row in orphans.list_orphans(1000)["items"]}
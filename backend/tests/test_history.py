@@ -0,0 +1,34 @@
+"""历史记录的异步读写封装"""
+import asyncio
+import uuid
+
+from utils.history import get_db, load_history
+
+
+def _task(user_id, **fields):
+    task = {
+        "task_id": str(uuid.uuid4()),
+        "user_id": user_id,
+        "status": "completed",
+        "filename": "doc.pdf",
+        "source_lang": "en",
+        "target_lang": "zh",
+        "model": "gpt-4o-mini",
+        "start_time": "2024-01-01T00:00:00",
+    }
+    task.update(fields)
+    return task
+
+
+def test_load_history_filters_by_user():
+    mine = _task("history-user", config={"lang_in": "en", "api_key": "sk-secret"})
+    get_db().bulk_upsert([mine, _task("history-user"), _task("history-other")])
+
+    history = asyncio.run(load_history("history-user"))
+
+    assert len(history) == 2
+    assert {task["user_id"] for task in history} == {"history-user"}
+    # 返回前移除敏感配置
+    loaded = next(task for task in history if task["task_id"] == mine["task_id"])
+    assert loaded["config"] == {"lang_in": "en"}
+    assert {task["user_id"] for task in asyncio.run(load_history())} >= {"history-user", "history-other"}
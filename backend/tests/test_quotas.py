@@ -0,0 +1,65 @@
+"""按用户存储配额的LRU淘汰"""
+import os
+import uuid
+
+import config.settings
+from config.settings import DATA_DIR, OUTPUTS_DIR
+from utils import quotas
+from utils.artifacts import get_artifact_model
+from utils.history import get_db
+
+
+def _completed_task(user_id, size, cache_dir=None):
+    """一个已完成并登记了单语输出的任务；给出 cache_dir 时输出文件与结果缓存共享硬链接"""
+    task_id = str(uuid.uuid4())
+    path = OUTPUTS_DIR / task_id / "out.mono.pdf"
+    path.parent.mkdir(parents=True)
+    if cache_dir is not None:
+        cached = cache_dir / f"{task_id}.pdf"
+        cached.write_bytes(os.urandom(size))
+        os.link(cached, path)
+    else:
+        path.write_bytes(os.urandom(size))
+    get_db().upsert({
+        "task_id": task_id,
+        "user_id": user_id,
+        "status": "completed",
+        "filename": "doc.pdf",
+        "source_lang": "en",
+        "target_lang": "zh",
+        "model": "gpt-4o-mini",
+        "start_time": "2024-01-01T00:00:00",
+        "result": {"mono_pdf_path": str(path)},
+    })
+    get_artifact_model().put_many([
+        {"task_id": task_id, "user_id": user_id, "kind": "mono", "path": str(path), "size": size, "checksum": task_id},
+    ])
+    return task_id
+
+
+def test_evicting_cache_hit_outputs_stops_at_target(monkeypatch):
+    user_id = f"quota-{uuid.uuid4().hex[:8]}"
+    cache_dir = DATA_DIR / "test_result_cache"
+    cache_dir.mkdir(exist_ok=True)
+    tasks = [_completed_task(user_id, 1000, cache_dir) for _ in range(3)]
+    monkeypatch.setattr(config.settings, "STORAGE_QUOTA", 2500)
+    monkeypatch.setattr(config.settings, "STORAGE_EVICT_TARGET_PERCENT", 80)
+
+    result = quotas.enforce(user_id)
+
+    # 用量 3000 超过配额 2500，降到 2000 只需删除一个输出文件
+    assert result == {"outputs": 1, "uploads": 0, "freed": 1000}
+    assert quotas.user_usage(user_id)["total"] == 2000
+    evicted = [task_id for task_id in tasks if get_artifact_model().get(task_id, "mono")["evicted_at"]]
+    assert len(evicted) == 1
+    # 结果缓存中的硬链接不受影响
+    assert (cache_dir / f"{evicted[0]}.pdf").exists()
+    assert quotas.enforce(user_id)["outputs"] == 0
+
+
+def test_quota_disabled_evicts_nothing():
+    user_id = f"quota-{uuid.uuid4().hex[:8]}"
+    _completed_task(user_id, 4096)
+
+    assert quotas.enforce(user_id) == {"outputs": 0, "uploads": 0, "freed": 0}
+    assert quotas.user_usage(user_id)["outputs"] == 4096
@@ -0,0 +1,145 @@
+"""翻译任务调度：并发上限、单用户上限、优先级与队列上限"""
+import asyncio
+import io
+
+import pytest
+
+import config.settings
+from db import User
+from utils import scheduler as scheduler_module
+from utils.database import get_database
+from utils.scheduler import QueueFullError, TranslationScheduler, user_priority
+
+
+def _blocking_runner(release: asyncio.Event):
+    return lambda: release.wait()
+
+
+async def _shutdown(scheduler):
+    for task in scheduler.shutdown():
+        await asyncio.gather(task, return_exceptions=True)
+
+
+def test_per_user_cap_lets_other_users_start():
+    async def scenario():
+        release = {name: asyncio.Event() for name in ("a1", "a2", "b1")}
+        scheduler = TranslationScheduler(max_concurrent=3, max_per_user=1, max_queued=10)
+
+        assert scheduler.submit("a1", "alice", _blocking_runner(release["a1"])) == 0
+        assert scheduler.submit("a2", "alice", _blocking_runner(release["a2"])) == 1
+        # alice 已达到单用户上限，排在她后面的 bob 不受影响
+        assert scheduler.submit("b1", "bob", _blocking_runner(release["b1"])) == 0
+        assert scheduler.is_running("b1") and not scheduler.is_running("a2")
+
+        release["a1"].set()
+        await asyncio.sleep(0.01)
+        assert scheduler.is_running("a2")
+        assert scheduler.snapshot()["queued_count"] == 0
+
+        await _shutdown(scheduler)
+
+    asyncio.run(scenario())
+
+
+def test_priority_and_queue_positions():
+    async def scenario():
+        release = asyncio.Event()
+        states = {task_id: {"status": "queued"} for task_id in ("low", "high")}
+        scheduler = TranslationScheduler(max_concurrent=1, max_per_user=1, max_queued=10, task_states=states)
+
+        scheduler.submit("running", "u1", _blocking_runner(release))
+        scheduler.submit("low", "u2", _blocking_runner(release))
+        assert scheduler.submit("high", "u3", _blocking_runner(release), priority=5) == 1
+
+        assert scheduler.position("low") == 2
+        assert states["low"]["queue_position"] == 2
+        assert scheduler.snapshot(user_id="u2")["queued"][0]["task_id"] == "low"
+
+        assert scheduler.cancel("high")
+        assert scheduler.position("low") == 1
+        assert states["low"]["queue_position"] == 1
+
+        await _shutdown(scheduler)
+
+    asyncio.run(scenario())
+
+
+def test_full_queue_rejects():
+    async def scenario():
+        release = asyncio.Event()
+        scheduler = TranslationScheduler(max_concurrent=1, max_per_user=1, max_queued=1)
+
+        scheduler.submit("t1", "u1", _blocking_runner(release))
+        scheduler.submit("t2", "u2", _blocking_runner(release))
+        with pytest.raises(QueueFullError):
+            scheduler.submit("t3", "u3", _blocking_runner(release))
+        assert scheduler.snapshot()["stats"] == {"submitted": 2, "started": 1, "rejected": 1}
+
+        await _shutdown(scheduler)
+
+    asyncio.run(scenario())
+
+
+def test_translate_returns_429_when_queue_is_full(client, monkeypatch):
+    # 提交接口会先检查 BabelDOC 是否可用
+    pytest.importorskip("babeldoc.format.pdf.high_level")
+    from api.translation import active_translations
+
+    scheduler = TranslationScheduler(max_concurrent=1, max_per_user=1, max_queued=0,
+                                     task_states=active_translations)
+    monkeypatch.setattr(scheduler_module, "_scheduler", scheduler)
+
+    async def occupy():
+        scheduler.submit("busy", "other-user", lambda: asyncio.sleep(60))
+
+    client.portal.call(occupy)
+    try:
+        upload = client.post("/api/upload", headers={"Authorization": "Bearer u429"},
+                             files={"file": ("a.pdf", io.BytesIO(b"%PDF-1.4 429"), "application/pdf")})
+        response = client.post("/api/translate", headers={"Authorization": "Bearer u429"}, json={
+            "file_id": upload.json()["file_id"], "lang_in": "en", "lang_out": "zh", "api_key": "sk-test",
+        })
+
+        assert response.status_code == 429
+        assert scheduler.snapshot()["stats"]["rejected"] == 1
+        assert not any(state.get("user_id") == "u429" for state in active_translations.values())
+    finally:
+        client.portal.call(_shutdown, scheduler)
+
+
+def test_priority_is_decided_by_server(monkeypatch):
+    guest_id = User(get_database()).create("priority-guest", "secret", is_guest=True)
+    member_id = User(get_database()).create("priority-member", "secret")
+
+    assert user_priority(guest_id) == 0
+    monkeypatch.setattr(config.settings, "GUEST_JOB_PRIORITY", -5)
+    assert user_priority(guest_id) == -5
+    assert user_priority(member_id) == 0
+    assert user_priority("unknown-user") == 0
+
+
+def test_translate_ignores_client_priority(client, monkeypatch):
+    pytest.importorskip("babeldoc.format.pdf.high_level")
+    from api.translation import active_translations
+
+    scheduler = TranslationScheduler(max_concurrent=1, max_per_user=1, max_queued=10,
+                                     task_states=active_translations)
+    monkeypatch.setattr(scheduler_module, "_scheduler", scheduler)
+
+    async def occupy():
+        scheduler.submit("busy", "other-user", lambda: asyncio.sleep(60))
+
+    client.portal.call(occupy)
+    try:
+        upload = client.post("/api/upload", headers={"Authorization": "Bearer greedy"},
+                             files={"file": ("a.pdf", io.BytesIO(b"%PDF-1.4 greedy"), "application/pdf")})
+        response = client.post("/api/translate", headers={"Authorization": "Bearer greedy"}, json={
+            "file_id": upload.json()["file_id"], "lang_in": "en", "lang_out": "zh", "api_key": "sk-test",
+            "priority": 10,
+        })
+
+        assert response.status_code == 200
+        queued = scheduler.snapshot()["queued"]
+        assert [(job["task_id"], job["priority"]) for job in queued] == [(response.json()["task_id"], 0)]
+    finally:
+        client.portal.call(_shutdown, scheduler)
@@ -0,0 +1,192 @@
+"""S3 存储后端：对象读写、预签名下载与核对任务（使用 moto 模拟的 S3 服务）"""
+import os
+import socket
+import urllib.request
+import uuid
+
+import pytest
+
+pytest.importorskip("boto3")
+moto_server = pytest.importorskip("moto.server")
+
+import config.settings
+from config.settings import DATA_DIR, OUTPUTS_DIR
+from utils import downloads
+from utils import storage as storage_module
+from utils.artifacts import get_artifact_model, reconcile, record_artifacts
+from utils.history import get_db
+from utils.storage import S3Storage
+
+BUCKET = "easy-babeldoc-test"
+HEADERS = {"Authorization": "Bearer s3-user"}
+
+
+def _free_port():
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+@pytest.fixture(scope="module")
+def s3_endpoint():
+    """模块内共用一个 moto 服务和存储桶，凭据为占位值"""
+    with pytest.MonkeyPatch.context() as mp:
+        mp.setenv("AWS_ACCESS_KEY_ID", "testing")
+        mp.setenv("AWS_SECRET_ACCESS_KEY", "testing")
+        mp.delenv("AWS_PROFILE", raising=False)
+        port = _free_port()
+        server = moto_server.ThreadedMotoServer(ip_address="127.0.0.1", port=port, verbose=False)
+        server.start()
+        endpoint = f"http://127.0.0.1:{port}"
+        try:
+            import boto3
+
+            boto3.client("s3", endpoint_url=endpoint, region_name="us-east-1").create_bucket(Bucket=BUCKET)
+            yield endpoint
+        finally:
+            server.stop()
+
+
+def _storage(root, endpoint):
+    # 每个用例使用独立的键前缀，互不影响
+    return S3Storage(root, BUCKET, prefix=uuid.uuid4().hex, endpoint_url=endpoint, region="us-east-1",
+                     part_size=5 * 1024 * 1024)
+
+
+def test_save_fetch_exists_delete(tmp_path, s3_endpoint):
+    storage = _storage(tmp_path, s3_endpoint)
+    source = tmp_path / "source.pdf"
+    content = os.urandom(6 * 1024 * 1024)  # 超过分段大小，走分段上传
+    source.write_bytes(content)
+
+    storage.save("uploads/a.pdf", source)
+    assert storage.local_path("uploads/a.pdf").read_bytes() == content
+    assert storage.list_keys("uploads") == ["uploads/a.pdf"]
+
+    # 本地缓存被清理后从对象存储取回
+    storage.local_path("uploads/a.pdf").unlink()
+    assert storage.exists("uploads/a.pdf")
+    assert storage.size("uploads/a.pdf") == len(content)
+    assert storage.fetch("uploads/a.pdf").read_bytes() == content
+    assert storage.stats()["fetched"] == 1
+
+    storage.delete("uploads/a.pdf")
+    assert not storage.local_path("uploads/a.pdf").exists()
+    assert not storage.exists("uploads/a.pdf")
+    assert storage.size("uploads/a.pdf") is None
+    assert storage.fetch("uploads/a.pdf") is None
+    assert storage.list_keys("uploads") == []
+
+
+def test_open_and_iter_range_read_object(tmp_path, s3_endpoint):
+    storage = _storage(tmp_path, s3_endpoint)
+    source = tmp_path / "outputs" / "t1" / "out.pdf"
+    source.parent.mkdir(parents=True)
+    content = os.urandom(100_000)
+    source.write_bytes(content)
+    key = storage.key_for(source)
+    assert key == "outputs/t1/out.pdf"
+    assert storage.key_for(tmp_path.parent / "elsewhere.pdf") is None
+
+    storage.save(key, source)
+    source.unlink()
+
+    assert b"".join(storage.iter_range(key, 100, 50_100, 8192)) == content[100:50_100]
+    f, size = storage.open(source)
+    try:
+        assert size == len(content)
+        assert f.read() == content
+    finally:
+        f.close()
+    # open 直接读取对象，不写入本地缓存
+    assert not source.exists()
+    with pytest.raises(FileNotFoundError):
+        storage.open(tmp_path / "outputs" / "t1" / "missing.pdf")
+
+
+@pytest.fixture
+def remote_task(client, s3_endpoint, monkeypatch):
+    """一个已完成、输出文件已上传到对象存储且本地缓存已被清理的任务"""
+    storage = _storage(DATA_DIR, s3_endpoint)
+    monkeypatch.setattr(storage_module, "_storage", storage)
+
+    task_id = str(uuid.uuid4())
+    path = OUTPUTS_DIR / task_id / "out.mono.pdf"
+    path.parent.mkdir(parents=True)
+    content = os.urandom(300_000)
+    path.write_bytes(content)
+    result = {"mono_pdf_path": str(path)}
+    get_db().upsert({
+        "task_id": task_id,
+        "user_id": "s3-user",
+        "status": "completed",
+        "filename": "doc.pdf",
+        "source_lang": "en",
+        "target_lang": "zh",
+        "model": "gpt-4o-mini",
+        "start_time": "2024-01-01T00:00:00",
+        "result": result,
+    })
+    client.portal.call(record_artifacts, task_id, "s3-user", result)
+    assert storage.exists(storage.key_for(path))
+    path.unlink()
+    yield storage, task_id, content
+    downloads.invalidate([task_id])
+
+
+def test_download_redirects_to_presigned_url(client, remote_task, monkeypatch):
+    _, task_id, content = remote_task
+    monkeypatch.setattr(config.settings, "S3_PRESIGNED_DOWNLOADS", True)
+    url = f"/api/translation/{task_id}/download/mono"
+
+    response = client.get(url, headers=HEADERS, follow_redirects=False)
+
+    assert response.status_code == 307
+    assert response.headers["cache-control"] == "no-store"
+    with urllib.request.urlopen(response.headers["location"]) as presigned:
+        assert presigned.read() == content
+
+
+def test_remote_download_metadata_is_cached(client, remote_task, monkeypatch):
+    storage, task_id, _ = remote_task
+    monkeypatch.setattr(config.settings, "S3_PRESIGNED_DOWNLOADS", True)
+    url = f"/api/translation/{task_id}/download/mono"
+    client.get(url, headers=HEADERS, follow_redirects=False)
+
+    # 再次下载直接命中元数据缓存，不再查询数据库和对象存储
+    monkeypatch.setattr(storage, "exists", lambda key: pytest.fail("unexpected HEAD request"))
+    hits = downloads.stats()["hits"]
+    assert client.get(url, headers=HEADERS, follow_redirects=False).status_code == 307
+    assert downloads.stats()["hits"] == hits + 1
+    assert (task_id, "mono") in downloads._entries
+
+    downloads.invalidate([task_id])
+    assert (task_id, "mono") not in downloads._entries
+
+
+def test_download_proxies_object_when_presign_disabled(client, remote_task, monkeypatch):
+    _, task_id, content = remote_task
+    monkeypatch.setattr(config.settings, "S3_PRESIGNED_DOWNLOADS", False)
+    url = f"/api/translation/{task_id}/download/mono"
+
+    response = client.get(url, headers=HEADERS)
+    assert response.status_code == 200
+    assert response.content == content
+
+    response = client.get(url, headers={**HEADERS, "Range": "bytes=100-199"})
+    assert response.status_code == 206
+    assert response.headers["content-range"] == f"bytes 100-199/{len(content)}"
+    assert response.content == content[100:200]
+
+
+def test_reconcile_checks_object_storage(remote_task):
+    storage, task_id, _ = remote_task
+    model = get_artifact_model()
+
+    # 只是本地缓存没有：对象仍在，不应标记为丢失
+    reconcile(100)
+    assert not model.get(task_id, "mono")["missing"]
+
+    storage.client.delete_object(Bucket=BUCKET, Key=storage._object_key(f"outputs/{task_id}/out.mono.pdf"))
+    reconcile(100)
+    assert model.get(task_id, "mono")["missing"]
@@ -0,0 +1,75 @@
+"""按内容哈希去重的上传与引用计数删除"""
+import io
+import os
+
+import config.settings
+from config.settings import UPLOADS_DIR
+from utils.uploads import blob_relpath, get_upload, resolve_upload_path
+
+
+def _upload(client, content: bytes, filename="doc.pdf"):
+    return client.post("/api/upload", headers={"Authorization": "Bearer uploader"},
+                       files={"file": (filename, io.BytesIO(content), "application/pdf")})
+
+
+def test_duplicate_content_shares_one_blob(client):
+    content = b"%PDF-1.4 " + os.urandom(4096)
+    first = _upload(client, content).json()
+    second = _upload(client, content, filename="copy.pdf").json()
+
+    assert first["deduplicated"] is False
+    assert second["deduplicated"] is True
+    assert first["sha256"] == second["sha256"]
+    assert first["file_id"] != second["file_id"]
+    blob = UPLOADS_DIR / blob_relpath(first["sha256"])
+    assert blob.read_bytes() == content
+    assert resolve_upload_path(first["file_id"]) == resolve_upload_path(second["file_id"]) == blob
+    assert get_upload(second["file_id"])["ref_count"] == 2
+    # 临时文件已清理
+    assert list((UPLOADS_DIR / "tmp").glob("*.part")) == []
+
+
+def test_deleting_one_alias_keeps_blob_for_others(client):
+    content = b"%PDF-1.4 " + os.urandom(4096)
+    first = _upload(client, content).json()
+    second = _upload(client, content).json()
+    blob = UPLOADS_DIR / blob_relpath(first["sha256"])
+
+    assert client.delete(f"/api/upload/{first['file_id']}").status_code == 200
+    assert get_upload(first["file_id"]) is None
+    assert blob.exists()
+    assert resolve_upload_path(second["file_id"]) == blob
+    assert get_upload(second["file_id"])["ref_count"] == 1
+
+    # 最后一个引用删除后文件块也被删除
+    assert client.delete(f"/api/upload/{second['file_id']}").status_code == 200
+    assert not blob.exists()
+    assert resolve_upload_path(second["file_id"]) is None
+    assert client.delete(f"/api/upload/{second['file_id']}").status_code == 404
+
+
+def test_reupload_after_blob_deleted(client):
+    content = b"%PDF-1.4 " + os.urandom(1024)
+    first = _upload(client, content).json()
+    client.delete(f"/api/upload/{first['file_id']}")
+
+    again = _upload(client, content).json()
+    assert again["deduplicated"] is False
+    assert resolve_upload_path(again["file_id"]).read_bytes() == content
+
+
+def test_legacy_upload_path_still_resolves(client):
+    legacy = UPLOADS_DIR / "legacy-file.pdf"
+    legacy.write_bytes(b"%PDF-1.4 legacy")
+
+    assert resolve_upload_path("legacy-file") == legacy
+    assert client.delete("/api/upload/legacy-file").status_code == 200
+    assert not legacy.exists()
+
+
+def test_rejects_non_pdf_and_oversized(client, monkeypatch):
+    assert _upload(client, b"text", filename="notes.txt").status_code == 400
+
+    monkeypatch.setattr(config.settings, "MAX_UPLOAD_SIZE", 1024)
+    assert _upload(client, os.urandom(2048)).status_code == 413
+    assert list((UPLOADS_DIR / "tmp").glob("*.part")) == []
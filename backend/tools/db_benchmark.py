@@ -0,0 +1,129 @@
+#!/usr/bin/env python3
+"""数据库微基准 - 对比每次查询新建连接与连接池（WAL）的吞吐量
+
+用法:
+    python tools/db_benchmark.py [--rows 2000] [--ops 5000] [--threads 4]
+
+在临时目录中分别建库，运行相同的读写负载，输出每种模式的 QPS。
+"""
+import argparse
+import sqlite3
+import sys
+import tempfile
+import threading
+import time
+import uuid
+from contextlib import contextmanager
+from datetime import datetime
+from pathlib import Path
+
+# 添加backend目录到路径
+backend_dir = Path(__file__).parent.parent
+sys.path.insert(0, str(backend_dir))
+
+from db import Database, TranslationHistory
+
+
+class LegacyDatabase(Database):
+    """旧实现：每次调用新建连接，默认回滚日志模式"""
+
+    @contextmanager
+    def get_connection(self):
+        conn = sqlite3.connect(str(self.db_path))
+        conn.row_factory = sqlite3.Row
+        try:
+            yield conn
+        finally:
+            conn.close()
+
+
+def seed(history: TranslationHistory, rows: int):
+    task_ids = []
+    for index in range(rows):
+        task_id = str(uuid.uuid4())
+        history.create({
+            "task_id": task_id,
+            "user_id": f"user-{index % 10}",
+            "status": "completed",
+            "filename": f"doc-{index}.pdf",
+            "source_lang": "en",
+            "target_lang": "zh",
+            "model": "gpt-4o-mini",
+            "start_time": datetime.now().isoformat(),
+            "progress": 100,
+            "config": {"pages": None},
+            "result": {"mono_pdf_path": f"/tmp/{task_id}.pdf"},
+        })
+        task_ids.append(task_id)
+    return task_ids
+
+
+def timed(label: str, ops: int, func) -> float:
+    start = time.perf_counter()
+    func()
+    elapsed = time.perf_counter() - start
+    qps = ops / elapsed if elapsed else float("inf")
+    print(f"  {label:<28} {ops:>7} ops  {elapsed:>7.3f}s  {qps:>10.0f} qps")
+    return qps
+
+
+def run_suite(name: str, db: Database, rows: int, ops: int, threads: int):
+    print(f"\n[{name}]")
+    history = TranslationHistory(db)
+    task_ids = seed(history, rows)
+    results = {}
+
+    def point_reads():
+        for index in range(ops):
+            history.get_by_id(task_ids[index % rows])
+
+    def progress_writes():
+        for index in range(ops):
+            history.update(task_ids[index % rows], {"progress": index % 100, "stage": "翻译中"})
+
+    def mixed_concurrent():
+        per_thread = ops // threads
+
+        def reader():
+            for index in range(per_thread):
+                history.get_by_id(task_ids[index % rows])
+
+        def writer():
+            for index in range(per_thread):
+                history.update(task_ids[index % rows], {"progress": index % 100})
+
+        workers = [threading.Thread(target=reader) for _ in range(threads - 1)]
+        workers.append(threading.Thread(target=writer))
+        for worker in workers:
+            worker.start()
+        for worker in workers:
+            worker.join()
+
+    results["point_reads"] = timed("point reads", ops, point_reads)
+    results["progress_writes"] = timed("progress writes", ops, progress_writes)
+    results["mixed"] = timed(f"mixed ({threads} threads)", (ops // threads) * threads, mixed_concurrent)
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Database micro-benchmark")
+    parser.add_argument("--rows", type=int, default=2000, help="预置的历史记录条数")
+    parser.add_argument("--ops", type=int, default=5000, help="每项测试的操作次数")
+    parser.add_argument("--threads", type=int, default=4, help="并发测试的线程数（含一个写线程）")
+    args = parser.parse_args()
+    args.threads = max(args.threads, 2)
+
+    with tempfile.TemporaryDirectory() as tmp:
+        legacy = run_suite("connection per query", LegacyDatabase(Path(tmp) / "legacy.db"),
+                           args.rows, args.ops, args.threads)
+        pooled_db = Database(Path(tmp) / "pooled.db", pool_size=args.threads)
+        pooled = run_suite("pooled + WAL", pooled_db, args.rows, args.ops, args.threads)
+        pooled_db.close()
+
+    print("\n[speedup]")
+    for key, value in pooled.items():
+        print(f"  {key:<28} {value / legacy[key]:>6.2f}x")
+
+
+if __name__ == "__main__":
+    main()
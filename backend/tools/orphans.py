@@ -0,0 +1,54 @@
+#!/usr/bin/env python3
+"""孤儿文件工具 - 查看、扫描和删除输出目录中未登记的PDF
+
+用法:
+    python tools/orphans.py [--scan] [--list] [--delete] [--limit 1000]
+
+默认只显示扫描状态。--scan 立即执行（或从检查点继续）一轮扫描，--list 列出最近一轮扫描发现的
+孤儿文件，--delete 删除最多 --limit 个孤儿文件（删除前会重新确认文件仍未登记且不在保护期内）。
+扫描结果按节点保存，请在输出目录所在的节点上执行；服务运行时后台也会定期扫描，
+同时执行时两者共用同一个检查点。
+"""
+import argparse
+import asyncio
+import json
+import sys
+from pathlib import Path
+
+# 添加backend目录到路径
+backend_dir = Path(__file__).parent.parent
+sys.path.insert(0, str(backend_dir))
+
+from config.settings import ORPHAN_DELETE_LIMIT, ORPHAN_LIST_LIMIT, ORPHAN_SCAN_BATCH
+from utils import orphans
+from utils.database import close_database
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Scan, list and delete orphan output files")
+    parser.add_argument("--scan", action="store_true", help="立即执行一轮扫描")
+    parser.add_argument("--list", action="store_true", help="列出发现的孤儿文件")
+    parser.add_argument("--delete", action="store_true", help="删除孤儿文件")
+    parser.add_argument("--limit", type=int, help="列出 / 删除的最多文件数")
+    args = parser.parse_args()
+
+    try:
+        if args.scan:
+            summary = asyncio.run(orphans.scan_pass(ORPHAN_SCAN_BATCH, 0))
+            print(json.dumps(summary, ensure_ascii=False, indent=2))
+        if args.list:
+            found = orphans.list_orphans(args.limit or ORPHAN_LIST_LIMIT)
+            for row in found["items"]:
+                print(f"{row['size']:>12}  {row['path']}")
+            print(f"共 {found['total']} 个孤儿文件，{found['size']} 字节")
+        if args.delete:
+            result = orphans.delete_orphans(args.limit or ORPHAN_DELETE_LIMIT)
+            print(json.dumps(result, ensure_ascii=False, indent=2))
+        if not (args.scan or args.list or args.delete):
+            print(json.dumps(orphans.status(), ensure_ascii=False, indent=2))
+    finally:
+        close_database()
+
+
+if __name__ == "__main__":
+    main()
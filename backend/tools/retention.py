@@ -0,0 +1,57 @@
+#!/usr/bin/env python3
+"""历史记录保留策略工具 - 归档旧记录并压缩数据库文件
+
+用法:
+    python tools/retention.py [--days 180] [--max-per-user 1000] [--archive-days 0]
+                              [--vacuum-pages 0] [--dry-run] [--convert-vacuum]
+
+未指定的参数使用 EASY_BABELDOC_* 环境变量中的配置。服务运行时也可以执行（SQLite WAL 模式），
+但 --convert-vacuum 会执行一次完整 VACUUM，期间阻塞所有写入，建议在停机时执行。
+使用 PostgreSQL 时只执行归档，空间回收由服务器的 autovacuum 完成。
+"""
+import argparse
+import json
+import sys
+from pathlib import Path
+
+# 添加backend目录到路径
+backend_dir = Path(__file__).parent.parent
+sys.path.insert(0, str(backend_dir))
+
+from utils.database import close_database
+from utils.retention import convert_to_incremental, run_maintenance, vacuum_info
+
+
+def main():
+    parser = argparse.ArgumentParser(description="History retention and incremental vacuum")
+    parser.add_argument("--days", type=int, help="已结束任务的保留天数（0 表示不按时间归档）")
+    parser.add_argument("--max-per-user", type=int, help="每个用户保留的已结束任务数（0 表示不限）")
+    parser.add_argument("--archive-days", type=int, help="归档记录的保留天数（0 表示永久保留）")
+    parser.add_argument("--vacuum-pages", type=int, help="最多回收的空闲页数（0 表示全部）")
+    parser.add_argument("--dry-run", action="store_true", help="只统计需要归档的记录数，不做修改")
+    parser.add_argument("--convert-vacuum", action="store_true",
+                        help="先把已有数据库切换为 auto_vacuum=INCREMENTAL（完整 VACUUM 一次）")
+    args = parser.parse_args()
+
+    try:
+        if args.convert_vacuum and not args.dry_run:
+            before = vacuum_info()
+            print(f"切换 auto_vacuum: {before['auto_vacuum']} -> ", end="", flush=True)
+            print(convert_to_incremental()["auto_vacuum"])
+
+        result = run_maintenance(
+            max_age_days=args.days,
+            max_per_user=args.max_per_user,
+            archive_days=args.archive_days,
+            vacuum_pages=args.vacuum_pages,
+            dry_run=args.dry_run,
+        )
+        print(json.dumps(result, ensure_ascii=False, indent=2))
+        if result["database"]["auto_vacuum"] in ("none", "full"):
+            print("提示: 数据库未启用增量 VACUUM，使用 --convert-vacuum 切换后才能回收空闲页")
+    finally:
+        close_database()
+
+
+if __name__ == "__main__":
+    main()
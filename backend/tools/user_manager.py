@@ -8,15 +8,15 @@ import argparse
 backend_dir = Path(__file__).parent.parent
 sys.path.insert(0, str(backend_dir))
 
-from db import Database, User
-from config.settings import DB_FILE
+from db import User
+from utils.database import create_database
 
 
 class UserManager:
     """用户管理工具类"""
     
     def __init__(self):
-        self.db = Database(DB_FILE)
+        self.db = create_database()
         self.user_model = User(self.db)
     
     def add_user(self, username: str, password: str, email: str = None, is_guest: bool = False):
@@ -65,17 +65,12 @@ class UserManager:
     def list_users(self):
         """列出所有用户"""
         try:
-            conn = self.db.get_connection()
-            cursor = conn.cursor()
-            
-            cursor.execute("""
+            users = self.db.fetchall("""
                 SELECT user_id, username, email, is_guest, created_at, last_login
                 FROM users
                 ORDER BY created_at DESC
             """)
             
-            users = cursor.fetchall()
-            
             if not users:
                 print("数据库中没有用户")
                 return
@@ -106,12 +101,8 @@ class UserManager:
                 print(f"✗ 用户 '{username}' 不存在")
                 return False
             
-            conn = self.db.get_connection()
-            cursor = conn.cursor()
-            
             # 删除用户
-            cursor.execute("DELETE FROM users WHERE username = ?", (username,))
-            conn.commit()
+            self.db.execute("DELETE FROM users WHERE username = ?", (username,))
             
             print(f"✓ 已删除用户: {username}")
             return True
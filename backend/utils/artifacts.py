@@ -0,0 +1,203 @@
+"""任务输出文件登记
+
+任务完成时把单语/双语PDF的路径、大小和校验和写入 task_artifacts 表，历史列表和存储统计
+直接读表，不再在请求中逐个 stat 文件。文件是否仍然存在由后台任务定期核对并写回 missing 标记；
+使用对象存储时本地目录只是缓存，本地没有的文件再查询对象存储。
+"""
+import asyncio
+import hashlib
+import logging
+import threading
+import time
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+
+from db import TaskArtifact
+
+logger = logging.getLogger("easy_babeldoc.artifacts")
+
+ARTIFACT_KINDS = (("mono", "mono_pdf_path"), ("dual", "dual_pdf_path"))
+
+_model = None
+_lock = threading.Lock()
+_reconcile_stats = {"runs": 0, "checked": 0, "marked_missing": 0, "backfilled": 0, "last_run": None}
+
+
+def get_artifact_model() -> TaskArtifact:
+    """获取输出文件登记模型（单例模式，使用应用级数据库实例）"""
+    global _model
+    if _model is None:
+        from utils.database import get_database
+        _model = TaskArtifact(get_database())
+    return _model
+
+
+def _sha256_file(path: Path) -> str:
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(1024 * 1024), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def collect_artifacts(task_id: str, user_id: Optional[str], result: Optional[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    """读取任务结果中输出文件的大小与校验和（会读取整个文件，需在线程中调用）"""
+    artifacts = []
+    for kind, field in ARTIFACT_KINDS:
+        path = (result or {}).get(field)
+        if not path:
+            continue
+        try:
+            size = Path(path).stat().st_size
+            checksum = _sha256_file(Path(path))
+        except OSError:
+            continue
+        artifacts.append({
+            "task_id": task_id,
+            "user_id": user_id,
+            "kind": kind,
+            "path": str(path),
+            "size": size,
+            "checksum": checksum,
+        })
+    return artifacts
+
+
+def upload_outputs(artifacts: List[Dict[str, Any]]):
+    """使用对象存储时上传输出文件（本地副本保留为缓存，需在线程中调用）"""
+    from utils.storage import get_storage
+
+    storage = get_storage()
+    if not storage.remote:
+        return
+    for artifact in artifacts:
+        storage.save(storage.key_for(artifact["path"]), Path(artifact["path"]))
+
+
+async def record_artifacts(task_id: str, user_id: Optional[str], result: Optional[Dict[str, Any]]):
+    """任务完成后登记并上传输出文件、检查存储配额，失败不影响任务本身"""
+    from utils import quotas
+    from utils.database import get_async_database
+
+    try:
+        artifacts = await asyncio.to_thread(collect_artifacts, task_id, user_id, result)
+        if artifacts:
+            await get_async_database().run(get_artifact_model().put_many, artifacts)
+            await asyncio.to_thread(upload_outputs, artifacts)
+            quotas.schedule(user_id)
+    except Exception as e:
+        logger.error("登记输出文件失败: %s", e)
+
+
+def file_status(artifacts: List[Dict[str, Any]]) -> Dict[str, Any]:
+    """根据登记记录生成历史列表中的 file_status 字段"""
+    status = {"mono_exists": False, "dual_exists": False, "mono_size": 0, "dual_size": 0, "evicted": False}
+    for artifact in artifacts:
+        kind = artifact["kind"]
+        if artifact.get("evicted_at"):
+            status["evicted"] = True
+        if artifact["missing"]:
+            continue
+        status[f"{kind}_exists"] = True
+        status[f"{kind}_size"] = artifact["size"] or 0
+    return status
+
+
+def backfill(batch_size: int = 500) -> int:
+    """补登记迁移前完成（或已归档）但尚未登记输出文件的任务，返回登记的文件数"""
+    model = get_artifact_model()
+    backfilled = 0
+    while True:
+        pending = model.list_unrecorded(batch_size)
+        artifacts = []
+        for item in pending:
+            artifacts.extend(collect_artifacts(item["task_id"], item["user_id"], item["result"]))
+        if artifacts:
+            backfilled += model.put_many(artifacts)
+        # 输出文件已全部丢失的任务无法登记，不再重复尝试
+        if len(pending) < batch_size or not artifacts:
+            break
+    return backfilled
+
+
+def _check_remote(row: Dict[str, Any], storage) -> Optional[Dict[str, Any]]:
+    """本地缓存中没有的文件按对象存储判断是否存在，返回需要写回的状态（无变化时返回None）"""
+    key = storage.key_for(row["path"])
+    size = storage.size(key) if key is not None else None
+    if size is None:
+        return None if row["missing"] else {"id": row["id"], "missing": True, "size": row["size"], "checksum": row["checksum"]}
+    if row["missing"]:
+        # 对象写入后不再修改，沿用登记时的校验和
+        return {"id": row["id"], "missing": False, "size": size, "checksum": row["checksum"]}
+    return None
+
+
+def reconcile(batch_size: int) -> Dict[str, int]:
+    """核对一轮：补登记迁移前的完成任务，再逐批检查登记的文件是否仍存在"""
+    from utils.storage import get_storage
+
+    model = get_artifact_model()
+    storage = get_storage()
+    summary = {"checked": 0, "marked_missing": 0, "backfilled": backfill(batch_size)}
+
+    after_id = 0
+    while True:
+        rows = model.list_batch(after_id, batch_size)
+        if not rows:
+            break
+        updates = []
+        for row in rows:
+            try:
+                size = Path(row["path"]).stat().st_size
+            except OSError:
+                size = None
+            if size is None and storage.remote:
+                update = _check_remote(row, storage)
+                if update is not None:
+                    summary["marked_missing"] += update["missing"]
+                    updates.append(update)
+                continue
+            missing = size is None
+            if missing and not row["missing"]:
+                summary["marked_missing"] += 1
+                updates.append({"id": row["id"], "missing": True, "size": row["size"], "checksum": row["checksum"]})
+            elif not missing and (row["missing"] or size != row["size"]):
+                # 文件被替换或恢复：重新计算校验和
+                try:
+                    checksum = _sha256_file(Path(row["path"]))
+                except OSError:
+                    continue
+                updates.append({"id": row["id"], "missing": False, "size": size, "checksum": checksum})
+        if updates:
+            model.update_state(updates)
+        summary["checked"] += len(rows)
+        after_id = rows[-1]["id"]
+
+    with _lock:
+        _reconcile_stats["runs"] += 1
+        _reconcile_stats["last_run"] = time.strftime("%Y-%m-%dT%H:%M:%S")
+        for key, value in summary.items():
+            _reconcile_stats[key] += value
+    return summary
+
+
+async def run_reconciler(interval: int, batch_size: int):
+    """后台循环：启动后立即核对一次，之后每隔 interval 秒核对一次"""
+    while True:
+        try:
+            summary = await asyncio.to_thread(reconcile, batch_size)
+            if summary["marked_missing"] or summary["backfilled"]:
+                logger.info("Artifact reconcile: %s", summary)
+        except Exception as e:
+            logger.error("Artifact reconcile failed: %s", e)
+        await asyncio.sleep(interval)
+
+
+def stats() -> Dict[str, Any]:
+    """返回登记总量与后台核对统计"""
+    try:
+        totals = get_artifact_model().totals()
+    except Exception:
+        totals = {"files": 0, "missing": 0, "size": 0}
+    with _lock:
+        return dict(totals, reconcile=dict(_reconcile_stats))
@@ -0,0 +1,101 @@
+"""多个任务结果的ZIP打包下载
+
+ZIP 边生成边发送：不写临时文件，也不在内存中缓存整个压缩包。zipfile 写入一个只保留
+未发送数据的缓冲对象，每写入一个数据块就把缓冲区内容交给响应，内存占用只与块大小有关。
+PDF 本身已经压缩，条目使用 ZIP_STORED（不压缩）以节省CPU；输出不可回退，各条目的
+CRC 和大小写在数据描述符中。manifest.json 最后写入，只记录实际打包成功的文件。
+使用对象存储且本节点没有缓存时直接读取对象内容。
+"""
+import io
+import json
+import logging
+import time
+import zipfile
+from datetime import datetime
+from typing import Any, Dict, Iterator, List
+
+logger = logging.getLogger("easy_babeldoc.bundle")
+
+MANIFEST_NAME = "manifest.json"
+MANIFEST_FIELDS = ("task_id", "filename", "source_lang", "target_lang", "model", "start_time", "end_time")
+
+
+class _StreamBuffer(io.RawIOBase):
+    """只追加、不可回退的输出对象，drain() 取走已写入的数据"""
+
+    def __init__(self):
+        self._parts: List[bytes] = []
+        self._position = 0
+
+    def writable(self) -> bool:
+        return True
+
+    def write(self, data) -> int:
+        self._parts.append(bytes(data))
+        self._position += len(data)
+        return len(data)
+
+    def tell(self) -> int:
+        return self._position
+
+    def drain(self) -> bytes:
+        data = b"".join(self._parts)
+        self._parts.clear()
+        return data
+
+
+def entry_name(task_id: str, kind: str) -> str:
+    """压缩包内的文件名，与单个文件下载的文件名一致"""
+    return f"{task_id}_{kind}.pdf"
+
+
+def stream_bundle(tasks: List[Dict[str, Any]], skipped: List[Dict[str, Any]],
+                  chunk_size: int) -> Iterator[bytes]:
+    """生成ZIP数据块（同步生成器，由 StreamingResponse 在线程池中迭代）
+
+    Args:
+        tasks: 要打包的任务，包含 MANIFEST_FIELDS 以及 files: [{kind, path, checksum}]
+        skipped: 无法打包的任务 [{task_id, reason}]，写入清单
+        chunk_size: 每次读取文件的字节数
+    """
+    from utils.storage import get_storage
+
+    storage = get_storage()
+    buffer = _StreamBuffer()
+    started = time.monotonic()
+    manifest = {"generated_at": datetime.now().isoformat(), "tasks": [], "skipped": list(skipped)}
+    total = 0
+
+    with zipfile.ZipFile(buffer, mode="w", compression=zipfile.ZIP_STORED) as archive:
+        for task in tasks:
+            entry = {field: task.get(field) for field in MANIFEST_FIELDS}
+            entry["files"] = []
+            for item in task["files"]:
+                name = entry_name(task["task_id"], item["kind"])
+                try:
+                    source, file_size = storage.open(item["path"])
+                except OSError:
+                    manifest["skipped"].append({"task_id": task["task_id"], "kind": item["kind"], "reason": "文件不存在"})
+                    continue
+                with source:
+                    info = zipfile.ZipInfo(name, date_time=time.localtime(time.time())[:6])
+                    info.compress_type = zipfile.ZIP_STORED
+                    # 预先给出大小，超过 4GB 的文件自动使用 ZIP64
+                    info.file_size = file_size
+                    size = 0
+                    with archive.open(info, mode="w") as target:
+                        for chunk in iter(lambda: source.read(chunk_size), b""):
+                            target.write(chunk)
+                            size += len(chunk)
+                            yield buffer.drain()
+                entry["files"].append({"name": name, "kind": item["kind"], "size": size, "sha256": item.get("checksum")})
+                total += size
+            manifest["tasks"].append(entry)
+
+        archive.writestr(MANIFEST_NAME, json.dumps(manifest, ensure_ascii=False, indent=2))
+    # 最后的数据块包含数据描述符、清单和中央目录
+    yield buffer.drain()
+
+    logger.info("Bundle streamed: tasks=%s files=%s bytes=%s seconds=%.2f",
+                len(manifest["tasks"]), sum(len(t["files"]) for t in manifest["tasks"]),
+                total, time.monotonic() - started)
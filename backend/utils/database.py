@@ -0,0 +1,73 @@
+"""应用级数据库实例
+
+每个进程只创建一个 Database（连接池 + 一次迁移）。配置了 EASY_BABELDOC_DATABASE_URL
+（postgresql://...）时使用 PostgresDatabase，否则使用本地 SQLite 文件。API进程在 FastAPI 的 lifespan 中
+调用 init_database() 完成建库和迁移，路由通过 Depends(get_database) 共享同一实例；
+工作进程和命令行工具在首次使用时再创建。
+async 路由通过 Depends(get_async_database) 获取异步外观，数据库操作在线程池中执行，
+不阻塞事件循环；submit() 提交的写入在单独的写线程中按顺序执行。
+"""
+import threading
+from typing import Optional
+
+from db import AsyncDatabase, Database, PostgresDatabase
+
+_database: Optional[Database] = None
+_async_database: Optional[AsyncDatabase] = None
+_lock = threading.Lock()
+
+
+def init_database(migrate: bool = True) -> Database:
+    """创建本进程的数据库实例（重复调用返回同一实例）
+
+    Args:
+        migrate: 是否检查并执行数据库迁移；由API进程启动的工作进程无需重复迁移
+    """
+    global _database
+    if _database is None:
+        with _lock:
+            if _database is None:
+                _database = create_database(migrate=migrate)
+    return _database
+
+
+def create_database(migrate: bool = True) -> Database:
+    """按配置创建新的数据库实例（不注册为本进程的共享实例）"""
+    from config.settings import DATABASE_URL, DB_FILE, DB_POOL_SIZE
+
+    if DATABASE_URL.startswith(("postgres://", "postgresql://")):
+        return PostgresDatabase(DATABASE_URL, pool_size=DB_POOL_SIZE, migrate=migrate)
+    if DATABASE_URL:
+        raise ValueError(f"不支持的数据库连接串: {DATABASE_URL.split(':', 1)[0]}")
+    return Database(DB_FILE, pool_size=DB_POOL_SIZE, migrate=migrate)
+
+
+def get_database() -> Database:
+    """获取本进程的数据库实例，可直接用作 FastAPI 依赖"""
+    return _database if _database is not None else init_database()
+
+
+def get_async_database() -> AsyncDatabase:
+    """获取本进程数据库的异步外观（单例），可直接用作 FastAPI 依赖"""
+    from config.settings import DB_POOL_SIZE
+
+    global _async_database
+    if _async_database is None:
+        database = get_database()
+        with _lock:
+            if _async_database is None:
+                # 读线程数比连接池少一个，留给写线程
+                _async_database = AsyncDatabase(database, workers=max(DB_POOL_SIZE - 1, 1))
+    return _async_database
+
+
+def close_database():
+    """关闭数据库连接池（应用退出时调用），先等待数据库线程中排队的写入完成"""
+    global _database, _async_database
+    with _lock:
+        if _async_database is not None:
+            _async_database.close()
+            _async_database = None
+        if _database is not None:
+            _database.close()
+            _database = None
@@ -0,0 +1,396 @@
+"""翻译结果下载
+
+任务完成后输出文件不再变化，下载使用登记的 SHA-256 作为强 ETag，并返回 immutable 缓存头，
+浏览器可直接复用缓存或通过 If-None-Match 得到 304。支持单段 Range / If-Range，中断的下载
+可以续传。文件元数据解析结果缓存在进程内（按 size + mtime 校验），重复下载不再查询数据库。
+
+文件内容的发送方式按优先级：
+1. 配置了 EASY_BABELDOC_DOWNLOAD_ACCEL_REDIRECT 时返回 X-Accel-Redirect，由 nginx 直接发送文件
+2. ASGI 服务器支持 http.response.zerocopysend 扩展时交给服务器用 sendfile 零拷贝发送
+3. 支持 http.response.pathsend 扩展且为完整文件时交给服务器按路径发送
+4. 否则按块读取发送
+
+使用对象存储且本节点没有缓存时，返回预签名 URL 的 307 重定向（EASY_BABELDOC_S3_PRESIGNED_DOWNLOADS），
+或由服务器按 Range 分段转发对象内容。
+"""
+import asyncio
+import calendar
+import os
+import threading
+import time
+from collections import OrderedDict
+from email.utils import formatdate, parsedate_to_datetime
+from pathlib import Path
+from typing import Any, Dict, Optional, Tuple
+from urllib.parse import quote
+
+import aiofiles
+from fastapi import Request, Response
+
+# 同一个 URL 的内容不会变化；结果属于具体用户，只允许浏览器缓存
+CACHE_CONTROL = "private, max-age=31536000, immutable"
+MEDIA_TYPE = "application/pdf"
+# 最近下载时间按此间隔批量写入（供按配额淘汰时排序，不需要精确）
+TOUCH_FLUSH_SECONDS = 30
+
+_lock = threading.Lock()
+_entries: "OrderedDict[Tuple[str, str], Dict[str, Any]]" = OrderedDict()
+_touched: Dict[Tuple[str, str], None] = {}
+_last_flush = 0.0
+_stats = {"hits": 0, "misses": 0, "full": 0, "partial": 0, "not_modified": 0,
+          "unsatisfiable": 0, "zero_copy": 0, "accel_redirect": 0, "presigned": 0, "proxied": 0}
+
+
+def _count(key: str):
+    with _lock:
+        _stats[key] += 1
+
+
+def _stat(path: str) -> Optional[os.stat_result]:
+    try:
+        return os.stat(path)
+    except OSError:
+        return None
+
+
+def _target(path: str, st: os.stat_result, checksum: str) -> Dict[str, Any]:
+    return {
+        "path": path,
+        "size": st.st_size,
+        "mtime_ns": st.st_mtime_ns,
+        "etag": f'"{checksum}"',
+        "last_modified": formatdate(st.st_mtime, usegmt=True),
+    }
+
+
+def _remote_target(artifact: Dict[str, Any], key: str) -> Dict[str, Any]:
+    """只在对象存储中的文件：大小取登记值，修改时间取登记时间（UTC）"""
+    try:
+        mtime = calendar.timegm(time.strptime(artifact["created_at"][:19], "%Y-%m-%d %H:%M:%S"))
+    except (TypeError, ValueError):
+        mtime = 0
+    return {
+        "path": artifact["path"],
+        "key": key,
+        "remote": True,
+        "size": artifact["size"],
+        "mtime_ns": mtime * 1_000_000_000,
+        "etag": f'"{artifact["checksum"]}"',
+        "last_modified": formatdate(mtime, usegmt=True),
+    }
+
+
+def _cache_put(key: Tuple[str, str], target: Dict[str, Any]):
+    from config.settings import DOWNLOAD_CACHE_SIZE
+
+    if DOWNLOAD_CACHE_SIZE <= 0:
+        return
+    with _lock:
+        _entries[key] = target
+        _entries.move_to_end(key)
+        while len(_entries) > DOWNLOAD_CACHE_SIZE:
+            _entries.popitem(last=False)
+
+
+def touch(task_id: str, kind: str):
+    """记录一次下载，累积的记录每隔 TOUCH_FLUSH_SECONDS 秒提交一次"""
+    from utils.artifacts import get_artifact_model
+    from utils.database import get_async_database
+
+    global _last_flush
+    now = time.monotonic()
+    with _lock:
+        _touched[(task_id, kind)] = None
+        if now - _last_flush < TOUCH_FLUSH_SECONDS:
+            return
+        keys = list(_touched)
+        _touched.clear()
+        _last_flush = now
+    get_async_database().submit(get_artifact_model().touch_many, keys)
+
+
+def invalidate(task_ids):
+    """任务被删除后移除其缓存的下载元数据"""
+    task_ids = set(task_ids)
+    with _lock:
+        for key in [key for key in _entries if key[0] in task_ids]:
+            del _entries[key]
+
+
+async def resolve(task_id: str, kind: str) -> Optional[Dict[str, Any]]:
+    """按登记的输出文件解析下载目标，未登记或文件已变化时返回None（由调用方回退到任务记录）"""
+    from utils.artifacts import get_artifact_model
+    from utils.database import get_async_database
+    from utils.storage import get_storage
+
+    key = (task_id, kind)
+    with _lock:
+        target = _entries.get(key)
+        if target is not None:
+            _entries.move_to_end(key)
+    if target is not None:
+        if target.get("remote"):
+            # 对象存储中的文件不会被修改，删除或清理时调用 invalidate()
+            _count("hits")
+            return target
+        st = _stat(target["path"])
+        if st is not None and st.st_size == target["size"] and st.st_mtime_ns == target["mtime_ns"]:
+            _count("hits")
+            return target
+        with _lock:
+            _entries.pop(key, None)
+
+    _count("misses")
+    artifact = await get_async_database().run(get_artifact_model().get, task_id, kind)
+    if not artifact or artifact["missing"] or not artifact["checksum"]:
+        return None
+    st = _stat(artifact["path"])
+    if st is None:
+        storage = get_storage()
+        storage_key = storage.key_for(artifact["path"]) if storage.remote else None
+        if storage_key is None or not await asyncio.to_thread(storage.exists, storage_key):
+            return None
+        target = _remote_target(artifact, storage_key)
+    elif st.st_size != artifact["size"]:
+        return None
+    else:
+        target = _target(artifact["path"], st, artifact["checksum"])
+    _cache_put(key, target)
+    return target
+
+
+async def is_evicted(task_id: str, kind: str) -> bool:
+    """输出文件是否已按存储配额清理"""
+    from utils.artifacts import get_artifact_model
+    from utils.database import get_async_database
+
+    artifact = await get_async_database().run(get_artifact_model().get, task_id, kind)
+    return bool(artifact and artifact.get("evicted_at"))
+
+
+async def register(task_id: str, kind: str, path: str, user_id: Optional[str]) -> Optional[Dict[str, Any]]:
+    """为未登记的输出文件计算校验和并登记，返回下载目标；文件不存在时返回None"""
+    from utils.artifacts import collect_artifacts, get_artifact_model
+    from utils.database import get_async_database
+
+    field = f"{kind}_pdf_path"
+    artifacts = await asyncio.to_thread(collect_artifacts, task_id, user_id, {field: path})
+    st = _stat(path)
+    if not artifacts or st is None:
+        return None
+    get_async_database().submit(get_artifact_model().put_many, artifacts)
+    target = _target(path, st, artifacts[0]["checksum"])
+    _cache_put((task_id, kind), target)
+    return target
+
+
+def _etag_matches(header: str, etag: str) -> bool:
+    """If-None-Match 使用弱比较"""
+    if header.strip() == "*":
+        return True
+    for candidate in header.split(","):
+        candidate = candidate.strip()
+        if candidate.startswith("W/"):
+            candidate = candidate[2:]
+        if candidate == etag:
+            return True
+    return False
+
+
+def _not_modified(request: Request, target: Dict[str, Any]) -> bool:
+    if_none_match = request.headers.get("if-none-match")
+    if if_none_match is not None:
+        return _etag_matches(if_none_match, target["etag"])
+    if_modified_since = request.headers.get("if-modified-since")
+    if if_modified_since:
+        try:
+            since = parsedate_to_datetime(if_modified_since).timestamp()
+        except (TypeError, ValueError):
+            return False
+        return target["mtime_ns"] // 1_000_000_000 <= since
+    return False
+
+
+def _range_applies(request: Request, target: Dict[str, Any]) -> bool:
+    """If-Range 与当前版本一致（强比较）或未提供时才按 Range 返回部分内容"""
+    if_range = request.headers.get("if-range")
+    if if_range is None:
+        return True
+    if_range = if_range.strip()
+    if if_range.startswith('"') or if_range.startswith("W/"):
+        return if_range == target["etag"]
+    return if_range == target["last_modified"]
+
+
+def parse_range(header: str, size: int) -> Optional[Tuple[int, int]]:
+    """解析单段 bytes Range，返回 [start, end) 区间
+
+    多段或格式不正确时返回None（按完整文件响应）；区间不可满足时抛出 ValueError。
+    """
+    units, _, spec = header.partition("=")
+    if units.strip().lower() != "bytes" or "," in spec:
+        return None
+    first, sep, last = spec.partition("-")
+    first, last = first.strip(), last.strip()
+    if not sep or not (first.isdigit() or first == "") or not (last.isdigit() or last == "") or first == last == "":
+        return None
+    if first == "":
+        # 后缀形式：最后 N 个字节
+        if int(last) == 0 or size == 0:
+            raise ValueError("range not satisfiable")
+        return max(size - int(last), 0), size
+    start = int(first)
+    if start >= size:
+        raise ValueError("range not satisfiable")
+    end = min(int(last) + 1, size) if last else size
+    if end <= start:
+        return None
+    return start, end
+
+
+class FileRangeResponse(Response):
+    """发送文件的全部或一段内容，优先使用服务器的零拷贝扩展"""
+
+    def __init__(self, path: str, start: int, end: int, file_size: int,
+                 status_code: int, headers: Dict[str, str]):
+        from config.settings import DOWNLOAD_CHUNK_SIZE
+
+        self.path = path
+        self.start = start
+        self.end = end
+        self.file_size = file_size
+        self.chunk_size = DOWNLOAD_CHUNK_SIZE
+        self.status_code = status_code
+        self.media_type = MEDIA_TYPE
+        self.background = None
+        self.body = b""
+        headers = dict(headers, **{"content-length": str(end - start)})
+        if status_code == 206:
+            headers["content-range"] = f"bytes {start}-{end - 1}/{file_size}"
+        self.init_headers(headers)
+
+    async def __call__(self, scope, receive, send):
+        extensions = scope.get("extensions") or {}
+        await send({"type": "http.response.start", "status": self.status_code, "headers": self.raw_headers})
+        if scope.get("method") == "HEAD" or self.end <= self.start:
+            await send({"type": "http.response.body", "body": b"", "more_body": False})
+            return
+
+        if "http.response.zerocopysend" in extensions:
+            _count("zero_copy")
+            with open(self.path, "rb") as f:
+                await send({
+                    "type": "http.response.zerocopysend",
+                    "file": f,
+                    "offset": self.start,
+                    "count": self.end - self.start,
+                    "more_body": False,
+                })
+            return
+        if "http.response.pathsend" in extensions and self.start == 0 and self.end == self.file_size:
+            _count("zero_copy")
+            await send({"type": "http.response.pathsend", "path": str(self.path)})
+            return
+
+        remaining = self.end - self.start
+        async with aiofiles.open(self.path, "rb") as f:
+            await f.seek(self.start)
+            while remaining > 0:
+                chunk = await f.read(min(self.chunk_size, remaining))
+                if not chunk:
+                    break
+                remaining -= len(chunk)
+                await send({"type": "http.response.body", "body": chunk, "more_body": remaining > 0})
+        if remaining > 0:
+            # 文件在发送过程中被截断
+            await send({"type": "http.response.body", "body": b"", "more_body": False})
+
+
+class StorageRangeResponse(FileRangeResponse):
+    """从对象存储按区间读取并转发（本节点不缓存文件）"""
+
+    def __init__(self, key: str, start: int, end: int, file_size: int,
+                 status_code: int, headers: Dict[str, str]):
+        super().__init__(None, start, end, file_size, status_code, headers)
+        self.key = key
+
+    async def __call__(self, scope, receive, send):
+        from starlette.concurrency import iterate_in_threadpool
+        from utils.storage import get_storage
+
+        await send({"type": "http.response.start", "status": self.status_code, "headers": self.raw_headers})
+        if scope.get("method") != "HEAD" and self.end > self.start:
+            chunks = get_storage().iter_range(self.key, self.start, self.end, self.chunk_size)
+            async for chunk in iterate_in_threadpool(chunks):
+                await send({"type": "http.response.body", "body": chunk, "more_body": True})
+        await send({"type": "http.response.body", "body": b"", "more_body": False})
+
+
+def _accel_path(path: str) -> Optional[str]:
+    """把数据目录下的文件映射为 nginx internal location 的路径"""
+    from config.settings import DATA_DIR, DOWNLOAD_ACCEL_REDIRECT
+
+    if not DOWNLOAD_ACCEL_REDIRECT:
+        return None
+    try:
+        relative = Path(path).resolve().relative_to(Path(DATA_DIR).resolve())
+    except ValueError:
+        return None
+    return DOWNLOAD_ACCEL_REDIRECT.rstrip("/") + "/" + quote(relative.as_posix())
+
+
+def build_response(request: Request, target: Dict[str, Any], filename: str) -> Response:
+    """根据条件请求头生成 304 / 206 / 416 / 200 响应（对象存储中的文件可能为 307 重定向）"""
+    from config.settings import S3_PRESIGNED_DOWNLOADS
+
+    headers = {
+        "etag": target["etag"],
+        "last-modified": target["last_modified"],
+        "cache-control": CACHE_CONTROL,
+        "accept-ranges": "bytes",
+    }
+    if _not_modified(request, target):
+        _count("not_modified")
+        return Response(status_code=304, headers=headers)
+
+    headers["content-disposition"] = f'attachment; filename="{filename}"'
+    remote = target.get("remote", False)
+    if remote and S3_PRESIGNED_DOWNLOADS:
+        # 预签名 URL 有有效期，重定向响应本身不能缓存
+        from utils.storage import get_storage
+        _count("presigned")
+        url = get_storage().presigned_url(target["key"], filename)
+        return Response(status_code=307, headers=dict(headers, **{"location": url, "cache-control": "no-store"}))
+    accel = None if remote else _accel_path(target["path"])
+    if accel:
+        # Range 由 nginx 处理
+        _count("accel_redirect")
+        headers["x-accel-redirect"] = accel
+        return Response(status_code=200, headers=headers, media_type=MEDIA_TYPE)
+
+    size = target["size"]
+    byte_range = None
+    range_header = request.headers.get("range")
+    if range_header and _range_applies(request, target):
+        try:
+            byte_range = parse_range(range_header, size)
+        except ValueError:
+            _count("unsatisfiable")
+            return Response(status_code=416, headers=dict(headers, **{"content-range": f"bytes */{size}"}))
+
+    if remote:
+        _count("proxied")
+        response_class, source = StorageRangeResponse, target["key"]
+    else:
+        response_class, source = FileRangeResponse, target["path"]
+    if byte_range is None:
+        _count("full")
+        return response_class(source, 0, size, size, 200, headers)
+    _count("partial")
+    return response_class(source, byte_range[0], byte_range[1], size, 206, headers)
+
+
+def stats() -> Dict[str, Any]:
+    """返回下载元数据缓存与响应类型统计"""
+    with _lock:
+        return dict(_stats, cached=len(_entries))
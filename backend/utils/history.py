@@ -1,8 +1,11 @@
 import json
 import copy
+import logging
 from pathlib import Path
 from typing import List, Dict, Any, Optional
-from db import Database, TranslationHistory
+from db import TranslationHistory
+
+logger = logging.getLogger("easy_babeldoc.history")
 
 def convert_paths_to_strings(obj):
     """递归地将所有Path对象转换为字符串"""
@@ -19,16 +22,14 @@ def convert_paths_to_strings(obj):
     else:
         return obj
 
-_db_instance = None
 _history_model = None
 
 def get_db():
-    """获取数据库实例（单例模式）"""
-    global _db_instance, _history_model
-    if _db_instance is None:
-        from config.settings import DB_FILE
-        _db_instance = Database(DB_FILE)
-        _history_model = TranslationHistory(_db_instance)
+    """获取历史记录模型（单例模式，使用应用级数据库实例）"""
+    global _history_model
+    if _history_model is None:
+        from utils.database import get_database
+        _history_model = TranslationHistory(get_database())
     return _history_model
 
 def remove_sensitive_config(task: Dict[str, Any]) -> Dict[str, Any]:
@@ -43,65 +44,106 @@ def remove_sensitive_config(task: Dict[str, Any]) -> Dict[str, Any]:
                 config.pop(key, None)
     return sanitized
 
-def load_history(user_id: Optional[str] = None) -> List[Dict]:
+def _run(func, *args, **kwargs):
+    from utils.database import get_async_database
+    return get_async_database().run(func, *args, **kwargs)
+
+async def load_history(user_id: Optional[str] = None) -> List[Dict]:
     """从数据库加载翻译历史
     
     Args:
         user_id: 用户ID（可选，用于过滤）
     """
     try:
-        history_model = get_db()
-        history = history_model.get_all(user_id=user_id)
+        history = await _run(get_db().get_all, user_id=user_id)
         return [remove_sensitive_config(item) for item in history]
     except Exception as e:
-        print(f"加载历史记录失败: {e}")
+        logger.error("加载历史记录失败: %s", e)
         return []
 
-def save_history(history):
+async def load_history_page(user_id: str, filters: Dict[str, Any], limit: Optional[int],
+                            after: Optional[tuple] = None) -> List[Dict]:
+    """按游标分页加载翻译历史，参数同 TranslationHistory.list_page"""
+    history = await _run(get_db().list_page, user_id, filters, limit, after)
+    return [remove_sensitive_config(item) for item in history]
+
+async def save_history(history):
     """保存历史记录到数据库（批量）"""
     try:
-        history_model = get_db()
-        for item in history:
-            clean_item = convert_paths_to_strings(item)
-            history_model.upsert(clean_item)
-        print(f"历史记录保存成功，共 {len(history)} 条")
+        written = await _run(get_db().bulk_upsert, [convert_paths_to_strings(item) for item in history])
+        logger.info("历史记录保存成功，共 %s/%s 条", written, len(history))
+    except Exception as e:
+        logger.exception("保存历史记录失败: %s", e)
+
+def _upsert(clean_task: Dict):
+    try:
+        get_db().upsert(clean_task)
     except Exception as e:
-        print(f"保存历史记录失败: {e}")
-        import traceback
-        traceback.print_exc()
+        logger.exception("添加历史记录失败: %s", e)
 
 def add_to_history(task_data: Dict):
-    """添加或更新任务到历史记录"""
+    """添加或更新任务到历史记录
+    
+    立即复制任务数据，写入提交到数据库线程后返回，不阻塞事件循环；
+    写入按提交顺序执行，之后的读取一定能看到本次写入。
+    """
+    from utils.database import get_async_database
     try:
-        sanitized_task = remove_sensitive_config(task_data)
-        clean_task = convert_paths_to_strings(sanitized_task)
-        history_model = get_db()
-        history_model.upsert(clean_task)
+        clean_task = convert_paths_to_strings(remove_sensitive_config(task_data))
+        get_async_database().submit(_upsert, clean_task)
     except Exception as e:
-        print(f"添加历史记录失败: {e}")
-        import traceback
-        traceback.print_exc()
+        logger.error("添加历史记录失败: %s", e)
 
-def get_task(task_id: str, active_translations: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+async def get_task(task_id: str, active_translations: Dict[str, Any]) -> Optional[Dict[str, Any]]:
     """从内存或数据库获取任务信息"""
     if task_id in active_translations:
         return active_translations[task_id]
     
     try:
-        history_model = get_db()
-        task = history_model.get_by_id(task_id)
+        task = await _run(get_db().get_by_id, task_id)
+        if not task:
+            # 按保留策略归档的任务仍可按ID查询和下载
+            task = await _run(get_db().get_archived, task_id)
         if task:
             return remove_sensitive_config(task)
     except Exception as e:
-        print(f"获取任务失败: {e}")
+        logger.error("获取任务失败: %s", e)
     
     return None
 
-def delete_task(task_id: str) -> bool:
+async def get_tasks(task_ids: List[str], active_translations: Optional[Dict] = None) -> Dict[str, Dict]:
+    """批量获取任务（内存中的运行中任务优先），返回 {task_id: task}"""
+    tasks = {}
+    try:
+        tasks = {
+            task_id: remove_sensitive_config(task)
+            for task_id, task in (await _run(get_db().get_many, task_ids)).items()
+        }
+    except Exception as e:
+        logger.error("批量获取任务失败: %s", e)
+    for task_id in task_ids:
+        if active_translations and task_id in active_translations:
+            tasks[task_id] = active_translations[task_id]
+    return tasks
+
+async def delete_tasks(task_ids: List[str]) -> int:
+    """批量删除任务记录，返回删除条数"""
+    from utils.downloads import invalidate
+    
+    invalidate(task_ids)
+    try:
+        return await _run(get_db().delete_many, task_ids)
+    except Exception as e:
+        logger.error("批量删除任务失败: %s", e)
+        return 0
+
+async def delete_task(task_id: str) -> bool:
     """从数据库删除任务记录"""
+    from utils.downloads import invalidate
+    
+    invalidate([task_id])
     try:
-        history_model = get_db()
-        return history_model.delete(task_id)
+        return await _run(get_db().delete, task_id)
     except Exception as e:
-        print(f"删除任务失败: {e}")
+        logger.error("删除任务失败: %s", e)
         return False
@@ -0,0 +1,125 @@
+"""持久化任务队列
+
+排队中和运行中的任务写入 translation_jobs 表，服务重启后自动重新排队。
+请求参数去除API密钥后保存，密钥通过 credential_ref 引用用户的模型配置。
+状态写入提交到数据库线程按顺序执行，调用方（事件循环）不等待。
+"""
+import logging
+from typing import Any, Dict, List, Optional
+
+from db import TranslationJob
+from models.schemas import TranslationRequest
+
+logger = logging.getLogger("easy_babeldoc.jobs")
+
+_job_model = None
+
+def get_job_model() -> TranslationJob:
+    """获取任务队列模型（单例模式，使用应用级数据库实例）"""
+    global _job_model
+    if _job_model is None:
+        from utils.database import get_database
+        _job_model = TranslationJob(get_database())
+    return _job_model
+
+def find_credential_ref(user_id: str, request: TranslationRequest) -> Optional[str]:
+    """在用户的模型配置中查找与请求相同的API密钥，返回引用"""
+    try:
+        row = get_job_model().db.fetchone(
+            "SELECT id FROM models WHERE user_id = ? AND api_key = ? ORDER BY is_default DESC, id DESC",
+            (user_id, request.api_key)
+        )
+        if row:
+            return f"model:{row['id']}"
+    except Exception as e:
+        logger.error("查找凭据来源失败: %s", e)
+    return None
+
+def resolve_credential(user_id: str, credential_ref: Optional[str]) -> Optional[str]:
+    """根据凭据引用取回API密钥"""
+    if not credential_ref or not credential_ref.startswith("model:"):
+        return None
+    try:
+        model_id = int(credential_ref.split(":", 1)[1])
+        row = get_job_model().db.fetchone(
+            "SELECT api_key FROM models WHERE id = ? AND user_id = ?",
+            (model_id, user_id)
+        )
+        if row:
+            return row["api_key"]
+    except Exception as e:
+        logger.error("读取凭据失败: %s", e)
+    return None
+
+def _submit(func, *args, **kwargs):
+    from utils.database import get_async_database
+    get_async_database().submit(func, *args, **kwargs)
+
+def _persist_job(task_id: str, user_id: str, request: TranslationRequest, priority: int):
+    from config.settings import SENSITIVE_CONFIG_KEYS
+
+    try:
+        get_job_model().save(
+            task_id,
+            user_id,
+            request.model_dump(exclude=SENSITIVE_CONFIG_KEYS),
+            find_credential_ref(user_id, request),
+            priority=priority
+        )
+    except Exception as e:
+        logger.error("保存任务失败: %s", e)
+
+def _set_job_status(task_id: str, status: str):
+    try:
+        get_job_model().set_status(task_id, status)
+    except Exception as e:
+        logger.error("更新任务状态失败: %s", e)
+
+def _delete_job(task_id: str):
+    try:
+        get_job_model().delete(task_id)
+    except Exception as e:
+        logger.error("删除任务失败: %s", e)
+
+def persist_job(task_id: str, user_id: str, request: TranslationRequest, priority: int = 0):
+    """保存新提交的任务"""
+    _submit(_persist_job, task_id, user_id, request, priority)
+
+def mark_job_running(task_id: str):
+    """标记任务开始运行"""
+    _submit(_set_job_status, task_id, "running")
+
+def finish_job(task_id: str):
+    """任务结束（完成、失败或取消）后从队列表移除"""
+    _submit(_delete_job, task_id)
+
+def load_pending_jobs() -> List[Dict[str, Any]]:
+    """读取上次未完成的任务，并尝试还原完整的翻译请求
+
+    每个任务附带 ``translation_request`` 字段，凭据无法取回时为 None。
+    """
+    try:
+        jobs = get_job_model().get_pending()
+    except Exception as e:
+        logger.error("读取任务队列失败: %s", e)
+        return []
+
+    for job in jobs:
+        api_key = resolve_credential(job["user_id"], job.get("credential_ref"))
+        job["translation_request"] = None
+        if api_key:
+            try:
+                job["translation_request"] = TranslationRequest(**job["request"], api_key=api_key)
+            except Exception as e:
+                logger.error("还原任务请求失败 %s: %s", job["task_id"], e)
+    return jobs
+
+def _increment_attempts(task_id: str):
+    try:
+        get_job_model().increment_attempts(task_id)
+    except Exception as e:
+        logger.error("更新任务恢复次数失败: %s", e)
+
+def increment_job_attempts(task_id: str):
+    """记录一次自动恢复"""
+    _submit(_increment_attempts, task_id)
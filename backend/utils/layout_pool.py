@@ -0,0 +1,197 @@
+"""版面分析模型池
+
+DocLayoutModel.load_onnx() 每次都会重新创建 ONNX 会话，耗时数秒并占用数百MB内存。
+这里在进程内维护一组常驻会话，按需借给翻译任务使用，任务结束后归还。
+"""
+import logging
+import threading
+from contextlib import contextmanager
+from typing import Any, Callable, Dict, List, Optional
+
+logger = logging.getLogger("easy_babeldoc.layout_pool")
+
+
+def _load_default_model():
+    """加载BabelDOC默认的ONNX版面分析模型"""
+    from babeldoc.docvision.doclayout import DocLayoutModel
+    return DocLayoutModel.load_onnx()
+
+
+class _PooledModel:
+    """池中的单个模型会话"""
+
+    def __init__(self, model: Any):
+        self.model = model
+        self.leases = 0
+
+
+class LayoutModelLease:
+    """一次模型借用，使用完毕后需调用 release()"""
+
+    def __init__(self, pool: "LayoutModelPool", entry: _PooledModel):
+        self._pool = pool
+        self._entry = entry
+        self._released = False
+
+    @property
+    def model(self) -> Any:
+        return self._entry.model
+
+    def release(self):
+        """归还模型会话（重复调用无副作用）"""
+        if self._released:
+            return
+        self._released = True
+        self._pool._release(self._entry)
+
+
+class LayoutModelPool:
+    """进程级 DocLayoutModel 会话池
+
+    - 空闲会话直接复用（命中）
+    - 池未满时加载新会话（未命中）
+    - 池已满时与占用最少的会话共享，ONNX Runtime 的推理调用是线程安全的
+    """
+
+    def __init__(self, size: int = 1, loader: Optional[Callable[[], Any]] = None):
+        """初始化
+
+        Args:
+            size: 池中最多常驻的会话数量
+            loader: 模型加载函数，默认加载BabelDOC的ONNX模型
+        """
+        self.size = max(size, 1)
+        self._loader = loader or _load_default_model
+        self._entries: List[_PooledModel] = []
+        self._lock = threading.Lock()
+        self._load_lock = threading.Lock()
+        self._hits = 0
+        self._misses = 0
+        self._shared = 0
+        self._load_seconds = 0.0
+
+    def warmup(self, count: Optional[int] = None) -> int:
+        """预先加载会话
+
+        Args:
+            count: 需要预热的会话数量，默认为池大小
+
+        Returns:
+            实际新加载的会话数量
+        """
+        target = min(count or self.size, self.size)
+        loaded = 0
+        while True:
+            with self._lock:
+                if len(self._entries) >= target:
+                    break
+            entry = self._load_entry()
+            if entry is None:
+                break
+            loaded += 1
+        if loaded:
+            logger.info("Layout model pool warmed up with %s session(s)", loaded)
+        return loaded
+
+    def acquire(self) -> LayoutModelLease:
+        """借出一个模型会话（可能阻塞在模型加载上，异步代码中请放到线程里调用）"""
+        with self._lock:
+            entry = self._pick_idle()
+            if entry is not None:
+                self._hits += 1
+                entry.leases += 1
+                return LayoutModelLease(self, entry)
+
+        entry = self._load_entry(lease=True)
+        if entry is not None:
+            return LayoutModelLease(self, entry)
+
+        with self._lock:
+            entry = self._pick_idle()
+            if entry is not None:
+                self._hits += 1
+            else:
+                entry = min(self._entries, key=lambda e: e.leases)
+                self._shared += 1
+            entry.leases += 1
+            return LayoutModelLease(self, entry)
+
+    @contextmanager
+    def lease(self):
+        """以上下文管理器方式借用模型"""
+        lease = self.acquire()
+        try:
+            yield lease.model
+        finally:
+            lease.release()
+
+    def stats(self) -> Dict[str, Any]:
+        """返回池的命中统计"""
+        with self._lock:
+            total = self._hits + self._misses + self._shared
+            return {
+                "size": self.size,
+                "loaded": len(self._entries),
+                "in_use": sum(1 for e in self._entries if e.leases > 0),
+                "hits": self._hits,
+                "misses": self._misses,
+                "shared": self._shared,
+                "hit_rate": round((self._hits + self._shared) / total, 4) if total else 0.0,
+                "load_seconds": round(self._load_seconds, 3),
+            }
+
+    def _pick_idle(self) -> Optional[_PooledModel]:
+        for entry in self._entries:
+            if entry.leases == 0:
+                return entry
+        return None
+
+    def _load_entry(self, lease: bool = False) -> Optional[_PooledModel]:
+        """在池未满时加载一个新会话；池已满返回None"""
+        import time
+
+        # 串行加载，避免并发请求同时各自加载一份模型
+        with self._load_lock:
+            with self._lock:
+                if len(self._entries) >= self.size:
+                    return None
+                if lease:
+                    entry = self._pick_idle()
+                    if entry is not None:
+                        self._hits += 1
+                        entry.leases += 1
+                        return entry
+
+            started = time.monotonic()
+            model = self._loader()
+            elapsed = time.monotonic() - started
+
+            with self._lock:
+                entry = _PooledModel(model)
+                self._entries.append(entry)
+                self._load_seconds += elapsed
+                if lease:
+                    self._misses += 1
+                    entry.leases += 1
+            logger.info("Loaded layout model session %s/%s in %.2fs", len(self._entries), self.size, elapsed)
+            return entry
+
+    def _release(self, entry: _PooledModel):
+        with self._lock:
+            if entry.leases > 0:
+                entry.leases -= 1
+
+
+_pool: Optional[LayoutModelPool] = None
+_pool_lock = threading.Lock()
+
+
+def get_layout_model_pool() -> LayoutModelPool:
+    """获取进程级模型池（单例模式）"""
+    global _pool
+    if _pool is None:
+        with _pool_lock:
+            if _pool is None:
+                from config.settings import LAYOUT_MODEL_POOL_SIZE
+                _pool = LayoutModelPool(size=LAYOUT_MODEL_POOL_SIZE)
+    return _pool
@@ -10,7 +10,8 @@ from pathlib import Path
 sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
 
 from config.settings import HISTORY_FILE, DB_FILE
-from db import Database, TranslationHistory
+from db import TranslationHistory
+from utils.database import get_database
 
 
 def migrate_json_to_db():
@@ -29,19 +30,12 @@ def migrate_json_to_db():
         
         print(f"读取到 {len(history_data)} 条历史记录")
         
-        db = Database(DB_FILE)
+        db = get_database()
         history_model = TranslationHistory(db)
         
-        success_count = 0
-        error_count = 0
-        
-        for item in history_data:
-            try:
-                history_model.upsert(item)
-                success_count += 1
-            except Exception as e:
-                print(f"迁移记录失败 {item.get('task_id', 'unknown')}: {e}")
-                error_count += 1
+        # 所有记录在一个事务中批量写入
+        success_count = history_model.bulk_upsert(history_data)
+        error_count = len(history_data) - success_count
         
         print(f"\n迁移完成:")
         print(f"  成功: {success_count} 条")
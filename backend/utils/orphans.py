@@ -0,0 +1,275 @@
+"""孤儿文件后台扫描
+
+输出目录下未被任何任务登记的PDF（task_artifacts 中没有对应路径）视为孤儿文件。扫描在后台
+分批进行：用 os.scandir 逐个读取输出目录的顶层条目（每个任务一个子目录），每批处理
+ORPHAN_SCAN_BATCH 个条目后把进度写入 maintenance_state，批与批之间让出一段时间，服务重启后
+从检查点继续。发现的孤儿文件写入 orphan_files 表。孤儿文件不属于任何用户，不通过HTTP接口
+列出或删除：设置 EASY_BABELDOC_ORPHAN_AUTO_DELETE 后由后台任务在每轮扫描后删除，
+也可以用 tools/orphans.py 查看和删除。
+
+- 修改时间在 ORPHAN_MIN_AGE_HOURS 以内的文件不算孤儿（任务可能仍在生成、尚未登记）
+- 顶层条目按 scandir 顺序以序号作为检查点；两次扫描之间目录有增删时个别条目可能被跳过，
+  会在下一轮扫描中补上
+- 输出目录属于各个节点的本地磁盘，扫描结果和检查点按节点（主机名）区分
+"""
+import asyncio
+import logging
+import os
+import socket
+import stat
+import threading
+import time
+from typing import Any, Dict, Iterator, List
+
+from db import MaintenanceState, OrphanFile
+
+logger = logging.getLogger("easy_babeldoc.orphans")
+
+NODE = socket.gethostname()
+CHECKPOINT_NAME = f"orphan_scan:{NODE}"
+LAST_PASS_NAME = f"orphan_scan:{NODE}:last"
+
+_models = None
+_lock = threading.Lock()
+_state: Dict[str, Any] = {"running": False, "progress": None, "last_pass": None}
+_stats = {"passes": 0, "batches": 0, "scanned_files": 0, "deleted_files": 0}
+
+
+def _get_models():
+    """获取孤儿文件与检查点模型（单例模式，使用应用级数据库实例）"""
+    global _models
+    if _models is None:
+        from utils.database import get_database
+        database = get_database()
+        _models = (OrphanFile(database), MaintenanceState(database))
+    return _models
+
+
+def _now() -> str:
+    return time.strftime("%Y-%m-%dT%H:%M:%S")
+
+
+def _walk_pdfs(entry: os.DirEntry) -> Iterator[Dict[str, Any]]:
+    """遍历一个顶层条目下的所有PDF（不跟随符号链接）"""
+    stack = [entry]
+    while stack:
+        current = stack.pop()
+        try:
+            if current.is_dir(follow_symlinks=False):
+                with os.scandir(current.path) as children:
+                    stack.extend(children)
+                continue
+            if not current.name.lower().endswith(".pdf"):
+                continue
+            st = current.stat(follow_symlinks=False)
+        except OSError:
+            continue
+        if stat.S_ISREG(st.st_mode):
+            yield {"path": current.path, "size": st.st_size, "mtime": st.st_mtime}
+
+
+def _scan_batch(entries: Iterator[os.DirEntry], progress: Dict[str, Any], batch_size: int) -> bool:
+    """处理一批顶层条目并保存检查点，目录已遍历完时返回 False"""
+    from config.settings import ORPHAN_MIN_AGE_HOURS
+    from utils.artifacts import get_artifact_model
+
+    orphan_model, state_model = _get_models()
+    cutoff = time.time() - ORPHAN_MIN_AGE_HOURS * 3600
+    files: List[Dict[str, Any]] = []
+    processed = 0
+    for entry in entries:
+        files.extend(_walk_pdfs(entry))
+        processed += 1
+        if processed >= batch_size:
+            break
+
+    if files:
+        recorded = get_artifact_model().recorded_paths([f["path"] for f in files])
+        orphans = [f for f in files if f["path"] not in recorded and f["mtime"] < cutoff]
+        if orphans:
+            orphan_model.put_many(NODE, progress["pass_no"], orphans)
+        progress["orphans"] += len(orphans)
+        progress["orphan_bytes"] += sum(f["size"] for f in orphans)
+    progress["position"] += processed
+    progress["scanned_files"] += len(files)
+    state_model.put(CHECKPOINT_NAME, progress)
+
+    with _lock:
+        _state["progress"] = dict(progress)
+        _stats["batches"] += 1
+        _stats["scanned_files"] += len(files)
+    return processed >= batch_size
+
+
+def _open_pass() -> tuple:
+    """读取检查点（没有则开始新一轮），返回 (进度, 已跳到检查点位置的 scandir 迭代器)"""
+    from config.settings import OUTPUTS_DIR
+    from utils.artifacts import backfill
+
+    _, state_model = _get_models()
+    progress = state_model.get(CHECKPOINT_NAME)
+    if progress is None:
+        # 先补登记迁移前完成的任务，避免其输出文件被当成孤儿
+        backfill()
+        last = state_model.get(LAST_PASS_NAME) or {}
+        progress = {
+            "pass_no": last.get("pass_no", 0) + 1,
+            "position": 0,
+            "scanned_files": 0,
+            "orphans": 0,
+            "orphan_bytes": 0,
+            "started_at": _now(),
+        }
+        state_model.put(CHECKPOINT_NAME, progress)
+
+    iterator = os.scandir(OUTPUTS_DIR)
+    for _ in range(progress["position"]):
+        if next(iterator, None) is None:
+            break
+    return progress, iterator
+
+
+def _finish_pass(progress: Dict[str, Any]) -> Dict[str, Any]:
+    """一轮结束：删除本轮未再发现的记录，保存摘要并清除检查点"""
+    orphan_model, state_model = _get_models()
+    orphan_model.delete_stale(NODE, progress["pass_no"])
+    summary = dict(progress, finished_at=_now())
+    summary.pop("position", None)
+    state_model.put(LAST_PASS_NAME, summary)
+    state_model.delete(CHECKPOINT_NAME)
+    with _lock:
+        _state["progress"] = None
+        _state["last_pass"] = summary
+        _stats["passes"] += 1
+    return summary
+
+
+async def scan_pass(batch_size: int, pause_seconds: float) -> Dict[str, Any]:
+    """执行（或从检查点继续）一轮扫描，每批在线程中执行，批间暂停 pause_seconds 秒"""
+    with _lock:
+        if _state["running"]:
+            return {}
+        _state["running"] = True
+    iterator = None
+    try:
+        progress, iterator = await asyncio.to_thread(_open_pass)
+        with _lock:
+            _state["progress"] = dict(progress)
+        while await asyncio.to_thread(_scan_batch, iterator, progress, batch_size):
+            await asyncio.sleep(pause_seconds)
+        return await asyncio.to_thread(_finish_pass, progress)
+    finally:
+        if iterator is not None:
+            iterator.close()
+        with _lock:
+            _state["running"] = False
+
+
+async def run_orphan_scanner(interval_seconds: int, batch_size: int, pause_seconds: float,
+                             delete_limit: int = 0):
+    """后台循环：有未完成的检查点时立即继续，之后每隔 interval_seconds 秒扫描一轮
+
+    delete_limit 大于 0 时每轮扫描后删除最多 delete_limit 个孤儿文件。
+    """
+    _, state_model = _get_models()
+    pending = await asyncio.to_thread(state_model.get, CHECKPOINT_NAME)
+    last = await asyncio.to_thread(state_model.get, LAST_PASS_NAME)
+    with _lock:
+        _state["last_pass"] = last
+    if pending is None:
+        await asyncio.sleep(min(interval_seconds, 300))
+
+    while True:
+        try:
+            summary = await scan_pass(batch_size, pause_seconds)
+            if summary.get("orphans"):
+                logger.info("Orphan scan: pass=%s files=%s orphans=%s bytes=%s",
+                            summary["pass_no"], summary["scanned_files"],
+                            summary["orphans"], summary["orphan_bytes"])
+                if delete_limit > 0:
+                    deleted = await asyncio.to_thread(delete_orphans, delete_limit)
+                    logger.info("Orphan cleanup: deleted=%s errors=%s",
+                                deleted["deleted_files"], len(deleted["errors"]))
+        except Exception as e:
+            logger.error("Orphan scan failed: %s", e)
+        await asyncio.sleep(interval_seconds)
+
+
+def list_orphans(limit: int) -> Dict[str, Any]:
+    """返回最近一轮扫描发现的孤儿文件"""
+    orphan_model, _ = _get_models()
+    totals = orphan_model.totals(NODE)
+    return {"items": orphan_model.list(NODE, limit), "total": totals["files"], "size": totals["size"]}
+
+
+def delete_orphans(limit: int) -> Dict[str, Any]:
+    """删除最多 limit 个孤儿文件（删除前重新确认文件仍未登记且不在保护期内）"""
+    from config.settings import ORPHAN_MIN_AGE_HOURS
+    from utils.artifacts import get_artifact_model
+
+    orphan_model, _ = _get_models()
+    result = {"deleted_files": 0, "errors": [], "warnings": []}
+    rows = orphan_model.list(NODE, limit)
+    if not rows:
+        return result
+
+    recorded = get_artifact_model().recorded_paths([row["path"] for row in rows])
+    cutoff = time.time() - ORPHAN_MIN_AGE_HOURS * 3600
+    handled = []
+    for row in rows:
+        path = row["path"]
+        name = os.path.basename(path)
+        if path in recorded:
+            handled.append(path)
+            continue
+        try:
+            if os.stat(path).st_mtime >= cutoff:
+                handled.append(path)
+                continue
+            os.unlink(path)
+            result["deleted_files"] += 1
+            handled.append(path)
+        except PermissionError:
+            result["errors"].append({
+                "type": "permission_error",
+                "file": path,
+                "message": f"文件被占用无法删除: {name}",
+            })
+        except FileNotFoundError:
+            handled.append(path)
+            result["warnings"].append({
+                "type": "file_not_found",
+                "file": path,
+                "message": f"文件已不存在: {name}",
+            })
+        except OSError as e:
+            result["errors"].append({
+                "type": "unknown_error",
+                "file": path,
+                "message": f"删除文件时发生未知错误: {name}",
+                "detail": str(e),
+            })
+    if handled:
+        orphan_model.delete_paths(NODE, handled)
+    with _lock:
+        _stats["deleted_files"] += result["deleted_files"]
+    return result
+
+
+def status() -> Dict[str, Any]:
+    """返回扫描任务状态：是否在运行、当前进度、上一轮摘要与孤儿文件总量"""
+    orphan_model, state_model = _get_models()
+    with _lock:
+        current = {"node": NODE, "running": _state["running"], "progress": _state["progress"]}
+    if current["progress"] is None:
+        current["progress"] = state_model.get(CHECKPOINT_NAME)
+    current["last_pass"] = state_model.get(LAST_PASS_NAME)
+    current["orphans"] = orphan_model.totals(NODE)
+    return current
+
+
+def stats() -> Dict[str, Any]:
+    """返回累计扫描统计（不查询数据库）"""
+    with _lock:
+        return dict(_stats, node=NODE, running=_state["running"],
+                    last_finished=(_state["last_pass"] or {}).get("finished_at"))
@@ -0,0 +1,127 @@
+"""进度写入缓冲
+
+长文档会产生成千上万个 progress_update 事件，逐个写库代价很高。
+这里只在距上次写入超过一定时间或进度变化足够大时才落库，
+状态变化（完成/失败/取消）仍由调用方立即写入。
+"""
+import logging
+import threading
+import time
+from typing import Any, Callable, Dict, Optional, Tuple
+
+logger = logging.getLogger("easy_babeldoc.progress")
+
+
+class ProgressWriteBuffer:
+    """按时间间隔和进度差合并进度写入"""
+
+    def __init__(self, interval_ms: int, min_delta: float,
+                 writer: Callable[[str, Dict[str, Any]], Any]):
+        """初始化
+
+        Args:
+            interval_ms: 同一任务两次写入的最小间隔（毫秒）
+            min_delta: 进度变化达到该值时立即写入（百分比），阶段切换时也会立即写入
+            writer: 实际写库函数，参数为 (task_id, 更新字段)
+        """
+        self.interval = max(interval_ms, 0) / 1000
+        self.min_delta = max(min_delta, 0)
+        self._writer = writer
+        self._pending: Dict[str, Dict[str, Any]] = {}
+        self._last_write: Dict[str, Tuple[float, float, Any]] = {}
+        self._lock = threading.Lock()
+        self._events = 0
+        self._writes = 0
+
+    def record(self, task_id: str, fields: Dict[str, Any]) -> bool:
+        """记录一次进度更新
+
+        Args:
+            task_id: 任务ID
+            fields: 需要写入的字段（progress/stage/message）
+
+        Returns:
+            本次是否实际写入了数据库
+        """
+        now = time.monotonic()
+        progress = float(fields.get("progress") or 0)
+        with self._lock:
+            self._events += 1
+            last = self._last_write.get(task_id)
+            due = (
+                last is None
+                or now - last[0] >= self.interval
+                or abs(progress - last[1]) >= self.min_delta
+                or fields.get("stage") != last[2]
+            )
+            if not due:
+                self._pending[task_id] = fields
+                return False
+            self._pending.pop(task_id, None)
+            self._last_write[task_id] = (now, progress, fields.get("stage"))
+            self._writes += 1
+        self._writer(task_id, fields)
+        return True
+
+    def flush(self, task_id: Optional[str] = None):
+        """把尚未写入的进度落库；不指定 task_id 时刷新全部"""
+        with self._lock:
+            if task_id is None:
+                pending = self._pending
+                self._pending = {}
+            else:
+                fields = self._pending.pop(task_id, None)
+                pending = {task_id: fields} if fields else {}
+            now = time.monotonic()
+            for pending_id, fields in pending.items():
+                self._last_write[pending_id] = (now, float(fields.get("progress") or 0), fields.get("stage"))
+                self._writes += 1
+        for pending_id, fields in pending.items():
+            self._writer(pending_id, fields)
+
+    def discard(self, task_id: str):
+        """丢弃任务的缓冲数据（状态变化已整体写入时调用）"""
+        with self._lock:
+            self._pending.pop(task_id, None)
+            self._last_write.pop(task_id, None)
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                "interval_ms": int(self.interval * 1000),
+                "min_delta": self.min_delta,
+                "events": self._events,
+                "writes": self._writes,
+                "saved_writes": self._events - self._writes,
+                "pending": len(self._pending),
+            }
+
+
+def _update_progress(task_id: str, fields: Dict[str, Any]):
+    from utils.history import get_db
+    try:
+        get_db().update(task_id, fields)
+    except Exception as e:
+        logger.error("写入任务进度失败: %s", e)
+
+
+def _write_progress(task_id: str, fields: Dict[str, Any]):
+    """只更新进度相关的列，避免整条记录的深拷贝和先查后写；写入在数据库线程中执行"""
+    from utils.database import get_async_database
+    get_async_database().submit(_update_progress, task_id, dict(fields))
+
+
+_buffer: Optional[ProgressWriteBuffer] = None
+
+
+def get_progress_buffer() -> ProgressWriteBuffer:
+    """获取全局进度写入缓冲（单例模式）"""
+    global _buffer
+    if _buffer is None:
+        from config.settings import PROGRESS_FLUSH_INTERVAL_MS, PROGRESS_FLUSH_DELTA
+        _buffer = ProgressWriteBuffer(
+            interval_ms=PROGRESS_FLUSH_INTERVAL_MS,
+            min_delta=PROGRESS_FLUSH_DELTA,
+            writer=_write_progress,
+        )
+    return _buffer
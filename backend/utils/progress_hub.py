@@ -0,0 +1,137 @@
+"""WebSocket 进度广播
+
+每个任务可以有多个订阅者（多个浏览器标签页），新订阅者连接时先收到当前状态快照。
+发布方只把事件放进各订阅者的有界队列，不会等待网络发送；
+慢客户端的队列满了时丢弃中间的进度帧，完成/失败等终态事件始终保留。
+"""
+import asyncio
+import json
+from collections import deque
+from typing import Any, Deque, Dict, Optional, Set
+
+PROGRESS_EVENT = "progress_update"
+
+
+class ProgressSubscriber:
+    """单个WebSocket订阅者的发送队列"""
+
+    def __init__(self, max_frames: int):
+        self.max_frames = max(max_frames, 2)
+        self._frames: Deque[Dict[str, Any]] = deque()
+        self._ready = asyncio.Event()
+        self.dropped = 0
+
+    def push(self, event: Dict[str, Any]):
+        """放入一帧（不阻塞），必要时合并或丢弃进度帧"""
+        if event.get("type") == PROGRESS_EVENT and self._frames and self._frames[-1].get("type") == PROGRESS_EVENT:
+            # 连续的进度帧只保留最新一帧
+            self._frames[-1] = event
+            self.dropped += 1
+        else:
+            self._frames.append(event)
+            while len(self._frames) > self.max_frames:
+                if not self._drop_oldest_progress():
+                    self._frames.popleft()
+                    self.dropped += 1
+        self._ready.set()
+
+    async def get(self) -> Dict[str, Any]:
+        """等待并取出下一帧"""
+        while not self._frames:
+            self._ready.clear()
+            await self._ready.wait()
+        return self._frames.popleft()
+
+    def _drop_oldest_progress(self) -> bool:
+        for index, frame in enumerate(self._frames):
+            if frame.get("type") == PROGRESS_EVENT:
+                del self._frames[index]
+                self.dropped += 1
+                return True
+        return False
+
+
+class ProgressHub:
+    """按任务分组的订阅者集合"""
+
+    def __init__(self, max_frames: int = 16):
+        self.max_frames = max_frames
+        self._subscribers: Dict[str, Set[ProgressSubscriber]] = {}
+        self._published = 0
+        self._dropped = 0
+
+    def subscribe(self, task_id: str, snapshot: Optional[Dict[str, Any]] = None) -> ProgressSubscriber:
+        """添加订阅者，并把当前状态快照作为第一帧"""
+        subscriber = ProgressSubscriber(self.max_frames)
+        if snapshot is not None:
+            subscriber.push(snapshot)
+        self._subscribers.setdefault(task_id, set()).add(subscriber)
+        return subscriber
+
+    def unsubscribe(self, task_id: str, subscriber: ProgressSubscriber):
+        subscribers = self._subscribers.get(task_id)
+        if subscribers is None:
+            return
+        if subscriber in subscribers:
+            subscribers.discard(subscriber)
+            self._dropped += subscriber.dropped
+        if not subscribers:
+            del self._subscribers[task_id]
+
+    def publish(self, task_id: str, event: Dict[str, Any]):
+        """向任务的所有订阅者广播事件（不阻塞）"""
+        self._published += 1
+        for subscriber in list(self._subscribers.get(task_id, ())):
+            subscriber.push(event)
+
+    def has_subscribers(self, task_id: str) -> bool:
+        return bool(self._subscribers.get(task_id))
+
+    def stats(self) -> Dict[str, Any]:
+        subscribers = [s for group in self._subscribers.values() for s in group]
+        return {
+            "tasks": len(self._subscribers),
+            "subscribers": len(subscribers),
+            "published": self._published,
+            "dropped_frames": self._dropped + sum(s.dropped for s in subscribers),
+        }
+
+
+def build_snapshot(task: Dict[str, Any]) -> Dict[str, Any]:
+    """把任务状态转换为前端可直接处理的事件帧"""
+    status = task.get("status")
+    if status == "completed":
+        return {"type": "finish", "snapshot": True, "translate_result": task.get("result")}
+    if status in ("error", "cancelled"):
+        return {"type": "error", "snapshot": True, "error": task.get("error") or "未知错误"}
+    return {
+        "type": PROGRESS_EVENT,
+        "snapshot": True,
+        "status": status,
+        "overall_progress": task.get("progress", 0),
+        "stage": task.get("stage", ""),
+        "message": task.get("message", ""),
+        "queue_position": task.get("queue_position"),
+    }
+
+
+async def pump(websocket, subscriber: ProgressSubscriber):
+    """把订阅者队列中的事件依次发送到WebSocket，直到连接断开"""
+    while True:
+        event = await subscriber.get()
+        try:
+            await websocket.send_text(json.dumps(event, ensure_ascii=False))
+        except Exception:
+            return
+
+
+_hub: Optional[ProgressHub] = None
+
+
+def get_progress_hub() -> ProgressHub:
+    """获取全局进度广播（单例模式）"""
+    global _hub
+    if _hub is None:
+        from config.settings import WS_MAX_PENDING_FRAMES
+        _hub = ProgressHub(max_frames=WS_MAX_PENDING_FRAMES)
+    return _hub
@@ -0,0 +1,207 @@
+"""按用户的存储配额与LRU淘汰
+
+用户占用的空间按数据库记录统计，不遍历文件系统：输出文件取 task_artifacts 中现存文件的大小，
+上传文件取 uploads 中每次上传的大小（内容去重不减少用户的占用）。术语表不属于具体用户，不计入配额。
+
+用户或整个节点的用量超过配额（高水位）时，按最近下载/使用时间从旧到新删除输出文件和上传文件，
+直到降到配额的 STORAGE_EVICT_TARGET_PERCENT（低水位）。被删除的输出文件在登记表中标记为已清理，
+对应的历史记录写入说明；排队或运行中任务的上传文件和输出文件不会被删除。
+"""
+import asyncio
+import logging
+import threading
+import time
+from typing import Any, Dict, List, Optional
+
+logger = logging.getLogger("easy_babeldoc.quotas")
+
+EVICTED_MESSAGE = "输出文件已按存储配额清理"
+# 每次从数据库读取的淘汰候选数
+CANDIDATE_BATCH = 200
+
+_run_lock = threading.Lock()
+_lock = threading.Lock()
+_pending = set()
+_tasks = set()
+_stats = {"runs": 0, "evicted_outputs": 0, "evicted_uploads": 0, "freed_bytes": 0, "last_eviction": None}
+
+
+def user_quota(user_id: str) -> int:
+    """用户的配额（字节，0 表示不限），访客使用单独的配额（会查询数据库，需在线程中调用）"""
+    from config.settings import GUEST_STORAGE_QUOTA, STORAGE_QUOTA
+    from utils.user_cache import lookup_user
+
+    if GUEST_STORAGE_QUOTA == STORAGE_QUOTA:
+        return STORAGE_QUOTA
+    user = lookup_user(user_id)
+    if user and user.get("is_guest"):
+        return GUEST_STORAGE_QUOTA
+    return STORAGE_QUOTA
+
+
+def user_usage(user_id: str) -> Dict[str, Any]:
+    """用户的存储用量（两条聚合查询）"""
+    from utils.artifacts import get_artifact_model
+    from utils.uploads import get_upload_store
+
+    outputs = get_artifact_model().usage(user_id)
+    uploads = get_upload_store().usage(user_id)
+    return {
+        "outputs": outputs["size"],
+        "uploads": uploads,
+        "total": outputs["size"] + uploads,
+        "quota": user_quota(user_id),
+        "evicted_files": outputs["evicted"],
+    }
+
+
+def node_usage() -> int:
+    """节点上输出文件与上传文件块的总大小"""
+    from utils.artifacts import get_artifact_model
+    from utils.uploads import get_upload_store
+
+    return get_artifact_model().totals()["size"] + get_upload_store().blob_size()
+
+
+def _active_file_ids() -> set:
+    """排队或运行中任务使用的上传文件"""
+    from utils.jobs import get_job_model
+
+    return {job["request"].get("file_id") for job in get_job_model().get_pending()}
+
+
+def _candidates(user_id: Optional[str]) -> List[Dict[str, Any]]:
+    """合并输出文件与上传文件，按最近使用时间从旧到新排列"""
+    from utils.artifacts import get_artifact_model
+    from utils.uploads import get_upload_store
+
+    active = _active_file_ids()
+    items = [dict(item, type="output") for item in get_artifact_model().list_lru(user_id, CANDIDATE_BATCH)]
+    items.extend(
+        dict(item, type="upload") for item in get_upload_store().list_lru(user_id, CANDIDATE_BATCH)
+        if item["file_id"] not in active
+    )
+    items.sort(key=lambda item: str(item["used_at"] or ""))
+    return items
+
+
+def _evict_outputs(items: List[Dict[str, Any]]):
+    from utils import downloads
+    from utils.artifacts import get_artifact_model
+    from utils.storage import get_storage
+
+    storage = get_storage()
+    for item in items:
+        try:
+            storage.delete(storage.key_for(item["path"]))
+        except Exception as e:
+            logger.warning("Failed to delete evicted output %s: %s", item["path"], e)
+    task_ids = list(dict.fromkeys(item["task_id"] for item in items))
+    get_artifact_model().mark_evicted([item["id"] for item in items], task_ids, EVICTED_MESSAGE)
+    downloads.invalidate(task_ids)
+
+
+def _evict(user_id: Optional[str], excess: int) -> Dict[str, int]:
+    """删除最久未使用的文件，直到释放 excess 字节
+
+    释放量与用量统计口径一致：输出文件按登记大小计算（与结果缓存共享硬链接的文件也计入，
+    否则用量已下降却仍被当作未释放，会一直删到没有文件为止）；上传文件在用户维度按上传大小计算，
+    节点维度按实际释放的文件块计算。
+    """
+    from utils.uploads import delete_upload
+
+    result = {"outputs": 0, "uploads": 0, "freed": 0}
+    while result["freed"] < excess:
+        candidates = _candidates(user_id)
+        if not candidates:
+            break
+        outputs = []
+        before = result["outputs"] + result["uploads"]
+        for item in candidates:
+            if result["freed"] >= excess:
+                break
+            if item["type"] == "output":
+                outputs.append(item)
+                result["outputs"] += 1
+                result["freed"] += item["size"] or 0
+            elif delete_upload(item["file_id"]):
+                result["uploads"] += 1
+                # 节点维度只有最后一个引用被删除时才真正释放文件块
+                if user_id is not None:
+                    result["freed"] += item["size"] or 0
+                elif item["ref_count"] <= 1:
+                    result["freed"] += item["blob_size"] or 0
+        if outputs:
+            _evict_outputs(outputs)
+        if result["outputs"] + result["uploads"] == before:
+            break
+    return result
+
+
+def _target(quota: int) -> int:
+    from config.settings import STORAGE_EVICT_TARGET_PERCENT
+
+    return quota * STORAGE_EVICT_TARGET_PERCENT // 100
+
+
+def enforce(user_id: Optional[str] = None) -> Dict[str, int]:
+    """检查用户与节点的配额，超出时淘汰到低水位，返回删除的文件数与释放的字节数"""
+    from config.settings import NODE_STORAGE_QUOTA
+
+    total = {"outputs": 0, "uploads": 0, "freed": 0}
+    with _run_lock:
+        if user_id:
+            quota = user_quota(user_id)
+            used = user_usage(user_id)["total"] if quota else 0
+            if quota and used > quota:
+                for key, value in _evict(user_id, used - _target(quota)).items():
+                    total[key] += value
+        if NODE_STORAGE_QUOTA:
+            used = node_usage()
+            if used > NODE_STORAGE_QUOTA:
+                for key, value in _evict(None, used - _target(NODE_STORAGE_QUOTA)).items():
+                    total[key] += value
+
+    with _lock:
+        _stats["runs"] += 1
+        if total["outputs"] or total["uploads"]:
+            _stats["evicted_outputs"] += total["outputs"]
+            _stats["evicted_uploads"] += total["uploads"]
+            _stats["freed_bytes"] += total["freed"]
+            _stats["last_eviction"] = time.strftime("%Y-%m-%dT%H:%M:%S")
+    if total["outputs"] or total["uploads"]:
+        logger.info("Storage eviction: user=%s outputs=%s uploads=%s freed=%s",
+                    user_id, total["outputs"], total["uploads"], total["freed"])
+    return total
+
+
+async def _enforce_later(user_id: Optional[str]):
+    try:
+        await asyncio.to_thread(enforce, user_id)
+    except Exception as e:
+        logger.error("Storage eviction failed: %s", e)
+    finally:
+        with _lock:
+            _pending.discard(user_id)
+
+
+def schedule(user_id: Optional[str]):
+    """用量增加后在后台检查配额（同一用户已有待执行的检查时不重复提交）"""
+    from config.settings import GUEST_STORAGE_QUOTA, NODE_STORAGE_QUOTA, STORAGE_QUOTA
+
+    if not (NODE_STORAGE_QUOTA or STORAGE_QUOTA or GUEST_STORAGE_QUOTA):
+        return
+    with _lock:
+        if user_id in _pending:
+            return
+        _pending.add(user_id)
+    task = asyncio.get_running_loop().create_task(_enforce_later(user_id))
+    # 持有引用，避免任务在完成前被回收
+    _tasks.add(task)
+    task.add_done_callback(_tasks.discard)
+
+
+def stats() -> Dict[str, Any]:
+    """返回累计淘汰统计"""
+    with _lock:
+        return dict(_stats)
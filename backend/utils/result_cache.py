@@ -0,0 +1,225 @@
+"""翻译结果缓存
+
+相同的输入内容 + 相同的翻译参数 + 相同的术语表内容，会得到相同的译文。
+命中缓存时直接把已有的单语/双语PDF链接到新任务的输出目录，不再调用BabelDOC和LLM。
+缓存文件以硬链接保存在 RESULT_CACHE_DIR 下，不额外占用磁盘，也不受原任务删除影响。
+"""
+import hashlib
+import json
+import os
+import shutil
+import threading
+from pathlib import Path
+from typing import Any, Dict, Optional
+
+from db import ResultCache
+from models.schemas import TranslationRequest
+
+# 影响译文结果的请求字段；qps、优先级、原始文件名等不参与缓存键
+CACHE_KEY_FIELDS = ("lang_in", "lang_out", "model", "base_url", "pages", "no_dual", "no_mono", "debug")
+
+_model = None
+_lock = threading.Lock()
+_hits = 0
+_misses = 0
+_stores = 0
+_evictions = 0
+
+def get_result_cache_model() -> ResultCache:
+    """获取结果缓存模型（单例模式，使用应用级数据库实例）"""
+    global _model
+    if _model is None:
+        from utils.database import get_database
+        _model = ResultCache(get_database())
+    return _model
+
+def _sha256_file(path: Path) -> str:
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(1024 * 1024), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+def _input_sha256(file_id: str) -> Optional[str]:
+    from utils.uploads import get_upload, resolve_upload_path
+
+    upload = get_upload(file_id)
+    if upload:
+        return upload["sha256"]
+    path = resolve_upload_path(file_id)
+    return _sha256_file(path) if path else None
+
+def _normalize_pages(pages: Optional[str]) -> Optional[str]:
+    if not pages:
+        return None
+    return ",".join(part.strip() for part in pages.split(",") if part.strip()) or None
+
+def config_hash(request: TranslationRequest) -> str:
+    """对影响译文的请求参数做规范化哈希"""
+    data = {field: getattr(request, field) for field in CACHE_KEY_FIELDS}
+    data["pages"] = _normalize_pages(request.pages)
+    data["base_url"] = (request.base_url or "").rstrip("/") or None
+    return hashlib.sha256(json.dumps(data, sort_keys=True).encode()).hexdigest()
+
+def glossary_hash(glossary_ids) -> str:
+    """按术语表文件内容计算哈希（与上传时的ID无关）"""
+    from config.settings import GLOSSARIES_DIR
+    from utils.storage import get_storage
+
+    storage = get_storage()
+    digest = hashlib.sha256()
+    for glossary_id in glossary_ids:
+        path = storage.fetch(storage.key_for(GLOSSARIES_DIR / f"{glossary_id}.csv"))
+        if path is not None:
+            digest.update(_sha256_file(path).encode())
+        digest.update(b"\0")
+    return digest.hexdigest()
+
+def compute_cache_key(request: TranslationRequest) -> Optional[Dict[str, str]]:
+    """计算缓存键，源文件不存在时返回None"""
+    input_sha256 = _input_sha256(request.file_id)
+    if not input_sha256:
+        return None
+    parts = {
+        "input_sha256": input_sha256,
+        "config_hash": config_hash(request),
+        "glossary_hash": glossary_hash(request.glossary_ids),
+    }
+    parts["cache_key"] = hashlib.sha256(
+        f"{parts['input_sha256']}:{parts['config_hash']}:{parts['glossary_hash']}".encode()
+    ).hexdigest()
+    return parts
+
+def _link_or_copy(src: Path, dst: Path):
+    dst.parent.mkdir(parents=True, exist_ok=True)
+    if dst.exists():
+        dst.unlink()
+    try:
+        os.link(src, dst)
+    except OSError:
+        shutil.copy2(src, dst)
+
+def lookup(request: TranslationRequest, task_id: str) -> Optional[Dict[str, Any]]:
+    """查找缓存并把结果链接到新任务的输出目录
+
+    Returns:
+        命中时返回任务结果字典（与正常完成的 result 字段格式相同），否则None
+    """
+    global _hits, _misses
+    from config.settings import RESULT_CACHE_ENABLED, OUTPUTS_DIR, RESULT_CACHE_DIR
+
+    if not RESULT_CACHE_ENABLED:
+        return None
+
+    key = compute_cache_key(request)
+    entry = get_result_cache_model().get(key["cache_key"]) if key else None
+    if entry:
+        paths = [entry.get("mono_path"), entry.get("dual_path")]
+        if not all((RESULT_CACHE_DIR / p).exists() for p in paths if p):
+            # 缓存文件已被外部删除，条目作废
+            get_result_cache_model().delete(entry["cache_key"])
+            entry = None
+
+    if not entry:
+        with _lock:
+            _misses += 1
+        return None
+
+    output_dir = OUTPUTS_DIR / task_id
+    result = {"mono_pdf_path": None, "dual_pdf_path": None, "total_seconds": 0, "peak_memory_usage": 0}
+    for field, relpath in (("mono_pdf_path", entry.get("mono_path")), ("dual_pdf_path", entry.get("dual_path"))):
+        if relpath:
+            target = output_dir / Path(relpath).name
+            _link_or_copy(RESULT_CACHE_DIR / relpath, target)
+            result[field] = str(target)
+
+    get_result_cache_model().touch(entry["cache_key"])
+    with _lock:
+        _hits += 1
+    return result
+
+def store(request: TranslationRequest, task_id: str, result: Dict[str, Any]) -> bool:
+    """任务完成后把输出登记到缓存"""
+    global _stores
+    from config.settings import RESULT_CACHE_ENABLED, RESULT_CACHE_DIR
+
+    if not RESULT_CACHE_ENABLED or not result:
+        return False
+
+    key = compute_cache_key(request)
+    if not key:
+        return False
+
+    entry = dict(key, source_task_id=task_id, size=0)
+    cache_dir = RESULT_CACHE_DIR / key["cache_key"]
+    for field, column in (("mono_pdf_path", "mono_path"), ("dual_pdf_path", "dual_path")):
+        path = result.get(field)
+        if not path or not Path(path).exists():
+            continue
+        relpath = f"{key['cache_key']}/{Path(path).name}"
+        _link_or_copy(Path(path), cache_dir / Path(path).name)
+        entry[column] = relpath
+        entry["size"] += Path(path).stat().st_size
+
+    if not entry.get("mono_path") and not entry.get("dual_path"):
+        return False
+
+    stored = get_result_cache_model().put(entry)
+    if stored:
+        with _lock:
+            _stores += 1
+        evict()
+    return stored
+
+def _remove_entry(entry: Dict[str, Any]):
+    global _evictions
+    from config.settings import RESULT_CACHE_DIR
+
+    shutil.rmtree(RESULT_CACHE_DIR / entry["cache_key"], ignore_errors=True)
+    get_result_cache_model().delete(entry["cache_key"])
+    with _lock:
+        _evictions += 1
+
+def evict() -> int:
+    """按保留天数和总大小淘汰缓存，返回淘汰条目数"""
+    from config.settings import RESULT_CACHE_MAX_AGE_DAYS, RESULT_CACHE_MAX_BYTES
+
+    removed = 0
+    model = get_result_cache_model()
+    if RESULT_CACHE_MAX_AGE_DAYS > 0:
+        for entry in model.list_expired(RESULT_CACHE_MAX_AGE_DAYS):
+            _remove_entry(entry)
+            removed += 1
+
+    if RESULT_CACHE_MAX_BYTES > 0:
+        total = model.totals()["size"]
+        if total > RESULT_CACHE_MAX_BYTES:
+            for entry in model.list_lru():
+                if total <= RESULT_CACHE_MAX_BYTES:
+                    break
+                _remove_entry(entry)
+                total -= entry.get("size") or 0
+                removed += 1
+    return removed
+
+def stats() -> Dict[str, Any]:
+    """返回缓存命中统计"""
+    from config.settings import RESULT_CACHE_ENABLED
+
+    try:
+        totals = get_result_cache_model().totals()
+    except Exception:
+        totals = {"entries": 0, "size": 0, "hits": 0}
+    with _lock:
+        lookups = _hits + _misses
+        return {
+            "enabled": RESULT_CACHE_ENABLED,
+            "entries": totals["entries"],
+            "size": totals["size"],
+            "hits": _hits,
+            "misses": _misses,
+            "hit_rate": round(_hits / lookups, 4) if lookups else 0.0,
+            "stores": _stores,
+            "evictions": _evictions,
+            "lifetime_hits": totals["hits"],
+        }
@@ -0,0 +1,196 @@
+"""历史记录保留策略与数据库压缩
+
+已结束的任务超过保留天数、或超出每个用户保留的条数时，整行移入 translation_history_archive
+（任务仍可按ID查询和下载，只是不再出现在历史列表中），使主表大小保持有界。删除和归档留下的
+空闲页通过 auto_vacuum=INCREMENTAL 的增量 VACUUM 逐步归还给文件系统。
+PostgreSQL 后端由服务器的 autovacuum 回收空间，这里只执行归档。
+"""
+import asyncio
+import logging
+import threading
+import time
+from typing import Any, Dict, Optional
+
+logger = logging.getLogger("easy_babeldoc.retention")
+
+# 每个事务归档的条数，避免长时间持有写锁
+ARCHIVE_BATCH = 500
+
+AUTO_VACUUM_MODES = {0: "none", 1: "full", 2: "incremental"}
+
+_run_lock = threading.Lock()
+_stats_lock = threading.Lock()
+_stats = {"runs": 0, "archived": 0, "purged": 0, "vacuumed_pages": 0, "last_run": None, "last_result": None}
+
+
+class RetentionBusyError(Exception):
+    """已有一次保留策略任务在执行"""
+
+
+def _history_model():
+    from utils.history import get_db
+    return get_db()
+
+
+def vacuum_info() -> Dict[str, Any]:
+    """返回数据库文件的页统计与 auto_vacuum 模式"""
+    from utils.database import get_database
+
+    database = get_database()
+    if database.dialect != "sqlite":
+        row = database.fetchone("SELECT pg_database_size(current_database())")
+        return {"auto_vacuum": "autovacuum", "file_bytes": row[0]}
+
+    with database.get_connection() as conn:
+        mode = conn.execute("PRAGMA auto_vacuum").fetchone()[0]
+        page_size = conn.execute("PRAGMA page_size").fetchone()[0]
+        page_count = conn.execute("PRAGMA page_count").fetchone()[0]
+        freelist = conn.execute("PRAGMA freelist_count").fetchone()[0]
+    return {
+        "auto_vacuum": AUTO_VACUUM_MODES.get(mode, str(mode)),
+        "page_size": page_size,
+        "page_count": page_count,
+        "freelist_count": freelist,
+        "file_bytes": page_size * page_count,
+        "free_bytes": page_size * freelist,
+    }
+
+
+def incremental_vacuum(max_pages: int) -> int:
+    """回收最多 max_pages 个空闲页（0 表示全部），返回回收的页数
+
+    数据库不是 INCREMENTAL 模式（或不是 SQLite）时不做任何事。
+    """
+    from utils.database import get_database
+
+    database = get_database()
+    if database.dialect != "sqlite":
+        return 0
+
+    with database.get_connection() as conn:
+        if conn.execute("PRAGMA auto_vacuum").fetchone()[0] != 2:
+            return 0
+        before = conn.execute("PRAGMA freelist_count").fetchone()[0]
+        if not before:
+            return 0
+        # incremental_vacuum 每一步只回收一页，executescript 会把语句执行到底
+        conn.executescript(f"PRAGMA incremental_vacuum({int(max_pages)});")
+        after = conn.execute("PRAGMA freelist_count").fetchone()[0]
+    return before - after
+
+
+def convert_to_incremental() -> Dict[str, Any]:
+    """把已有数据库切换到 auto_vacuum=INCREMENTAL（执行一次完整 VACUUM，期间阻塞所有写入）"""
+    from utils.database import get_database
+
+    database = get_database()
+    if database.dialect != "sqlite":
+        return vacuum_info()
+
+    with database.get_connection() as conn:
+        if conn.execute("PRAGMA auto_vacuum").fetchone()[0] != 2:
+            conn.execute("PRAGMA auto_vacuum = INCREMENTAL")
+            conn.execute("VACUUM")
+    return vacuum_info()
+
+
+def apply_retention(max_age_days: int, max_per_user: int, archive_days: int = 0,
+                    dry_run: bool = False) -> Dict[str, int]:
+    """按保留策略归档历史记录，并清理过期的归档
+
+    Args:
+        max_age_days: 已结束任务的保留天数（0 表示不按时间归档）
+        max_per_user: 每个用户保留的已结束任务数（0 表示不限）
+        archive_days: 归档记录的保留天数（0 表示永久保留）
+        dry_run: 只统计需要归档的条数，不做修改
+    """
+    model = _history_model()
+    result = {"archived": 0, "purged": 0}
+
+    if dry_run:
+        result["archived"] = len(model.list_archivable(max_age_days, max_per_user, limit=None))
+        return result
+
+    while True:
+        task_ids = model.list_archivable(max_age_days, max_per_user, ARCHIVE_BATCH)
+        if not task_ids:
+            break
+        result["archived"] += model.archive_many(task_ids)
+        if len(task_ids) < ARCHIVE_BATCH:
+            break
+
+    if archive_days > 0:
+        result["purged"] = model.purge_archive(archive_days)
+    return result
+
+
+def run_maintenance(max_age_days: Optional[int] = None, max_per_user: Optional[int] = None,
+                    archive_days: Optional[int] = None, vacuum_pages: Optional[int] = None,
+                    dry_run: bool = False) -> Dict[str, Any]:
+    """执行一次保留策略与增量 VACUUM，未传入的参数使用配置值
+
+    Raises:
+        RetentionBusyError: 已有任务在执行
+    """
+    from config.settings import (
+        HISTORY_RETENTION_DAYS,
+        HISTORY_MAX_PER_USER,
+        HISTORY_ARCHIVE_RETENTION_DAYS,
+        VACUUM_MAX_PAGES,
+    )
+
+    if not _run_lock.acquire(blocking=False):
+        raise RetentionBusyError("保留策略任务正在执行")
+    try:
+        started = time.monotonic()
+        policy = {
+            "max_age_days": HISTORY_RETENTION_DAYS if max_age_days is None else max_age_days,
+            "max_per_user": HISTORY_MAX_PER_USER if max_per_user is None else max_per_user,
+            "archive_days": HISTORY_ARCHIVE_RETENTION_DAYS if archive_days is None else archive_days,
+        }
+        result = apply_retention(dry_run=dry_run, **policy)
+        result["vacuumed_pages"] = 0
+        if not dry_run:
+            result["vacuumed_pages"] = incremental_vacuum(VACUUM_MAX_PAGES if vacuum_pages is None else vacuum_pages)
+        result.update({
+            "dry_run": dry_run,
+            "policy": policy,
+            "rows": _history_model().count_rows(),
+            "database": vacuum_info(),
+            "seconds": round(time.monotonic() - started, 3),
+        })
+    finally:
+        _run_lock.release()
+
+    if not dry_run:
+        with _stats_lock:
+            _stats["runs"] += 1
+            _stats["archived"] += result["archived"]
+            _stats["purged"] += result["purged"]
+            _stats["vacuumed_pages"] += result["vacuumed_pages"]
+            _stats["last_run"] = time.strftime("%Y-%m-%dT%H:%M:%S")
+            _stats["last_result"] = {key: result[key] for key in ("archived", "purged", "vacuumed_pages", "seconds")}
+    return result
+
+
+async def run_retention_loop(interval_seconds: int):
+    """后台循环：启动 5 分钟后（间隔更短时按间隔）执行第一次，之后每隔 interval_seconds 秒执行一次"""
+    delay = min(interval_seconds, 300)
+    while True:
+        await asyncio.sleep(delay)
+        delay = interval_seconds
+        try:
+            result = await asyncio.to_thread(run_maintenance)
+            if result["archived"] or result["purged"] or result["vacuumed_pages"]:
+                logger.info("History retention: archived=%s purged=%s vacuumed_pages=%s",
+                            result["archived"], result["purged"], result["vacuumed_pages"])
+        except RetentionBusyError:
+            pass
+        except Exception as e:
+            logger.error("History retention failed: %s", e)
+
+
+def stats() -> Dict[str, Any]:
+    """返回累计执行统计"""
+    with _stats_lock:
+        return dict(_stats)
@@ -0,0 +1,233 @@
+"""翻译任务调度器
+
+在 run_translation 之前做准入控制：全局并发上限、单用户并发上限，
+以及按优先级 + 提交顺序排列的等待队列。排队中的任务会在
+active_translations 中显示 "queued" 状态和队列位置。
+"""
+import asyncio
+import bisect
+import itertools
+import logging
+from datetime import datetime
+from typing import Any, Awaitable, Callable, Dict, List, Optional
+
+logger = logging.getLogger("easy_babeldoc.scheduler")
+
+
+class QueueFullError(Exception):
+    """等待队列已满"""
+
+
+class ScheduledJob:
+    """调度队列中的单个任务"""
+
+    def __init__(self, task_id: str, user_id: str, runner: Callable[[], Awaitable[Any]],
+                 priority: int, seq: int):
+        self.task_id = task_id
+        self.user_id = user_id
+        self.runner = runner
+        self.priority = priority
+        self.seq = seq
+        self.enqueued_at = datetime.now().isoformat()
+
+    @property
+    def sort_key(self):
+        # 优先级高的先执行，同优先级按提交顺序
+        return (-self.priority, self.seq)
+
+
+class TranslationScheduler:
+    """带全局/单用户并发限制的任务调度器"""
+
+    def __init__(self, max_concurrent: int, max_per_user: int, max_queued: int,
+                 task_states: Optional[Dict[str, Dict]] = None):
+        """初始化
+
+        Args:
+            max_concurrent: 全局同时运行的任务数上限
+            max_per_user: 单个用户同时运行的任务数上限
+            max_queued: 等待队列长度上限
+            task_states: 任务状态字典（通常为 active_translations），用于写入排队位置
+        """
+        self.max_concurrent = max(max_concurrent, 1)
+        self.max_per_user = max(max_per_user, 1)
+        self.max_queued = max(max_queued, 0)
+        self.task_states = task_states if task_states is not None else {}
+        self._queue: List[ScheduledJob] = []
+        self._keys: List[tuple] = []
+        self._running: Dict[str, asyncio.Task] = {}
+        self._running_users: Dict[str, str] = {}
+        self._seq = itertools.count()
+        self._submitted = 0
+        self._started = 0
+        self._rejected = 0
+
+    def submit(self, task_id: str, user_id: str, runner: Callable[[], Awaitable[Any]],
+               priority: int = 0) -> int:
+        """提交任务
+
+        Args:
+            task_id: 任务ID
+            user_id: 用户ID
+            runner: 返回协程的可调用对象，任务被调度时调用
+            priority: 优先级，数值越大越先执行
+
+        Returns:
+            提交后的队列位置，0 表示已立即开始运行
+        """
+        if len(self._queue) >= self.max_queued and not self._can_start(user_id):
+            self._rejected += 1
+            raise QueueFullError("等待队列已满")
+
+        job = ScheduledJob(task_id, user_id, runner, priority, next(self._seq))
+        index = bisect.bisect(self._keys, job.sort_key)
+        self._keys.insert(index, job.sort_key)
+        self._queue.insert(index, job)
+        self._submitted += 1
+
+        self._dispatch()
+        return self.position(task_id)
+
+    def cancel(self, task_id: str) -> bool:
+        """取消排队中或运行中的任务
+
+        Returns:
+            是否找到并取消了任务
+        """
+        for index, job in enumerate(self._queue):
+            if job.task_id == task_id:
+                del self._queue[index]
+                del self._keys[index]
+                self._refresh_positions()
+                return True
+
+        task = self._running.get(task_id)
+        if task is not None:
+            task.cancel()
+            return True
+        return False
+
+    def shutdown(self) -> List[asyncio.Task]:
+        """清空等待队列并取消所有运行中的任务
+
+        Returns:
+            被取消的任务列表，调用方可等待其结束
+        """
+        self._queue.clear()
+        self._keys.clear()
+        tasks = list(self._running.values())
+        for task in tasks:
+            task.cancel()
+        return tasks
+
+    def position(self, task_id: str) -> int:
+        """返回任务在队列中的位置（从1开始），运行中或不存在返回0"""
+        for index, job in enumerate(self._queue):
+            if job.task_id == task_id:
+                return index + 1
+        return 0
+
+    def is_running(self, task_id: str) -> bool:
+        return task_id in self._running
+
+    def snapshot(self, user_id: Optional[str] = None) -> Dict[str, Any]:
+        """返回调度器状态；指定 user_id 时只列出该用户的任务"""
+        queued = [
+            {
+                "task_id": job.task_id,
+                "position": index + 1,
+                "priority": job.priority,
+                "enqueued_at": job.enqueued_at,
+            }
+            for index, job in enumerate(self._queue)
+            if user_id is None or job.user_id == user_id
+        ]
+        running = [
+            task_id for task_id, owner in self._running_users.items()
+            if user_id is None or owner == user_id
+        ]
+        return {
+            "max_concurrent": self.max_concurrent,
+            "max_per_user": self.max_per_user,
+            "max_queued": self.max_queued,
+            "running_count": len(self._running),
+            "queued_count": len(self._queue),
+            "running": running,
+            "queued": queued,
+            "stats": {
+                "submitted": self._submitted,
+                "started": self._started,
+                "rejected": self._rejected,
+            },
+        }
+
+    def _user_running(self, user_id: str) -> int:
+        return sum(1 for owner in self._running_users.values() if owner == user_id)
+
+    def _can_start(self, user_id: str) -> bool:
+        return (len(self._running) < self.max_concurrent
+                and self._user_running(user_id) < self.max_per_user)
+
+    def _dispatch(self):
+        """按队列顺序启动可运行的任务，跳过已达到单用户上限的任务"""
+        index = 0
+        while index < len(self._queue) and len(self._running) < self.max_concurrent:
+            job = self._queue[index]
+            if self._user_running(job.user_id) >= self.max_per_user:
+                index += 1
+                continue
+            del self._queue[index]
+            del self._keys[index]
+            self._start(job)
+        self._refresh_positions()
+
+    def _start(self, job: ScheduledJob):
+        task = asyncio.get_running_loop().create_task(job.runner())
+        self._running[job.task_id] = task
+        self._running_users[job.task_id] = job.user_id
+        self._started += 1
+        state = self.task_states.get(job.task_id)
+        if state is not None:
+            state.pop("queue_position", None)
+        task.add_done_callback(lambda _t, task_id=job.task_id: self._on_done(task_id))
+        logger.info("Started task %s (%s running, %s queued)", job.task_id, len(self._running), len(self._queue))
+
+    def _on_done(self, task_id: str):
+        self._running.pop(task_id, None)
+        self._running_users.pop(task_id, None)
+        self._dispatch()
+
+    def _refresh_positions(self):
+        for index, job in enumerate(self._queue):
+            state = self.task_states.get(job.task_id)
+            if state is not None and state.get("status") == "queued":
+                state["queue_position"] = index + 1
+                state["message"] = f"前面还有 {index} 个任务"
+
+
+_scheduler: Optional[TranslationScheduler] = None
+
+
+def user_priority(user_id: str) -> int:
+    """按用户类型决定任务的调度优先级：访客使用 GUEST_JOB_PRIORITY，其余为 0（会查询数据库，需在线程中调用）"""
+    from config.settings import GUEST_JOB_PRIORITY
+    from utils.user_cache import lookup_user
+
+    if GUEST_JOB_PRIORITY == 0:
+        return 0
+    user = lookup_user(user_id)
+    return GUEST_JOB_PRIORITY if user and user.get("is_guest") else 0
+
+
+def get_scheduler(task_states: Optional[Dict[str, Dict]] = None) -> TranslationScheduler:
+    """获取全局调度器（单例模式）"""
+    global _scheduler
+    if _scheduler is None:
+        from config.settings import MAX_CONCURRENT_TRANSLATIONS, MAX_TRANSLATIONS_PER_USER, MAX_QUEUED_TRANSLATIONS
+        _scheduler = TranslationScheduler(
+            max_concurrent=MAX_CONCURRENT_TRANSLATIONS,
+            max_per_user=MAX_TRANSLATIONS_PER_USER,
+            max_queued=MAX_QUEUED_TRANSLATIONS,
+            task_states=task_states,
+        )
+    return _scheduler
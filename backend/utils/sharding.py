@@ -0,0 +1,217 @@
+"""大文档分片翻译
+
+把文档按页拆成多个分片，每个分片作为独立的BabelDOC任务并发运行（工作进程模式下
+分布在不同的工作进程中），分片只输出自己负责的页。各分片的进度按页数加权汇总为
+一个任务的进度，全部完成后把分片的单语/双语PDF按页序合并为最终结果。
+"""
+import asyncio
+import logging
+import shutil
+import time
+from pathlib import Path
+from typing import Any, AsyncIterator, Callable, Dict, List, Optional
+
+from models.schemas import TranslationRequest
+
+logger = logging.getLogger("easy_babeldoc.sharding")
+
+
+def count_pages(path: Path) -> int:
+    """读取PDF页数"""
+    import pymupdf
+
+    with pymupdf.open(path) as doc:
+        return doc.page_count
+
+
+def parse_pages(spec: Optional[str], page_count: int) -> List[int]:
+    """把BabelDOC的页码参数（如 "1,3,5-10"、"20-"、"-3"）展开为有序页码列表（从1开始）"""
+    if not spec:
+        return list(range(1, page_count + 1))
+
+    pages = set()
+    for part in spec.split(","):
+        part = part.strip()
+        if not part:
+            continue
+        if "-" in part:
+            start, end = part.split("-", 1)
+            first = int(start) if start.strip() else 1
+            last = int(end) if end.strip() else page_count
+        else:
+            first = last = int(part)
+        pages.update(range(max(first, 1), min(last, page_count) + 1))
+    return sorted(pages)
+
+
+def format_pages(pages: List[int]) -> str:
+    """把有序页码列表压缩为BabelDOC的页码参数"""
+    ranges = []
+    start = prev = pages[0]
+    for page in pages[1:]:
+        if page == prev + 1:
+            prev = page
+            continue
+        ranges.append(f"{start}-{prev}" if start != prev else str(start))
+        start = prev = page
+    ranges.append(f"{start}-{prev}" if start != prev else str(start))
+    return ",".join(ranges)
+
+
+def plan_shards(pages: List[int], shard_pages: int) -> List[List[int]]:
+    """按每片页数把页码列表切分为分片"""
+    shard_pages = max(shard_pages, 1)
+    return [pages[i:i + shard_pages] for i in range(0, len(pages), shard_pages)]
+
+
+def merge_pdfs(paths: List[str], output: Path):
+    """按顺序合并多个PDF"""
+    import pymupdf
+
+    merged = pymupdf.open()
+    try:
+        for path in paths:
+            with pymupdf.open(path) as doc:
+                merged.insert_pdf(doc)
+        merged.save(output, garbage=3, deflate=True)
+    finally:
+        merged.close()
+
+
+def shard_task_id(task_id: str, index: int) -> str:
+    return f"{task_id}.shard{index + 1}"
+
+
+def _merge_results(task_id: str, results: List[Dict[str, Any]], total_seconds: float) -> Dict[str, Any]:
+    """合并分片输出，返回与普通任务相同格式的结果"""
+    from config.settings import OUTPUTS_DIR
+    from utils.translation_memory import merge_stats
+
+    output_dir = OUTPUTS_DIR / task_id
+    output_dir.mkdir(parents=True, exist_ok=True)
+    merged = {
+        "mono_pdf_path": None,
+        "dual_pdf_path": None,
+        "total_seconds": total_seconds,
+        "peak_memory_usage": max((r.get("peak_memory_usage") or 0) for r in results),
+    }
+    memory_stats = merge_stats(r.get("translation_memory") for r in results)
+    if memory_stats:
+        merged["translation_memory"] = memory_stats
+    for field in ("mono_pdf_path", "dual_pdf_path"):
+        paths = [r.get(field) for r in results]
+        if not all(paths):
+            continue
+        target = output_dir / Path(paths[0]).name
+        merge_pdfs(paths, target)
+        merged[field] = str(target)
+    return merged
+
+
+def _remove_shard_outputs(task_id: str, count: int):
+    from config.settings import OUTPUTS_DIR
+
+    for index in range(count):
+        shutil.rmtree(OUTPUTS_DIR / shard_task_id(task_id, index), ignore_errors=True)
+
+
+async def iter_sharded_events(
+    task_id: str,
+    request: TranslationRequest,
+    run_events: Callable[[str, TranslationRequest], AsyncIterator[Dict[str, Any]]],
+    shard_pages: int,
+    max_parallel: int,
+) -> AsyncIterator[Dict[str, Any]]:
+    """分片运行翻译，产出汇总后的进度事件
+
+    Args:
+        task_id: 任务ID
+        request: 翻译请求（sharded=True）
+        run_events: 运行单个分片的函数，参数为 (分片任务ID, 分片请求)，返回事件异步迭代器
+        shard_pages: 每个分片的页数
+        max_parallel: 同时运行的分片数上限
+    """
+    from utils.uploads import resolve_upload_path
+
+    input_path = resolve_upload_path(request.file_id)
+    if input_path is None:
+        raise FileNotFoundError("源文件不存在")
+
+    page_count = await asyncio.to_thread(count_pages, input_path)
+    try:
+        pages = parse_pages(request.pages, page_count)
+    except ValueError:
+        raise ValueError(f"页码范围格式错误: {request.pages}")
+    if not pages:
+        raise ValueError("页码范围内没有可翻译的页面")
+
+    shards = plan_shards(pages, shard_pages)
+    if len(shards) == 1:
+        # 页数不足一个分片时按普通任务运行，输出保留全部页面
+        async for event in run_events(task_id, request.model_copy(update={"sharded": False})):
+            yield event
+        return
+
+    count = len(shards)
+    weights = [len(shard) for shard in shards]
+    total_weight = sum(weights)
+    progress = [0.0] * count
+    results: List[Optional[Dict[str, Any]]] = [None] * count
+    queue: asyncio.Queue = asyncio.Queue()
+    semaphore = asyncio.Semaphore(max(max_parallel, 1))
+    started_at = time.monotonic()
+    logger.info("Task %s: %s pages in %s shard(s)", task_id, len(pages), count)
+
+    async def run_shard(index: int):
+        shard_request = request.model_copy(update={"pages": format_pages(shards[index]), "sharded": True})
+        async with semaphore:
+            events = run_events(shard_task_id(task_id, index), shard_request)
+            try:
+                finished = False
+                async for event in events:
+                    finished = finished or event.get("type") in ("finish", "error")
+                    await queue.put((index, event))
+                if not finished:
+                    await queue.put((index, {"type": "error", "error": "分片未产生翻译结果"}))
+            except Exception as e:
+                await queue.put((index, {"type": "error", "error": str(e)}))
+            finally:
+                await events.aclose()
+
+    def aggregated(stage: str, message: str) -> Dict[str, Any]:
+        overall = sum(p * w for p, w in zip(progress, weights)) / total_weight
+        return {
+            "type": "progress_update",
+            "overall_progress": round(min(overall, 99.0), 2),
+            "stage": stage,
+            "message": message,
+            "shards_total": count,
+            "shards_done": sum(1 for r in results if r is not None),
+        }
+
+    workers = [asyncio.create_task(run_shard(index)) for index in range(count)]
+    try:
+        while any(r is None for r in results):
+            index, event = await queue.get()
+            kind = event.get("type")
+            if kind == "progress_update":
+                progress[index] = float(event.get("overall_progress") or 0)
+            elif kind == "finish":
+                progress[index] = 100.0
+                results[index] = event.get("translate_result") or {}
+            elif kind == "error":
+                yield {"type": "error", "error": f"第 {index + 1}/{count} 个分片失败: {event.get('error', '未知错误')}"}
+                return
+            else:
+                continue
+            done = sum(1 for r in results if r is not None)
+            yield aggregated(f"分片翻译（{done}/{count}）", f"第 {index + 1} 个分片: {event.get('stage', '完成')}")
+
+        yield aggregated("合并分片", f"正在合并 {count} 个分片的输出")
+        merged = await asyncio.to_thread(_merge_results, task_id, results, round(time.monotonic() - started_at, 2))
+        yield {"type": "finish", "translate_result": merged}
+    finally:
+        for worker in workers:
+            worker.cancel()
+        await asyncio.gather(*workers, return_exceptions=True)
+        await asyncio.to_thread(_remove_shard_outputs, task_id, count)
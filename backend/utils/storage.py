@@ -0,0 +1,298 @@
+"""文件存储后端
+
+上传文件、翻译输出和术语表按相对 DATA_DIR 的键存放，例如 uploads/blobs/ab/<sha256>.pdf、
+outputs/<task_id>/<name>.pdf、glossaries/<id>.csv。默认的 LocalStorage 就是 DATA_DIR 本身，
+与之前的目录结构完全一致。设置 EASY_BABELDOC_STORAGE_BACKEND=s3 时使用 S3 兼容的对象存储
+（AWS S3、MinIO 等），多个节点不再需要共享 NFS：
+
+- DATA_DIR 作为本节点的本地缓存：文件在本地生成后上传（超过分段大小时自动分段上传），
+  翻译工作进程读取输入文件、术语表时先下载到本地缓存，之后直接使用本地文件
+- 下载时本节点有缓存直接发送，否则返回预签名 URL 重定向，或由服务器分段转发对象内容
+- 所有节点需要使用相同的 DATA_DIR 路径（数据库中记录的是本地路径，键由路径推出）
+"""
+import logging
+import os
+import threading
+import uuid
+from pathlib import Path
+from typing import Any, BinaryIO, Dict, Iterator, List, Optional, Tuple
+
+logger = logging.getLogger("easy_babeldoc.storage")
+
+_storage = None
+_lock = threading.Lock()
+
+
+class LocalStorage:
+    """本地文件系统存储（默认）"""
+
+    backend = "local"
+    remote = False
+
+    def __init__(self, root: Path):
+        self.root = Path(root)
+        self._resolved_root = self.root.resolve()
+        self._stats = {"uploaded": 0, "uploaded_bytes": 0, "fetched": 0, "fetched_bytes": 0, "cache_hits": 0}
+
+    def _count(self, key: str, value: int = 1):
+        with _lock:
+            self._stats[key] += value
+
+    def key_for(self, path) -> Optional[str]:
+        """本地路径对应的键，不在 DATA_DIR 下时返回None"""
+        try:
+            return Path(path).resolve().relative_to(self._resolved_root).as_posix()
+        except ValueError:
+            return None
+
+    def local_path(self, key: str) -> Path:
+        return self.root / key
+
+    def save(self, key: str, source: Path):
+        """保存文件：source 不在键对应的位置时移动过去"""
+        target = self.local_path(key)
+        if Path(source).resolve() != target.resolve():
+            target.parent.mkdir(parents=True, exist_ok=True)
+            os.replace(source, target)
+
+    def fetch(self, key: str) -> Optional[Path]:
+        """返回可直接读取的本地文件，不存在时返回None"""
+        path = self.local_path(key)
+        return path if path.exists() else None
+
+    def exists(self, key: str) -> bool:
+        return self.local_path(key).exists()
+
+    def size(self, key: str) -> Optional[int]:
+        """文件大小，不存在时返回None"""
+        try:
+            return self.local_path(key).stat().st_size
+        except OSError:
+            return None
+
+    def delete(self, key: str):
+        self.local_path(key).unlink(missing_ok=True)
+
+    def list_keys(self, prefix: str) -> List[str]:
+        """列出目录 prefix 下的文件（不递归）"""
+        directory = self.local_path(prefix)
+        if not directory.is_dir():
+            return []
+        with os.scandir(directory) as entries:
+            return [f"{prefix.rstrip('/')}/{entry.name}" for entry in entries if entry.is_file()]
+
+    def open(self, path) -> Tuple[BinaryIO, int]:
+        """打开文件用于读取，返回 (文件对象, 大小)；不存在时抛出 FileNotFoundError"""
+        f = open(path, "rb")
+        return f, os.fstat(f.fileno()).st_size
+
+    def presigned_url(self, key: str, filename: str) -> Optional[str]:
+        return None
+
+    def iter_range(self, key: str, start: int, end: int, chunk_size: int) -> Iterator[bytes]:
+        """按块读取 [start, end) 区间的内容"""
+        with open(self.local_path(key), "rb") as f:
+            f.seek(start)
+            remaining = end - start
+            while remaining > 0:
+                chunk = f.read(min(chunk_size, remaining))
+                if not chunk:
+                    break
+                remaining -= len(chunk)
+                yield chunk
+
+    def stats(self) -> Dict[str, Any]:
+        with _lock:
+            return dict(self._stats, backend=self.backend)
+
+
+def _import_boto3():
+    try:
+        import boto3
+        from boto3.s3.transfer import TransferConfig
+        from botocore.config import Config
+    except ImportError as e:
+        raise RuntimeError("使用 S3 存储需要安装 boto3: pip install boto3") from e
+    return boto3, TransferConfig, Config
+
+
+class S3Storage(LocalStorage):
+    """S3 兼容的对象存储，DATA_DIR 作为本地缓存"""
+
+    backend = "s3"
+    remote = True
+
+    def __init__(self, root: Path, bucket: str, prefix: str = "", endpoint_url: Optional[str] = None,
+                 region: Optional[str] = None, part_size: int = 8 * 1024 * 1024, presign_seconds: int = 300):
+        """初始化客户端
+
+        Args:
+            root: 本地缓存目录（DATA_DIR）
+            bucket: 存储桶
+            prefix: 对象键前缀（多个部署共用一个存储桶时使用）
+            endpoint_url: 非 AWS 的 S3 兼容服务地址，例如 http://minio:9000
+            region: 区域
+            part_size: 分段上传 / 下载的分段大小
+            presign_seconds: 预签名下载 URL 的有效期
+        """
+        super().__init__(root)
+        boto3, TransferConfig, Config = _import_boto3()
+        self.bucket = bucket
+        self.prefix = prefix.strip("/") + "/" if prefix.strip("/") else ""
+        self.presign_seconds = presign_seconds
+        # 凭据按 boto3 的默认方式读取（AWS_ACCESS_KEY_ID 等环境变量、配置文件或实例角色）
+        self.client = boto3.client(
+            "s3",
+            endpoint_url=endpoint_url or None,
+            region_name=region or None,
+            config=Config(signature_version="s3v4", retries={"max_attempts": 3, "mode": "standard"}),
+        )
+        self.transfer = TransferConfig(multipart_threshold=part_size, multipart_chunksize=part_size,
+                                       max_concurrency=4)
+
+    def _object_key(self, key: str) -> str:
+        return self.prefix + key
+
+    @staticmethod
+    def _not_found(error) -> bool:
+        code = str(error.response.get("Error", {}).get("Code", ""))
+        return code in ("404", "NoSuchKey", "NotFound")
+
+    def save(self, key: str, source: Path):
+        """上传到对象存储（大文件分段上传），本地副本保留为缓存"""
+        super().save(key, source)
+        path = self.local_path(key)
+        self.client.upload_file(str(path), self.bucket, self._object_key(key), Config=self.transfer)
+        self._count("uploaded")
+        self._count("uploaded_bytes", path.stat().st_size)
+
+    def fetch(self, key: str) -> Optional[Path]:
+        """本地缓存没有时从对象存储下载（先写临时文件再重命名，并发下载互不影响）"""
+        from botocore.exceptions import ClientError
+
+        path = self.local_path(key)
+        if path.exists():
+            self._count("cache_hits")
+            return path
+        path.parent.mkdir(parents=True, exist_ok=True)
+        tmp_path = path.with_name(f".{uuid.uuid4()}.part")
+        try:
+            self.client.download_file(self.bucket, self._object_key(key), str(tmp_path), Config=self.transfer)
+            os.replace(tmp_path, path)
+        except ClientError as e:
+            if self._not_found(e):
+                return None
+            raise
+        finally:
+            tmp_path.unlink(missing_ok=True)
+        self._count("fetched")
+        self._count("fetched_bytes", path.stat().st_size)
+        return path
+
+    def exists(self, key: str) -> bool:
+        from botocore.exceptions import ClientError
+
+        if self.local_path(key).exists():
+            return True
+        try:
+            self.client.head_object(Bucket=self.bucket, Key=self._object_key(key))
+            return True
+        except ClientError as e:
+            if self._not_found(e):
+                return False
+            raise
+
+    def size(self, key: str) -> Optional[int]:
+        """本地缓存存在时取缓存大小，否则查询对象大小"""
+        from botocore.exceptions import ClientError
+
+        local_size = super().size(key)
+        if local_size is not None:
+            return local_size
+        try:
+            return self.client.head_object(Bucket=self.bucket, Key=self._object_key(key))["ContentLength"]
+        except ClientError as e:
+            if self._not_found(e):
+                return None
+            raise
+
+    def delete(self, key: str):
+        self.client.delete_object(Bucket=self.bucket, Key=self._object_key(key))
+        super().delete(key)
+
+    def list_keys(self, prefix: str) -> List[str]:
+        keys = []
+        paginator = self.client.get_paginator("list_objects_v2")
+        start = len(self.prefix)
+        for page in paginator.paginate(Bucket=self.bucket, Prefix=self._object_key(prefix.rstrip("/") + "/"),
+                                       Delimiter="/"):
+            keys.extend(item["Key"][start:] for item in page.get("Contents", []))
+        return keys
+
+    def open(self, path) -> Tuple[BinaryIO, int]:
+        """本地缓存存在时打开本地文件，否则直接读取对象内容（不写入缓存）"""
+        from botocore.exceptions import ClientError
+
+        if os.path.exists(path):
+            return super().open(path)
+        key = self.key_for(path)
+        if key is None:
+            raise FileNotFoundError(path)
+        try:
+            response = self.client.get_object(Bucket=self.bucket, Key=self._object_key(key))
+        except ClientError as e:
+            if self._not_found(e):
+                raise FileNotFoundError(path) from e
+            raise
+        return response["Body"], response["ContentLength"]
+
+    def presigned_url(self, key: str, filename: str) -> Optional[str]:
+        return self.client.generate_presigned_url(
+            "get_object",
+            Params={
+                "Bucket": self.bucket,
+                "Key": self._object_key(key),
+                "ResponseContentDisposition": f'attachment; filename="{filename}"',
+            },
+            ExpiresIn=self.presign_seconds,
+        )
+
+    def iter_range(self, key: str, start: int, end: int, chunk_size: int) -> Iterator[bytes]:
+        if self.local_path(key).exists():
+            yield from super().iter_range(key, start, end, chunk_size)
+            return
+        response = self.client.get_object(Bucket=self.bucket, Key=self._object_key(key),
+                                          Range=f"bytes={start}-{end - 1}")
+        body = response["Body"]
+        try:
+            yield from body.iter_chunks(chunk_size)
+        finally:
+            body.close()
+
+    def stats(self) -> Dict[str, Any]:
+        return dict(super().stats(), bucket=self.bucket)
+
+
+def create_storage():
+    """根据配置创建存储后端"""
+    from config.settings import (
+        DATA_DIR, S3_BUCKET, S3_ENDPOINT_URL, S3_PART_SIZE, S3_PREFIX, S3_PRESIGN_SECONDS, S3_REGION,
+        STORAGE_BACKEND,
+    )
+
+    if STORAGE_BACKEND == "s3":
+        if not S3_BUCKET:
+            raise RuntimeError("使用 S3 存储需要设置 EASY_BABELDOC_S3_BUCKET")
+        return S3Storage(DATA_DIR, S3_BUCKET, S3_PREFIX, S3_ENDPOINT_URL, S3_REGION,
+                         S3_PART_SIZE, S3_PRESIGN_SECONDS)
+    return LocalStorage(DATA_DIR)
+
+
+def get_storage() -> LocalStorage:
+    """获取存储后端（单例模式）"""
+    global _storage
+    if _storage is None:
+        with _lock:
+            if _storage is None:
+                _storage = create_storage()
+    return _storage
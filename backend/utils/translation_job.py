@@ -0,0 +1,91 @@
+"""翻译任务执行
+
+把 TranslationRequest 转换为 BabelDOC 配置并产生标准化的进度事件。
+同一套逻辑既可以在API进程内直接运行，也可以在工作进程中运行。
+"""
+import asyncio
+import json
+from typing import Any, AsyncIterator, Dict
+
+from models.schemas import TranslationRequest
+
+
+def build_translation_config(task_id: str, request: TranslationRequest, doc_layout_model):
+    """根据请求参数构建BabelDOC翻译配置"""
+    from config.settings import OUTPUTS_DIR, GLOSSARIES_DIR
+    from utils.uploads import resolve_upload_path
+    from utils.storage import get_storage
+    from babeldoc.format.pdf.translation_config import TranslationConfig
+    from babeldoc.glossary import Glossary
+    from utils.translation_memory import create_translator
+
+    input_path = resolve_upload_path(request.file_id)
+    if input_path is None:
+        raise FileNotFoundError("源文件不存在")
+
+    translator = create_translator(request)
+
+    glossaries = []
+    storage = get_storage()
+    for glossary_id in request.glossary_ids:
+        glossary_path = storage.fetch(storage.key_for(GLOSSARIES_DIR / f"{glossary_id}.csv"))
+        if glossary_path is not None:
+            glossary = Glossary.from_csv(glossary_path, request.lang_out)
+            glossaries.append(glossary)
+
+    return TranslationConfig(
+        translator=translator,
+        input_file=str(input_path),
+        lang_in=request.lang_in,
+        lang_out=request.lang_out,
+        doc_layout_model=doc_layout_model,
+        pages=request.pages,
+        output_dir=str(OUTPUTS_DIR / task_id),
+        debug=request.debug,
+        no_dual=request.no_dual,
+        no_mono=request.no_mono,
+        qps=request.qps,
+        glossaries=glossaries,
+        watermark_output_mode=False,
+        # 分片任务只输出本分片的页面，便于按页序合并
+        only_include_translated_page=request.sharded
+    )
+
+
+def normalize_event(event: Dict[str, Any]) -> Dict[str, Any]:
+    """将BabelDOC事件转换为可JSON序列化、可跨进程传递的字典"""
+    if event.get("type") == "finish":
+        result = event.get("translate_result")
+        mono_path = getattr(result, "mono_pdf_path", None)
+        dual_path = getattr(result, "dual_pdf_path", None)
+        event = dict(event)
+        event["translate_result"] = {
+            "mono_pdf_path": str(mono_path) if mono_path else None,
+            "dual_pdf_path": str(dual_path) if dual_path else None,
+            "total_seconds": getattr(result, "total_seconds", 0),
+            "peak_memory_usage": getattr(result, "peak_memory_usage", 0)
+        }
+    return json.loads(json.dumps(event, default=str))
+
+
+async def iter_translation_events(task_id: str, request: TranslationRequest) -> AsyncIterator[Dict[str, Any]]:
+    """在当前进程中运行翻译，逐个产出标准化事件"""
+    import babeldoc.format.pdf.high_level as high_level
+    from config.settings import TRANSLATION_MEMORY_ENABLED
+    from utils.layout_pool import get_layout_model_pool
+
+    # 从进程级模型池借用版面分析模型，避免每个任务重新加载ONNX会话
+    layout_lease = await asyncio.to_thread(get_layout_model_pool().acquire)
+    try:
+        config = build_translation_config(task_id, request, layout_lease.model)
+        async for event in high_level.async_translate(config):
+            event = normalize_event(event)
+            if event.get("type") == "finish" and hasattr(config.translator, "memory_stats"):
+                # 本任务的翻译记忆命中情况随结果一起保存到历史记录
+                event["translate_result"]["translation_memory"] = config.translator.memory_stats()
+            yield event
+    finally:
+        layout_lease.release()
+        if TRANSLATION_MEMORY_ENABLED:
+            from utils.translation_memory import flush_hits
+            await asyncio.to_thread(flush_hits)
@@ -0,0 +1,215 @@
+"""段落翻译记忆
+
+BabelDOC 自带的翻译缓存保存在各进程本地，缓存键还包含提示词等参数。这里在翻译器外层
+再加一层服务端共享的翻译记忆：按（规范化原文、源语言、目标语言、模型、术语表哈希）
+查找，命中时不再调用LLM。所有用户和任务共用同一张 SQLite 表，按总大小做LRU淘汰。
+
+查找只读数据库；命中次数和最近使用时间先在进程内累计，攒够 HIT_FLUSH_EVERY 条、
+距上次写入超过 HIT_FLUSH_SECONDS 秒、淘汰前或任务结束时再批量写回，避免每个段落都占用写锁。
+"""
+import hashlib
+import logging
+import re
+import threading
+import time
+import unicodedata
+from typing import Any, Callable, Dict, Optional
+
+from db import TranslationMemory
+from models.schemas import TranslationRequest
+
+logger = logging.getLogger("easy_babeldoc.translation_memory")
+
+# 每个进程每写入多少条检查一次总大小
+EVICT_EVERY = 200
+# 命中统计的批量写回条件
+HIT_FLUSH_EVERY = 500
+HIT_FLUSH_SECONDS = 30
+
+_WHITESPACE = re.compile(r"\s+")
+
+_model = None
+_translator_class = None
+_lock = threading.Lock()
+_puts = 0
+_hits: Dict[str, int] = {}
+_last_hit_flush = time.monotonic()
+
+
+def get_translation_memory_model() -> TranslationMemory:
+    """获取翻译记忆模型（单例模式，使用应用级数据库实例）"""
+    global _model
+    if _model is None:
+        from utils.database import get_database
+        _model = TranslationMemory(get_database())
+    return _model
+
+
+def normalize_text(text: str) -> str:
+    """统一Unicode形式并折叠空白，使仅有排版差异的段落命中同一条记忆"""
+    return _WHITESPACE.sub(" ", unicodedata.normalize("NFC", text)).strip()
+
+
+def memory_key(kind: str, text: str, lang_in: str, lang_out: str, model: str, glossary_hash: str) -> str:
+    """计算翻译记忆键；kind 区分普通翻译与LLM批量翻译两种调用"""
+    raw = "\0".join((kind, lang_in, lang_out, model, glossary_hash, normalize_text(text)))
+    return hashlib.sha256(raw.encode("utf-8")).hexdigest()
+
+
+def record_hit(key: str):
+    """在进程内累计一次命中，满足条件时批量写回"""
+    with _lock:
+        _hits[key] = _hits.get(key, 0) + 1
+        due = len(_hits) >= HIT_FLUSH_EVERY or time.monotonic() - _last_hit_flush >= HIT_FLUSH_SECONDS
+    if due:
+        flush_hits()
+
+
+def flush_hits() -> int:
+    """把累计的命中次数与最近使用时间写回数据库，返回写入的条数"""
+    global _hits, _last_hit_flush
+    with _lock:
+        pending = _hits
+        _hits = {}
+        _last_hit_flush = time.monotonic()
+    if not pending:
+        return 0
+    try:
+        return get_translation_memory_model().record_hits(pending)
+    except Exception as e:
+        logger.error("写入翻译记忆命中统计失败: %s", e)
+        return 0
+
+
+def _store(entry: Dict[str, Any]):
+    global _puts
+    from config.settings import TRANSLATION_MEMORY_MAX_BYTES
+
+    model = get_translation_memory_model()
+    if not model.put(entry):
+        return
+    with _lock:
+        _puts += 1
+        due = _puts % EVICT_EVERY == 0
+    if due and TRANSLATION_MEMORY_MAX_BYTES > 0:
+        # 先写回命中统计，淘汰顺序才反映最近的使用情况
+        flush_hits()
+        model.evict(TRANSLATION_MEMORY_MAX_BYTES)
+
+
+class TranslationMemoryMixin:
+    """为BabelDOC翻译器加上共享翻译记忆，需与 OpenAITranslator 组合使用"""
+
+    def setup_memory(self, glossary_hash: str):
+        self.memory_glossary_hash = glossary_hash
+        self.memory_hits = 0
+        self.memory_misses = 0
+        self._memory_lock = threading.Lock()
+
+    def translate(self, text, ignore_cache=False, rate_limit_params=None):
+        return self._with_memory("translate", text, ignore_cache, lambda: super(TranslationMemoryMixin, self).translate(
+            text, ignore_cache=ignore_cache, rate_limit_params=rate_limit_params
+        ))
+
+    def llm_translate(self, text, ignore_cache=False, rate_limit_params=None):
+        return self._with_memory("llm", text, ignore_cache, lambda: super(TranslationMemoryMixin, self).llm_translate(
+            text, ignore_cache=ignore_cache, rate_limit_params=rate_limit_params
+        ))
+
+    def _with_memory(self, kind: str, text: str, ignore_cache: bool, call: Callable[[], Any]):
+        key = memory_key(kind, text, self.lang_in, self.lang_out, self.model, self.memory_glossary_hash)
+
+        # ignore_cache 表示BabelDOC认为上次结果不可用，此时跳过记忆并用新结果覆盖
+        if not ignore_cache:
+            try:
+                cached = get_translation_memory_model().get(key)
+            except Exception as e:
+                logger.warning("查询翻译记忆失败: %s", e)
+                cached = None
+            if cached is not None:
+                record_hit(key)
+                with self._memory_lock:
+                    self.memory_hits += 1
+                return cached
+
+        with self._memory_lock:
+            self.memory_misses += 1
+        result = call()
+
+        if isinstance(result, str) and result:
+            try:
+                _store({
+                    "memory_key": key,
+                    "lang_in": self.lang_in,
+                    "lang_out": self.lang_out,
+                    "model": self.model,
+                    "glossary_hash": self.memory_glossary_hash,
+                    "source_text": text,
+                    "translation": result,
+                    "size": len(text.encode("utf-8")) + len(result.encode("utf-8")),
+                })
+            except Exception as e:
+                logger.error("写入翻译记忆失败: %s", e)
+        return result
+
+    def memory_stats(self) -> Dict[str, Any]:
+        """返回本任务的翻译记忆命中统计"""
+        with self._memory_lock:
+            lookups = self.memory_hits + self.memory_misses
+            return {
+                "hits": self.memory_hits,
+                "misses": self.memory_misses,
+                "hit_rate": round(self.memory_hits / lookups, 4) if lookups else 0.0,
+            }
+
+
+def create_translator(request: TranslationRequest):
+    """根据请求创建翻译器，启用翻译记忆时返回带记忆的 OpenAITranslator 子类实例"""
+    global _translator_class
+    from babeldoc.translator.translator import OpenAITranslator
+    from config.settings import TRANSLATION_MEMORY_ENABLED
+    from utils.result_cache import glossary_hash
+
+    kwargs = {
+        "lang_in": request.lang_in,
+        "lang_out": request.lang_out,
+        "model": request.model,
+        "api_key": request.api_key,
+        "base_url": request.base_url,
+    }
+    if not TRANSLATION_MEMORY_ENABLED:
+        return OpenAITranslator(**kwargs)
+
+    if _translator_class is None:
+        _translator_class = type("MemoryOpenAITranslator", (TranslationMemoryMixin, OpenAITranslator), {})
+    translator = _translator_class(**kwargs)
+    translator.setup_memory(glossary_hash(request.glossary_ids))
+    return translator
+
+
+def merge_stats(stats_list) -> Optional[Dict[str, Any]]:
+    """汇总多个任务（如分片）的命中统计"""
+    stats_list = [stats for stats in stats_list if stats]
+    if not stats_list:
+        return None
+    hits = sum(stats["hits"] for stats in stats_list)
+    misses = sum(stats["misses"] for stats in stats_list)
+    lookups = hits + misses
+    return {"hits": hits, "misses": misses, "hit_rate": round(hits / lookups, 4) if lookups else 0.0}
+
+
+def stats() -> Dict[str, Any]:
+    """返回共享翻译记忆的总体统计"""
+    from config.settings import TRANSLATION_MEMORY_ENABLED, TRANSLATION_MEMORY_MAX_BYTES
+
+    try:
+        totals = get_translation_memory_model().totals()
+    except Exception:
+        totals = {"entries": 0, "size": 0, "hits": 0}
+    return {
+        "enabled": TRANSLATION_MEMORY_ENABLED,
+        "entries": totals["entries"],
+        "size": totals["size"],
+        "max_size": TRANSLATION_MEMORY_MAX_BYTES,
+        "lifetime_hits": totals["hits"],
+    }
@@ -0,0 +1,171 @@
+"""按内容哈希去重的上传文件存储
+
+相同内容的PDF只在 UPLOADS_DIR/blobs 下保存一份，每次上传得到独立的 file_id 别名，
+文件块按引用计数删除。旧版本直接保存为 UPLOADS_DIR/<file_id>.pdf 的文件仍可正常使用。
+使用对象存储时文件块同时上传到存储桶，其他节点读取时下载到本地缓存（见 utils/storage.py）。
+
+上传内容按固定大小的块写入临时文件并同时计算哈希，单次上传占用的内存不超过一个块。
+"""
+import hashlib
+import logging
+import os
+import threading
+import uuid
+from pathlib import Path
+from typing import Any, Callable, Dict, Optional
+
+import aiofiles
+
+from db import UploadStore
+
+logger = logging.getLogger("easy_babeldoc.uploads")
+
+_store = None
+# 写入/删除文件块与引用计数更新需要串行，避免删除与重复上传交错
+_blob_lock = threading.Lock()
+
+def get_upload_store() -> UploadStore:
+    """获取上传文件模型（单例模式，使用应用级数据库实例）"""
+    global _store
+    if _store is None:
+        from utils.database import get_database
+        _store = UploadStore(get_database())
+    return _store
+
+def blob_relpath(sha256: str, suffix: str = ".pdf") -> str:
+    """文件块相对 UPLOADS_DIR 的路径，按哈希前两位分目录"""
+    return f"blobs/{sha256[:2]}/{sha256}{suffix}"
+
+class UploadTooLargeError(Exception):
+    """上传内容超过大小限制"""
+
+    def __init__(self, max_bytes: int):
+        self.max_bytes = max_bytes
+        super().__init__(f"文件大小超过限制（{max_bytes // (1024 * 1024)}MB）")
+
+async def receive_upload(file, directory: Path, max_bytes: int,
+                         on_chunk: Optional[Callable[[bytes], None]] = None) -> Dict[str, Any]:
+    """把上传内容按块写入 directory 下的临时文件，同时计算 SHA-256 和大小
+
+    Args:
+        file: FastAPI UploadFile
+        directory: 临时文件所在目录（应与最终位置在同一文件系统，以便原子重命名）
+        max_bytes: 大小上限，0 表示不限制
+        on_chunk: 每个数据块的回调（例如统计行数）
+
+    Returns:
+        临时文件路径、sha256 和 size；超过大小限制时抛出 UploadTooLargeError 并删除临时文件
+    """
+    from config.settings import UPLOAD_CHUNK_SIZE
+
+    # 客户端声明的大小已经超限时不再读取内容
+    if max_bytes and file.size is not None and file.size > max_bytes:
+        raise UploadTooLargeError(max_bytes)
+
+    directory.mkdir(parents=True, exist_ok=True)
+    tmp_path = directory / f".{uuid.uuid4()}.part"
+    digest = hashlib.sha256()
+    size = 0
+    try:
+        async with aiofiles.open(tmp_path, "wb") as f:
+            while True:
+                chunk = await file.read(UPLOAD_CHUNK_SIZE)
+                if not chunk:
+                    break
+                size += len(chunk)
+                if max_bytes and size > max_bytes:
+                    raise UploadTooLargeError(max_bytes)
+                digest.update(chunk)
+                if on_chunk:
+                    on_chunk(chunk)
+                await f.write(chunk)
+    except BaseException:
+        tmp_path.unlink(missing_ok=True)
+        raise
+
+    return {"path": tmp_path, "sha256": digest.hexdigest(), "size": size}
+
+def store_upload(received: Dict[str, Any], filename: Optional[str], user_id: Optional[str] = None) -> Dict[str, Any]:
+    """把 receive_upload 写好的临时文件登记为上传，重复内容直接复用已有文件块
+
+    Returns:
+        上传信息，包含 file_id、sha256、size 以及是否命中去重
+    """
+    from config.settings import UPLOADS_DIR
+    from utils.storage import get_storage
+
+    storage = get_storage()
+    sha256 = received["sha256"]
+    relpath = blob_relpath(sha256)
+    blob_path = UPLOADS_DIR / relpath
+    file_id = str(uuid.uuid4())
+
+    with _blob_lock:
+        # 对象存储中已有相同内容（可能由其他节点上传）时不再上传
+        if blob_path.exists() or (storage.remote and get_upload_store().get_blob(sha256)):
+            received["path"].unlink(missing_ok=True)
+        else:
+            storage.save(storage.key_for(blob_path), received["path"])
+        deduplicated = get_upload_store().add(
+            file_id, sha256, received["size"], relpath, filename=filename, user_id=user_id
+        )
+
+    return {
+        "file_id": file_id,
+        "sha256": sha256,
+        "size": received["size"],
+        "deduplicated": deduplicated,
+    }
+
+def get_upload(file_id: str) -> Optional[Dict[str, Any]]:
+    """获取上传记录"""
+    try:
+        return get_upload_store().get(file_id)
+    except Exception as e:
+        logger.error("获取上传记录失败: %s", e)
+        return None
+
+def upload_exists(file_id: str) -> bool:
+    """上传记录是否存在（不读取、不下载文件内容）"""
+    from config.settings import UPLOADS_DIR
+
+    return get_upload(file_id) is not None or (UPLOADS_DIR / f"{Path(file_id).name}.pdf").exists()
+
+def resolve_upload_path(file_id: str) -> Optional[Path]:
+    """根据 file_id 找到实际文件路径（使用对象存储时下载到本地缓存），兼容旧版本的 <file_id>.pdf"""
+    from config.settings import UPLOADS_DIR
+    from utils.storage import get_storage
+
+    upload = get_upload(file_id)
+    if upload:
+        storage = get_storage()
+        path = storage.fetch(storage.key_for(UPLOADS_DIR / upload["blob_path"]))
+        if path is not None:
+            return path
+
+    legacy_path = UPLOADS_DIR / f"{file_id}.pdf"
+    if legacy_path.exists():
+        return legacy_path
+    return None
+
+def delete_upload(file_id: str) -> bool:
+    """删除上传别名；最后一个引用被删除时同时删除文件块"""
+    from config.settings import UPLOADS_DIR
+    from utils.storage import get_storage
+
+    if Path(file_id).name != file_id:
+        return False
+
+    with _blob_lock:
+        if get_upload(file_id):
+            orphan = get_upload_store().remove(file_id)
+            if orphan:
+                storage = get_storage()
+                storage.delete(storage.key_for(UPLOADS_DIR / orphan["path"]))
+            return True
+
+    legacy_path = UPLOADS_DIR / f"{file_id}.pdf"
+    if legacy_path.exists():
+        legacy_path.unlink()
+        return True
+    return False
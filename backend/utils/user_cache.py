@@ -0,0 +1,99 @@
+"""令牌→用户解析缓存
+
+需要用户信息的接口（模型配置、/api/auth/me）每次请求都按令牌查询 users 表。这里在进程内
+缓存解析结果（只保存公开字段，不含密码哈希），按 TTL 过期并限制条目数（LRU 淘汰）。
+本进程内修改用户后调用 invalidate()；其他进程（如 tools/user_manager.py）的修改在 TTL 内生效。
+"""
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Dict, Optional
+
+PUBLIC_FIELDS = ("user_id", "username", "email", "is_guest")
+
+
+class UserCache:
+    """带 TTL 与容量上限的用户缓存（线程安全）"""
+
+    def __init__(self, ttl_seconds: float, max_entries: int):
+        self.ttl_seconds = ttl_seconds
+        self.max_entries = max_entries
+        self._entries: "OrderedDict[str, tuple]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._hits = 0
+        self._misses = 0
+        self._invalidations = 0
+
+    def get(self, user_id: str) -> Optional[Dict[str, Any]]:
+        """返回未过期的缓存用户，未命中返回None"""
+        now = time.monotonic()
+        with self._lock:
+            entry = self._entries.get(user_id)
+            if entry is not None and entry[0] > now:
+                self._entries.move_to_end(user_id)
+                self._hits += 1
+                return dict(entry[1])
+            if entry is not None:
+                del self._entries[user_id]
+            self._misses += 1
+            return None
+
+    def put(self, user: Dict[str, Any]):
+        """缓存用户的公开字段"""
+        if self.ttl_seconds <= 0 or self.max_entries <= 0:
+            return
+        record = {field: user.get(field) for field in PUBLIC_FIELDS}
+        with self._lock:
+            self._entries[record["user_id"]] = (time.monotonic() + self.ttl_seconds, record)
+            self._entries.move_to_end(record["user_id"])
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def invalidate(self, user_id: str):
+        """用户信息变化后移除缓存"""
+        with self._lock:
+            if self._entries.pop(user_id, None) is not None:
+                self._invalidations += 1
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            lookups = self._hits + self._misses
+            return {
+                "ttl_seconds": self.ttl_seconds,
+                "max_entries": self.max_entries,
+                "entries": len(self._entries),
+                "hits": self._hits,
+                "misses": self._misses,
+                "invalidations": self._invalidations,
+                "hit_rate": round(self._hits / lookups, 4) if lookups else 0.0,
+            }
+
+
+_cache: Optional[UserCache] = None
+
+
+def get_user_cache() -> UserCache:
+    """获取全局用户缓存（单例模式）"""
+    global _cache
+    if _cache is None:
+        from config.settings import USER_CACHE_TTL, USER_CACHE_SIZE
+        _cache = UserCache(ttl_seconds=USER_CACHE_TTL, max_entries=USER_CACHE_SIZE)
+    return _cache
+
+
+def lookup_user(user_id: str) -> Optional[Dict[str, Any]]:
+    """经缓存查询用户，缓存未命中时查询数据库（需在线程中调用），用户不存在时返回None"""
+    from db import User
+    from utils.database import get_database
+
+    cache = get_user_cache()
+    user = cache.get(user_id)
+    if user is None:
+        user = User(get_database()).get_by_id(user_id)
+        if user:
+            cache.put(user)
+    return user
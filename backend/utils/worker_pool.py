@@ -0,0 +1,254 @@
+"""翻译工作进程池
+
+PDF解析、版面分析和渲染都是CPU密集型操作，放在API进程的事件循环里运行会拖慢
+所有HTTP/WebSocket请求。这里维护一组常驻工作进程，每个任务独占一个进程运行，
+进度事件通过管道传回API进程，再进入 active_translations 和 WebSocket 推送流程。
+"""
+import asyncio
+import logging
+import multiprocessing
+import threading
+from typing import Any, AsyncIterator, Dict, List, Optional
+
+logger = logging.getLogger("easy_babeldoc.worker_pool")
+
+
+def _worker_main(conn, prewarm: bool):
+    """工作进程入口：循环接收任务并把事件写回管道"""
+    from utils.database import init_database
+
+    # 数据库迁移已在API进程启动时完成
+    init_database(migrate=False)
+
+    try:
+        import babeldoc.format.pdf.high_level as high_level
+        high_level.init()
+    except Exception as e:
+        logger.warning("BabelDOC initialization skipped in worker: %s", e)
+
+    if prewarm:
+        try:
+            from utils.layout_pool import get_layout_model_pool
+            get_layout_model_pool().warmup()
+        except Exception as e:
+            logger.warning("Layout model pool warmup skipped in worker: %s", e)
+
+    while True:
+        try:
+            message = conn.recv()
+        except (EOFError, OSError):
+            break
+        if message is None:
+            break
+        task_id, request_data = message
+        asyncio.run(_run_job(conn, task_id, request_data))
+
+
+async def _run_job(conn, task_id: str, request_data: Dict[str, Any]):
+    """在工作进程中运行单个翻译任务"""
+    from models.schemas import TranslationRequest
+    from utils.translation_job import iter_translation_events
+
+    try:
+        request = TranslationRequest(**request_data)
+        async for event in iter_translation_events(task_id, request):
+            conn.send(("event", event))
+    except Exception as e:
+        conn.send(("event", {"type": "error", "error": str(e)}))
+    finally:
+        conn.send(("done", None))
+
+
+class _Worker:
+    """单个工作进程及其通信管道"""
+
+    def __init__(self, ctx, prewarm: bool):
+        self.conn, child_conn = ctx.Pipe()
+        self.process = ctx.Process(
+            target=_worker_main,
+            args=(child_conn, prewarm),
+            name="babeldoc-worker",
+            daemon=True,
+        )
+        self.process.start()
+        child_conn.close()
+        self.jobs = 0
+
+    def alive(self) -> bool:
+        return self.process.is_alive()
+
+    def stop(self, timeout: float = 5.0):
+        try:
+            self.conn.send(None)
+        except (OSError, ValueError):
+            pass
+        self.process.join(timeout)
+        if self.process.is_alive():
+            self.kill()
+        self.conn.close()
+
+    def kill(self):
+        if self.process.is_alive():
+            self.process.kill()
+        self.process.join()
+
+
+class TranslationWorkerPool:
+    """固定大小的翻译工作进程池"""
+
+    def __init__(self, size: int, max_jobs_per_worker: int = 0, prewarm: bool = True):
+        """初始化
+
+        Args:
+            size: 工作进程数量
+            max_jobs_per_worker: 单个进程运行多少个任务后回收重建，0 表示不回收
+            prewarm: 工作进程启动时是否预热版面分析模型
+        """
+        self.size = max(size, 1)
+        self.max_jobs_per_worker = max(max_jobs_per_worker, 0)
+        self.prewarm = prewarm
+        # spawn 在各平台行为一致，也避免 fork 带线程的父进程
+        self._ctx = multiprocessing.get_context("spawn")
+        self._idle: List[_Worker] = []
+        self._busy: Dict[str, _Worker] = {}
+        self._lock = threading.Lock()
+        self._available: Optional[asyncio.Semaphore] = None
+        self._started = False
+        self._jobs = 0
+        self._restarted = 0
+        self._recycled = 0
+
+    def start(self):
+        """启动所有工作进程（重复调用无副作用）"""
+        with self._lock:
+            if self._started:
+                return
+            self._started = True
+            for _ in range(self.size):
+                self._idle.append(_Worker(self._ctx, self.prewarm))
+        logger.info("Started %s translation worker process(es)", self.size)
+
+    def shutdown(self):
+        """停止所有工作进程"""
+        with self._lock:
+            workers = self._idle + list(self._busy.values())
+            self._idle = []
+            self._busy = {}
+            self._started = False
+        for worker in workers:
+            worker.stop()
+
+    async def run(self, task_id: str, request_data: Dict[str, Any]) -> AsyncIterator[Dict[str, Any]]:
+        """在工作进程中运行任务，逐个产出进度事件
+
+        取消时直接结束对应工作进程并补充一个新进程。
+        """
+        self.start()
+        if self._available is None:
+            self._available = asyncio.Semaphore(self.size)
+
+        async with self._available:
+            worker = self._checkout(task_id)
+            discard = False
+            try:
+                worker.conn.send((task_id, request_data))
+                while True:
+                    try:
+                        kind, payload = await asyncio.to_thread(worker.conn.recv)
+                    except (EOFError, OSError):
+                        discard = True
+                        raise RuntimeError("翻译工作进程异常退出")
+                    if kind == "done":
+                        break
+                    yield payload
+            except BaseException:
+                discard = True
+                raise
+            finally:
+                self._checkin(task_id, worker, discard=discard)
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                "size": self.size,
+                "started": self._started,
+                "idle": len(self._idle),
+                "busy": len(self._busy),
+                "jobs": self._jobs,
+                "restarted": self._restarted,
+                "recycled": self._recycled,
+            }
+
+    def _checkout(self, task_id: str) -> _Worker:
+        with self._lock:
+            worker = None
+            while self._idle:
+                candidate = self._idle.pop()
+                if candidate.alive():
+                    worker = candidate
+                    break
+                self._restarted += 1
+            if worker is None:
+                worker = _Worker(self._ctx, self.prewarm)
+            self._busy[task_id] = worker
+            worker.jobs += 1
+            self._jobs += 1
+            return worker
+
+    def _checkin(self, task_id: str, worker: _Worker, discard: bool):
+        with self._lock:
+            self._busy.pop(task_id, None)
+            recycle = bool(self.max_jobs_per_worker and worker.jobs >= self.max_jobs_per_worker)
+            if self._started and not discard and not recycle:
+                self._idle.append(worker)
+                return
+            if discard:
+                self._restarted += 1
+            elif recycle:
+                self._recycled += 1
+        # 结束旧进程、启动新进程可能耗时，放到后台线程避免阻塞事件循环
+        threading.Thread(
+            target=self._replace,
+            args=(worker, discard),
+            name="babeldoc-worker-replace",
+            daemon=True,
+        ).start()
+
+    def _replace(self, worker: _Worker, kill: bool):
+        if kill:
+            worker.kill()
+            worker.conn.close()
+        else:
+            worker.stop()
+        with self._lock:
+            if not self._started or len(self._idle) + len(self._busy) >= self.size:
+                return
+        replacement = _Worker(self._ctx, self.prewarm)
+        with self._lock:
+            if self._started and len(self._idle) + len(self._busy) < self.size:
+                self._idle.append(replacement)
+                return
+        replacement.stop()
+
+
+_pool: Optional[TranslationWorkerPool] = None
+_pool_lock = threading.Lock()
+
+
+def get_worker_pool() -> TranslationWorkerPool:
+    """获取全局工作进程池（单例模式）"""
+    global _pool
+    if _pool is None:
+        with _pool_lock:
+            if _pool is None:
+                from config.settings import (
+                    TRANSLATION_WORKER_PROCESSES,
+                    TRANSLATION_WORKER_MAX_JOBS,
+                    LAYOUT_MODEL_POOL_PREWARM,
+                )
+                _pool = TranslationWorkerPool(
+                    size=TRANSLATION_WORKER_PROCESSES,
+                    max_jobs_per_worker=TRANSLATION_WORKER_MAX_JOBS,
+                    prewarm=LAYOUT_MODEL_POOL_PREWARM,
+                )
+    return _pool